@@ -174,4 +174,11 @@ CORS_ALLOW_METHODS = [
     'PUT',
     'DELETE',
     'OPTIONS',
-]
\ No newline at end of file
+]
+# Background jobs (project app): list builds, large exports and index rebuilds are queued in the
+# database and only run while at least one worker is running alongside the web server:
+#     python manage.py run_jobs
+# A job whose worker stops sending heartbeats for JOB_STALE_AFTER seconds is queued again, and
+# fails after JOB_MAX_ATTEMPTS claims
+JOB_STALE_AFTER = 300
+JOB_MAX_ATTEMPTS = 3
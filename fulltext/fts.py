@@ -0,0 +1,129 @@
+# File: fts.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: SQLite FTS5 full-text index helpers shared by the project and mini_insta search modules.
+#              Neither app owns them, so neither app imports the other.
+
+import re
+from django.db import connection
+
+# Ids per IN (...) clause when removing rows (kept under SQLite's bound parameter limit)
+ID_BATCH_SIZE = 900
+
+
+def search_available(using=connection):
+    """Return True if the database supports FTS5 search indexes (SQLite only)."""
+    return using.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Turn what the user typed into a safe FTS5 query: every word must match,
+    and the last word may be a prefix ("12 main st" matches "12 MAIN STREET"),
+    so results follow along as the user types. Words are quoted, so FTS5
+    operators in the text are searched for rather than obeyed.
+    Returns '' if there is nothing to search for.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    """
+    One FTS5 table whose rowids are the ids of the rows it indexes. Every
+    method does nothing (or finds nothing) on databases without FTS5, so
+    callers fall back to plain filters there.
+    """
+
+    def __init__(self, table, columns, tokenize='unicode61'):
+        self.table = table
+        self.columns = list(columns)
+        self.tokenize = tokenize
+
+    def create(self, using=connection):
+        """Create the table if it does not exist."""
+        if not search_available(using):
+            return
+        with using.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                f'USING fts5({", ".join(self.columns)}, tokenize = "{self.tokenize}")'
+            )
+
+    def drop(self, using=connection):
+        """Drop the table."""
+        if not search_available(using):
+            return
+        with using.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def refill(self, select_sql, params=(), using=connection):
+        """
+        Replace every row with those returned by select_sql, a SELECT of (id,
+        then one value per column), in one INSERT ... SELECT.
+        """
+        if not search_available(using):
+            return
+        self.create(using)
+        with using.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(f'INSERT INTO {self.table} (rowid, {", ".join(self.columns)}) {select_sql}', params)
+
+    def reindex(self, ids, select_sql, batch_size=ID_BATCH_SIZE):
+        """
+        Re-index (or, for ids select_sql no longer returns, drop) many rows.
+        select_sql selects (id, then one value per column) and ends in a WHERE
+        with an IN clause whose placeholder is {placeholders}.
+        """
+        if not search_available():
+            return
+        ids = list(ids)
+        with connection.cursor() as cursor:
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', batch)
+                cursor.execute(
+                    f'INSERT INTO {self.table} (rowid, {", ".join(self.columns)}) '
+                    + select_sql.format(placeholders=placeholders),
+                    batch
+                )
+
+    def index(self, row_id, values):
+        """Add or replace one row; values holds one value per column, in order."""
+        if not search_available():
+            return
+        placeholders = ', '.join(['%s'] * (len(self.columns) + 1))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [row_id])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, {", ".join(self.columns)}) VALUES ({placeholders})',
+                [row_id, *values]
+            )
+
+    def unindex(self, row_id):
+        """Remove one row."""
+        if not search_available():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [row_id])
+
+    def matching_ids_sql(self, match):
+        """Return (sql, params) selecting the rowids that match an FTS5 query (for use as a subquery)."""
+        return f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match]
+
+    def ranked_ids(self, match, limit, weights=None):
+        """
+        Return the rowids matching an FTS5 query, best first (bm25, with a weight
+        per column if weights is given), at most limit of them.
+        """
+        if not match or not search_available():
+            return []
+        order = f'bm25({self.table}, {", ".join(str(weight) for weight in weights)})' if weights else 'rank'
+        sql, params = self.matching_ids_sql(match)
+        with connection.cursor() as cursor:
+            cursor.execute(f'{sql} ORDER BY {order} LIMIT %s', params + [limit])
+            return [row[0] for row in cursor.fetchall()]
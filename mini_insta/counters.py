@@ -0,0 +1,46 @@
+# File: counters.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Denormalized follower, following, post, like and comment counts for mini_insta
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Profile, Post, Follow, Comment, Like
+
+
+def adjust_count(model, pk, field, change):
+    """Add change to one row's counter in the database (an UPDATE with F(), so concurrent changes are not lost)."""
+    model.objects.filter(pk=pk).update(**{field: F(field) + change})
+
+
+def count_of(model, field):
+    """Return an expression counting the rows of model whose field points at the outer row."""
+    counts = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def repair_counters(profile_model=Profile, post_model=Post, follow_model=Follow,
+                    like_model=Like, comment_model=Comment):
+    """
+    Recompute every counter from the rows it counts (models may be historical ones from a migration).
+    Returns a (profiles corrected, posts corrected) tuple.
+    """
+    profile_counts = {
+        'follower_count': count_of(follow_model, 'profile'),
+        'following_count': count_of(follow_model, 'follower_profile'),
+        'post_count': count_of(post_model, 'profile'),
+    }
+    post_counts = {
+        'like_count': count_of(like_model, 'post'),
+        'comment_count': count_of(comment_model, 'post'),
+    }
+
+    # Count the rows with a wrong counter before fixing them all in one UPDATE per table
+    wrong_profiles = profile_model.objects.annotate(**{f'expected_{name}': value for name, value in profile_counts.items()}) \
+        .exclude(**{name: F(f'expected_{name}') for name in profile_counts}).count()
+    wrong_posts = post_model.objects.annotate(**{f'expected_{name}': value for name, value in post_counts.items()}) \
+        .exclude(**{name: F(f'expected_{name}') for name in post_counts}).count()
+
+    profile_model.objects.update(**profile_counts)
+    post_model.objects.update(**post_counts)
+    return wrong_profiles, wrong_posts
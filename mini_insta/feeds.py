@@ -0,0 +1,116 @@
+# File: feeds.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Fan-out-on-write maintenance of the materialized mini_insta feeds, and reading them a page at a time
+
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q, OuterRef, Subquery
+from django.urls import reverse
+from .models import Post, Photo, Follow, Like, FeedEntry
+
+# Feed entries written per INSERT
+FEED_BATCH_SIZE = 1000
+
+# Posts per page of the JSON feed (the default and the most a client may ask for)
+FEED_PAGE_SIZE = 20
+MAX_FEED_PAGE_SIZE = 50
+
+
+def fan_out_post(post):
+    """Add a new post to the feed of every follower of its author."""
+    follower_ids = Follow.objects.filter(profile_id=post.profile_id).values_list('follower_profile_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(reader_id=reader_id, post_id=post.pk, author_id=post.profile_id, timestamp=post.timestamp)
+         for reader_id in follower_ids.distinct()],
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_feed(reader_id, author_id, post_model=Post, entry_model=FeedEntry):
+    """Add every post by author to reader's feed (used when reader starts following author)."""
+    posts = post_model.objects.filter(profile_id=author_id).values_list('pk', 'timestamp')
+    entry_model.objects.bulk_create(
+        [entry_model(reader_id=reader_id, post_id=post_id, author_id=author_id, timestamp=timestamp)
+         for post_id, timestamp in posts.iterator(chunk_size=FEED_BATCH_SIZE)],
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune_feed(reader_id, author_id):
+    """Remove author's posts from reader's feed, unless reader still follows author."""
+    if not Follow.objects.filter(profile_id=author_id, follower_profile_id=reader_id).exists():
+        FeedEntry.objects.filter(reader_id=reader_id, author_id=author_id).delete()
+
+
+def rebuild_feeds(post_model=Post, follow_model=Follow, entry_model=FeedEntry):
+    """Rebuild every feed from the current follows and posts (models may be historical ones from a migration)."""
+    entry_model.objects.all().delete()
+    pairs = follow_model.objects.values_list('follower_profile_id', 'profile_id').distinct()
+    for reader_id, author_id in pairs.iterator():
+        backfill_feed(reader_id, author_id, post_model, entry_model)
+
+
+def encode_feed_cursor(timestamp, post_id):
+    """Encode a (timestamp, post id) feed position as an opaque URL-safe string."""
+    return base64.urlsafe_b64encode(json.dumps([timestamp.isoformat(), post_id]).encode()).decode().rstrip('=')
+
+
+def decode_feed_cursor(cursor):
+    """Decode a cursor made by encode_feed_cursor into (timestamp, post id); raise ValueError if it is malformed."""
+    try:
+        timestamp, post_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(timestamp), int(post_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid feed cursor: {cursor}') from e
+
+
+def feed_page(reader, after=None, limit=FEED_PAGE_SIZE):
+    """
+    Return (posts, next cursor) for one page of reader's feed, newest first, as
+    JSON-ready dictionaries. The page is found with a WHERE on (timestamp, post id)
+    after the cursor rather than an OFFSET, so every page costs the same few queries.
+    """
+    entries = FeedEntry.objects.filter(reader=reader)
+    if after:
+        timestamp, post_id = decode_feed_cursor(after)
+        entries = entries.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, post_id__lt=post_id))
+
+    first_photo = Photo.objects.filter(post=OuterRef('post_id')).order_by('pk').values('pk')[:1]
+    entries = list(
+        entries.select_related('post__profile').annotate(first_photo_id=Subquery(first_photo))
+        .order_by('-timestamp', '-post_id')[:limit + 1]
+    )
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    post_ids = [entry.post_id for entry in entries]
+    photos = Photo.objects.in_bulk([entry.first_photo_id for entry in entries if entry.first_photo_id])
+    liked = set(Like.objects.filter(profile=reader, post_id__in=post_ids).values_list('post_id', flat=True))
+
+    posts = []
+    for entry in entries:
+        post, author = entry.post, entry.post.profile
+        photo = photos.get(entry.first_photo_id)
+        posts.append({
+            'id': post.pk,
+            'url': reverse('show_post', kwargs={'pk': post.pk}),
+            'caption': post.caption,
+            'timestamp': post.timestamp.isoformat(),
+            'author': {
+                'id': author.pk,
+                'username': author.username,
+                'display_name': author.display_name,
+                'image_url': author.profile_image_url,
+                'url': reverse('show_profile', kwargs={'pk': author.pk}),
+            },
+            'photo_url': photo.get_image_url() if photo else None,
+            'like_count': post.like_count,
+            'comment_count': post.comment_count,
+            'liked': post.pk in liked,
+        })
+
+    next_cursor = encode_feed_cursor(entries[-1].timestamp, entries[-1].post_id) if more else None
+    return posts, next_cursor
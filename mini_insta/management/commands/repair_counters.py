@@ -0,0 +1,21 @@
+# File: repair_counters.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Management command that recomputes the mini_insta follower, following, post, like and comment counts
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from mini_insta.counters import repair_counters
+
+
+class Command(BaseCommand):
+    """Recompute every denormalized counter from the rows it counts."""
+
+    help = 'Recompute the follower, following, post, like and comment counts of every profile and post.'
+
+    def handle(self, *args, **options):
+        """Run the repair and report how many rows were wrong."""
+        with transaction.atomic():
+            wrong_profiles, wrong_posts = repair_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted all profiles and posts: corrected {wrong_profiles} profiles and {wrong_posts} posts'
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Feed entries written per INSERT
+FEED_BATCH_SIZE = 1000
+
+
+def build_feeds(apps, schema_editor):
+    """Fill the feed of every profile with the posts of everyone it follows."""
+    Post = apps.get_model('mini_insta', 'Post')
+    Follow = apps.get_model('mini_insta', 'Follow')
+    FeedEntry = apps.get_model('mini_insta', 'FeedEntry')
+    pairs = Follow.objects.values_list('follower_profile_id', 'profile_id').distinct()
+    for reader_id, author_id in pairs.iterator():
+        posts = Post.objects.filter(profile_id=author_id).values_list('pk', 'timestamp')
+        FeedEntry.objects.bulk_create(
+            [FeedEntry(reader_id=reader_id, post_id=post_id, author_id=author_id, timestamp=timestamp)
+             for post_id, timestamp in posts.iterator(chunk_size=FEED_BATCH_SIZE)],
+            batch_size=FEED_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mini_insta', '0007_profile_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='mini_insta.profile')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='mini_insta.post')),
+                ('reader', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='mini_insta.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['reader', '-timestamp', '-post'], name='feed_entry_newest'), models.Index(fields=['reader', 'author'], name='feed_entry_author')],
+                'constraints': [models.UniqueConstraint(fields=('reader', 'post'), name='unique_feed_entry')],
+            },
+        ),
+        migrations.RunPython(build_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:32
+
+from django.db import migrations
+
+# The FTS5 tables as they were created by this migration (kept here so later changes to mini_insta.search don't alter them)
+POST_SEARCH_TABLE = 'mini_insta_post_fts'
+PROFILE_SEARCH_TABLE = 'mini_insta_profile_fts'
+TOKENIZE = 'unicode61 remove_diacritics 2'
+
+
+def build_search_index(apps, schema_editor):
+    """Create the FTS5 search tables and index the existing posts and profiles (SQLite only)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {POST_SEARCH_TABLE} USING fts5(caption, tokenize = "{TOKENIZE}")')
+    schema_editor.execute(f'DELETE FROM {POST_SEARCH_TABLE}')
+    schema_editor.execute(f'INSERT INTO {POST_SEARCH_TABLE} (rowid, caption) SELECT id, caption FROM mini_insta_post')
+
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {PROFILE_SEARCH_TABLE} '
+        f'USING fts5(username, display_name, bio_text, tokenize = "{TOKENIZE}")'
+    )
+    schema_editor.execute(f'DELETE FROM {PROFILE_SEARCH_TABLE}')
+    schema_editor.execute(
+        f'INSERT INTO {PROFILE_SEARCH_TABLE} (rowid, username, display_name, bio_text) '
+        f'SELECT id, username, display_name, bio_text FROM mini_insta_profile'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    """Drop the FTS5 search tables."""
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {POST_SEARCH_TABLE}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {PROFILE_SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mini_insta', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -17,6 +17,11 @@ class Profile(models.Model):
     bio_text = models.TextField(blank=True)
     join_date = models.DateTimeField(auto_now=True)
 
+    # Counts kept up to date by signal handlers (see counters.py); repair_counters recomputes them
+    follower_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
+    post_count = models.IntegerField(default=0)
+
     def __str__(self):
         return f"{self.display_name} (@{self.username})"
     
@@ -30,26 +35,26 @@ class Profile(models.Model):
     
     def get_followers(self):
         """Return a list of Profile objects who are followers of this profile."""
-        follows = Follow.objects.filter(profile=self)
+        follows = Follow.objects.filter(profile=self).select_related('follower_profile')
         return [follow.follower_profile for follow in follows]
     
     def get_num_followers(self):
         """Return the count of followers for this profile."""
-        return len(self.get_followers())
+        return self.follower_count
     
     def get_following(self):
         """Return a list of Profile objects that this profile is following."""
-        follows = Follow.objects.filter(follower_profile=self)
+        follows = Follow.objects.filter(follower_profile=self).select_related('profile')
         return [follow.profile for follow in follows]
     
     def get_num_following(self):
         """Return the count of profiles being followed by this profile."""
-        return len(self.get_following())
+        return self.following_count
     
     def get_post_feed(self):
         """Return a QuerySet of Posts from profiles being followed by this profile, ordered by most recent."""
-        following_profiles = self.get_following()
-        return Post.objects.filter(profile__in=following_profiles).order_by('-timestamp')
+        # Read from this profile's materialized feed (see FeedEntry) instead of searching every post
+        return Post.objects.filter(feedentry__reader=self).order_by('-feedentry__timestamp', '-feedentry__post_id')
     
     def is_following(self, other_profile):
         """Check if this profile is following another profile."""
@@ -58,22 +63,42 @@ class Profile(models.Model):
             profile=other_profile
         ).exists()
     
+class PostQuerySet(models.QuerySet):
+    """QuerySet of posts with helpers to load everything a page of posts shows."""
+
+    def with_details(self):
+        """Load each post's author, photos and comments (with their authors) in a fixed number of queries."""
+        return self.select_related('profile').prefetch_related(
+            models.Prefetch('photo_set', queryset=Photo.objects.order_by('pk')),
+            models.Prefetch('comment_set', queryset=Comment.objects.select_related('profile').order_by('pk')),
+        )
+
+    def with_photos(self):
+        """Load each post's photos in one extra query."""
+        return self.prefetch_related(models.Prefetch('photo_set', queryset=Photo.objects.order_by('pk')))
+
 class Post(models.Model):
     """Post model to store user posts."""
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
     timestamp = models.DateTimeField(auto_now_add=True)
     caption = models.TextField(blank=True)
 
+    # Counts kept up to date by signal handlers (see counters.py); repair_counters recomputes them
+    like_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
+
     def __str__(self):
         return f"Post by {self.profile.display_name} at {self.timestamp}"
     
     def get_all_photos(self):
-        """Retrieve all photos associated with this post as a QuerySet containing photos."""
-        return Photo.objects.filter(post=self)
+        """Retrieve all photos associated with this post as a QuerySet containing photos (prefetched ones if loaded)."""
+        return self.photo_set.all()
     
     def get_all_comments(self):
-        """Retrieve all comments associated with this post."""
-        return Comment.objects.filter(post=self)
+        """Retrieve all comments associated with this post (prefetched ones if loaded)."""
+        return self.comment_set.all()
     
     def get_likes(self):
         """Retrieve all likes associated with this post."""
@@ -134,4 +159,27 @@ class Like(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Like by {self.profile.display_name} on Post {self.post.pk}"
\ No newline at end of file
+        return f"Like by {self.profile.display_name} on Post {self.post.pk}"
+
+class FeedEntry(models.Model):
+    """FeedEntry model to store one post in the feed of one profile that follows its author.
+    Entries are written when a post is created or a profile is followed, and removed on unfollow."""
+    reader = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="feed_entries")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    # Copied from the post so a feed can be read and pruned without joining to it
+    author = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="+")
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['reader', 'post'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            # Newest entries of one feed first
+            models.Index(fields=['reader', '-timestamp', '-post'], name='feed_entry_newest'),
+            # Entries to drop when a reader unfollows an author
+            models.Index(fields=['reader', 'author'], name='feed_entry_author'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in the feed of Profile {self.reader_id}"
@@ -0,0 +1,80 @@
+# File: search.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: SQLite FTS5 full-text indexes over mini_insta post captions and profile names and bios
+
+from django.db import connection
+from fulltext.fts import SearchIndex, search_available, build_match_query
+from .models import Profile, Post
+
+# The FTS5 tables; their rowids are Post and Profile ids
+POST_SEARCH_TABLE = 'mini_insta_post_fts'
+PROFILE_SEARCH_TABLE = 'mini_insta_profile_fts'
+
+POST_SEARCH_INDEX = SearchIndex(POST_SEARCH_TABLE, ['caption'], tokenize='unicode61 remove_diacritics 2')
+PROFILE_SEARCH_INDEX = SearchIndex(PROFILE_SEARCH_TABLE, ['username', 'display_name', 'bio_text'],
+                                   tokenize='unicode61 remove_diacritics 2')
+
+# Column weights for ranking profiles: a username match counts most, then the display name, then the bio
+PROFILE_COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Most matches ranked per search
+SEARCH_RESULT_LIMIT = 1000
+
+
+def rebuild_search_index(using=connection):
+    """Refill both search indexes from the post and profile tables with one INSERT ... SELECT each."""
+    POST_SEARCH_INDEX.refill(f'SELECT id, caption FROM {Post._meta.db_table}', using=using)
+    PROFILE_SEARCH_INDEX.refill(
+        f'SELECT id, username, display_name, bio_text FROM {Profile._meta.db_table}', using=using)
+
+
+def index_post(post):
+    """Add or replace one post's row in the search index."""
+    POST_SEARCH_INDEX.index(post.pk, [post.caption])
+
+
+def unindex_post(post_id):
+    """Remove one post from the search index."""
+    POST_SEARCH_INDEX.unindex(post_id)
+
+
+def index_profile(profile):
+    """Add or replace one profile's row in the search index."""
+    PROFILE_SEARCH_INDEX.index(profile.pk, [profile.username, profile.display_name, profile.bio_text])
+
+
+def unindex_profile(profile_id):
+    """Remove one profile from the search index."""
+    PROFILE_SEARCH_INDEX.unindex(profile_id)
+
+
+def ranked_post_ids(text, limit=SEARCH_RESULT_LIMIT):
+    """
+    Return the ids of the posts whose caption best matches text, best first (bm25),
+    at most limit of them. Falls back to a caption substring filter (newest first)
+    on databases without FTS5.
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+    if not search_available():
+        posts = Post.objects.filter(caption__icontains=text.strip()).order_by('-timestamp')
+        return list(posts.values_list('pk', flat=True)[:limit])
+    return POST_SEARCH_INDEX.ranked_ids(match, limit)
+
+
+def ranked_profile_ids(text, limit=SEARCH_RESULT_LIMIT):
+    """
+    Return the ids of the profiles whose username, display name or bio best match
+    text, best first (bm25 weighted by PROFILE_COLUMN_WEIGHTS), at most limit of
+    them. Falls back to substring filters on databases without FTS5.
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+    if not search_available():
+        text = text.strip()
+        profiles = Profile.objects.filter(username__icontains=text) | Profile.objects.filter(
+            display_name__icontains=text) | Profile.objects.filter(bio_text__icontains=text)
+        return list(profiles.order_by('username').values_list('pk', flat=True)[:limit])
+    return PROFILE_SEARCH_INDEX.ranked_ids(match, limit, weights=PROFILE_COLUMN_WEIGHTS)
@@ -0,0 +1,108 @@
+# File: signals.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Signal handlers that keep the materialized mini_insta feeds, counters and search indexes in sync
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Profile, Post, Follow, Like, Comment
+from .feeds import fan_out_post, backfill_feed, prune_feed
+from .counters import adjust_count
+from .search import index_post, unindex_post, index_profile, unindex_profile
+
+
+@receiver(post_save, sender=Post)
+def add_post_to_feeds(sender, instance, created, **kwargs):
+    """Put a new post into the feeds of its author's followers."""
+    if created:
+        fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def add_posts_on_follow(sender, instance, created, **kwargs):
+    """Fill the follower's feed with the posts of the profile they just followed."""
+    if created:
+        backfill_feed(instance.follower_profile_id, instance.profile_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_posts_on_unfollow(sender, instance, **kwargs):
+    """Take the unfollowed profile's posts out of the follower's feed."""
+    prune_feed(instance.follower_profile_id, instance.profile_id)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    """Count a new follow for both profiles."""
+    if created:
+        adjust_count(Profile, instance.profile_id, 'follower_count', 1)
+        adjust_count(Profile, instance.follower_profile_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    """Stop counting a removed follow for both profiles."""
+    adjust_count(Profile, instance.profile_id, 'follower_count', -1)
+    adjust_count(Profile, instance.follower_profile_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    """Count a new post for its author."""
+    if created:
+        adjust_count(Profile, instance.profile_id, 'post_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    """Stop counting a deleted post for its author."""
+    adjust_count(Profile, instance.profile_id, 'post_count', -1)
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance, created, **kwargs):
+    """Count a new like on its post."""
+    if created:
+        adjust_count(Post, instance.post_id, 'like_count', 1)
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like(sender, instance, **kwargs):
+    """Stop counting a removed like on its post."""
+    adjust_count(Post, instance.post_id, 'like_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    """Count a new comment on its post."""
+    if created:
+        adjust_count(Post, instance.post_id, 'comment_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    """Stop counting a removed comment on its post."""
+    adjust_count(Post, instance.post_id, 'comment_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def update_search_after_post_save(sender, instance, **kwargs):
+    """Re-index a saved post's caption."""
+    index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def update_search_after_post_delete(sender, instance, **kwargs):
+    """Drop a deleted post from the search index."""
+    unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def update_search_after_profile_save(sender, instance, **kwargs):
+    """Re-index a saved profile's username, display name and bio."""
+    index_profile(instance)
+
+
+@receiver(post_delete, sender=Profile)
+def update_search_after_profile_delete(sender, instance, **kwargs):
+    """Drop a deleted profile from the search index."""
+    unindex_profile(instance.pk)
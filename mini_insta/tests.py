@@ -1,3 +1,303 @@
+# File: tests.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Tests for mini_insta (query budgets for the feed and profile pages, denormalized counters, feed entries, JSON feed, search)
+
+from importlib import import_module
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
 from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from .models import Profile, Post, Photo, Follow, Comment, Like, FeedEntry
+
+# Queries run to render each page, however many posts, photos, comments and likes it shows
+# (session, user and viewer profile, then the page's own queries)
+FEED_QUERIES = 6
+PROFILE_QUERIES = 7
+FEED_API_QUERIES = 6
+
+
+def make_profile(username):
+    """Create a user and profile that can log in with the password 'password'."""
+    user = User.objects.create_user(username, password='password')
+    return Profile.objects.create(user=user, username=username, display_name=username.title())
+
+
+def make_posts(author, count, commenters):
+    """Create count posts by author, each with two photos, a comment and a like from every commenter."""
+    for index in range(count):
+        post = Post.objects.create(profile=author, caption=f'Post {index} by {author.username}')
+        Photo.objects.create(post=post, image_url=f'https://example.com/{author.username}/{index}/1.jpg')
+        Photo.objects.create(post=post, image_url=f'https://example.com/{author.username}/{index}/2.jpg')
+        for commenter in commenters:
+            Comment.objects.create(post=post, profile=commenter, text=f'Nice post, from {commenter.username}')
+            Like.objects.create(post=post, profile=commenter)
+
+
+class QueryBudgetTest(TestCase):
+    """The feed and profile pages run a fixed number of queries, however many posts they show."""
+
+    def setUp(self):
+        self.viewer = make_profile('viewer')
+        self.authors = [make_profile(f'author{index}') for index in range(3)]
+        self.commenters = [make_profile(f'commenter{index}') for index in range(3)]
+        for author in self.authors:
+            Follow.objects.create(profile=author, follower_profile=self.viewer)
+            for commenter in self.commenters:
+                Follow.objects.create(profile=author, follower_profile=commenter)
+        self.client.login(username='viewer', password='password')
+
+    def assert_page_queries(self, url, expected):
+        """Render url and check it ran exactly the expected number of queries."""
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_queries_do_not_grow_with_posts(self):
+        """Rendering 1 or 31 feed posts costs the same number of queries."""
+        make_posts(self.authors[0], 1, self.commenters)
+        self.assert_page_queries(reverse('show_feed'), FEED_QUERIES)
+
+        for author in self.authors:
+            make_posts(author, 10, self.commenters)
+        self.assert_page_queries(reverse('show_feed'), FEED_QUERIES)
+
+    def test_feed_shows_prefetched_details(self):
+        """The feed still shows each post's author, first photo, like count and comments."""
+        make_posts(self.authors[0], 2, self.commenters)
+        response = self.client.get(reverse('show_feed'))
+        self.assertContains(response, 'https://example.com/author0/1/1.jpg')
+        self.assertNotContains(response, 'https://example.com/author0/1/2.jpg')
+        self.assertContains(response, '3 likes', count=2)
+        self.assertContains(response, 'Nice post, from commenter2', count=2)
+
+    def test_profile_queries_do_not_grow_with_posts(self):
+        """Rendering a profile with 1 or 20 posts (and more followers) costs the same number of queries."""
+        author = self.authors[0]
+        url = reverse('show_profile', kwargs={'pk': author.pk})
+        make_posts(author, 1, self.commenters)
+        self.assert_page_queries(url, PROFILE_QUERIES)
+
+        make_posts(author, 19, self.commenters)
+        for index in range(5):
+            Follow.objects.create(profile=author, follower_profile=make_profile(f'fan{index}'))
+        self.assert_page_queries(url, PROFILE_QUERIES)
+
+
+class CounterTest(TestCase):
+    """Follower, following, post, like and comment counts follow the rows they count."""
+
+    def test_counters_follow_creates_and_deletes(self):
+        """Creating and deleting follows, posts, likes and comments moves the counters."""
+        author, fan = make_profile('author'), make_profile('fan')
+        follow = Follow.objects.create(profile=author, follower_profile=fan)
+        make_posts(author, 2, [fan])
+
+        author.refresh_from_db()
+        fan.refresh_from_db()
+        self.assertEqual((author.follower_count, author.following_count, author.post_count), (1, 0, 2))
+        self.assertEqual((fan.follower_count, fan.following_count, fan.post_count), (0, 1, 0))
+        post = author.get_all_posts().first()
+        self.assertEqual((post.like_count, post.comment_count), (1, 1))
+
+        Like.objects.filter(post=post).delete()
+        Comment.objects.filter(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual((post.like_count, post.comment_count), (0, 0))
+
+        follow.delete()
+        post.delete()
+        author.refresh_from_db()
+        fan.refresh_from_db()
+        self.assertEqual((author.follower_count, author.post_count, fan.following_count), (0, 1, 0))
+
+    def test_repair_counters(self):
+        """repair_counters puts counters that drifted back in line with the rows."""
+        author, fan = make_profile('author'), make_profile('fan')
+        Follow.objects.create(profile=author, follower_profile=fan)
+        make_posts(author, 3, [fan])
+        Profile.objects.update(follower_count=0, post_count=10)
+        Post.objects.filter(pk=author.get_all_posts().first().pk).update(like_count=5)
+
+        output = StringIO()
+        call_command('repair_counters', stdout=output)
+        self.assertIn('corrected 2 profiles and 1 posts', output.getvalue())
+
+        author.refresh_from_db()
+        fan.refresh_from_db()
+        self.assertEqual((author.follower_count, author.post_count, fan.post_count), (1, 3, 0))
+        self.assertEqual(set(Post.objects.values_list('like_count', flat=True)), {1})
+
+
+class FeedTest(TestCase):
+    """Feed entries follow posts and follows: fan-out on post, backfill on follow, prune on unfollow."""
+
+    def setUp(self):
+        self.reader = make_profile('reader')
+        self.author = make_profile('author')
+        self.other = make_profile('other')
+
+    def feed_post_ids(self, reader):
+        """Return the ids of the posts in reader's feed."""
+        return set(FeedEntry.objects.filter(reader=reader).values_list('post_id', flat=True))
+
+    def test_new_post_fans_out_to_followers(self):
+        """A new post reaches every follower (once, even with a duplicate follow) and nobody else."""
+        Follow.objects.create(profile=self.author, follower_profile=self.reader)
+        Follow.objects.create(profile=self.author, follower_profile=self.reader)
+        post = Post.objects.create(profile=self.author, caption='New')
+
+        entry = FeedEntry.objects.get(reader=self.reader)
+        self.assertEqual((entry.post_id, entry.author_id, entry.timestamp), (post.pk, self.author.pk, post.timestamp))
+        self.assertEqual(self.feed_post_ids(self.other), set())
+        self.assertEqual(self.feed_post_ids(self.author), set())
+
+    def test_follow_backfills_existing_posts(self):
+        """Following a profile adds the posts it already made."""
+        make_posts(self.author, 3, [])
+        make_posts(self.other, 2, [])
+        Follow.objects.create(profile=self.author, follower_profile=self.reader)
+        self.assertEqual(self.feed_post_ids(self.reader), set(Post.objects.filter(profile=self.author).values_list('pk', flat=True)))
+
+    def test_unfollow_prunes_posts(self):
+        """Unfollowing removes the author's posts, but only once no follow of that author is left."""
+        make_posts(self.other, 2, [])
+        Follow.objects.create(profile=self.other, follower_profile=self.reader)
+        first = Follow.objects.create(profile=self.author, follower_profile=self.reader)
+        second = Follow.objects.create(profile=self.author, follower_profile=self.reader)
+        make_posts(self.author, 3, [])
+        other_posts = set(Post.objects.filter(profile=self.other).values_list('pk', flat=True))
+
+        first.delete()
+        self.assertEqual(len(self.feed_post_ids(self.reader)), 5)
+        second.delete()
+        self.assertEqual(self.feed_post_ids(self.reader), other_posts)
+
+    def test_migration_rebuilds_feeds(self):
+        """The 0008 data migration fills every feed from the existing follows, with the migration's historical models."""
+        make_posts(self.author, 3, [])
+        make_posts(self.other, 2, [])
+        Follow.objects.create(profile=self.author, follower_profile=self.reader)
+        Follow.objects.create(profile=self.author, follower_profile=self.other)
+        Follow.objects.create(profile=self.other, follower_profile=self.reader)
+        expected = set(FeedEntry.objects.values_list('reader_id', 'post_id', 'author_id', 'timestamp'))
+        FeedEntry.objects.all().delete()
+
+        migration = import_module('mini_insta.migrations.0008_feed_entry')
+        state = MigrationLoader(connection).project_state(('mini_insta', '0008_feed_entry'))
+        migration.build_feeds(state.apps, None)
+        self.assertEqual(set(FeedEntry.objects.values_list('reader_id', 'post_id', 'author_id', 'timestamp')), expected)
+        self.assertEqual(len(expected), 8)
+
+
+class FeedAPITest(TestCase):
+    """The JSON feed pages through the whole feed with cursors and supports If-None-Match."""
+
+    def setUp(self):
+        self.viewer = make_profile('viewer')
+        self.author = make_profile('author')
+        Follow.objects.create(profile=self.author, follower_profile=self.viewer)
+        make_posts(self.author, 25, [self.viewer])
+        self.client.login(username='viewer', password='password')
+
+    def test_pages_cover_the_feed_once(self):
+        """Following next cursors returns every post once, newest first, for the same number of queries per page."""
+        # Posts made in the same instant are ordered by id
+        FeedEntry.objects.filter(post__in=Post.objects.all()[:5]).update(timestamp=Post.objects.first().timestamp)
+
+        seen = []
+        url = reverse('feed_api') + '?limit=10'
+        while url:
+            with self.assertNumQueries(FEED_API_QUERIES):
+                data = self.client.get(url).json()
+            seen.extend(post['id'] for post in data['posts'])
+            url = reverse('feed_api') + f"?limit=10&after={data['next']}" if data['next'] else None
+
+        expected = list(self.viewer.get_post_feed().values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 25)
+
+    def test_post_payload(self):
+        """Each post carries its author summary, first photo, counts and whether the viewer liked it."""
+        post = self.viewer.get_post_feed().first()
+        Like.objects.filter(post=post, profile=self.viewer).delete()
+        data = self.client.get(reverse('feed_api') + '?limit=2').json()
+
+        first, second = data['posts']
+        self.assertEqual(first['id'], post.pk)
+        self.assertEqual(first['author']['username'], 'author')
+        self.assertEqual(first['photo_url'], 'https://example.com/author/24/1.jpg')
+        self.assertEqual((first['like_count'], first['comment_count'], first['liked']), (0, 1, False))
+        self.assertEqual((second['like_count'], second['liked']), (1, True))
+
+    def test_if_none_match(self):
+        """An unchanged page is answered with 304, and a change to it gives a new ETag."""
+        url = reverse('feed_api')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        make_posts(self.author, 1, [])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_bad_cursor(self):
+        """A cursor that was not made by the feed is rejected."""
+        response = self.client.get(reverse('feed_api') + '?after=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchTest(TestCase):
+    """Search ranks profiles and posts by relevance and keeps its index in step with edits and deletes."""
+
+    def setUp(self):
+        self.viewer = make_profile('viewer')
+        self.client.login(username='viewer', password='password')
+
+    def search(self, query, page=1):
+        """Return the context of the search results page for query."""
+        response = self.client.get(reverse('search'), {'query': query, 'page': page})
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def test_profiles_ranked_by_field(self):
+        """A username match ranks above a bio match, and the last word matches as a prefix."""
+        fan = make_profile('sailing_fan')
+        sailor = make_profile('sailor')
+        fan.bio_text = 'Writes about sailors and boats'
+        fan.save()
+        sailor.bio_text = 'Out on the water'
+        sailor.save()
+
+        profiles = self.search('sailor')['profiles']
+        self.assertEqual([profile.username for profile in profiles], ['sailor', 'sailing_fan'])
+        self.assertEqual({profile.username for profile in self.search('sail')['profiles']}, {'sailor', 'sailing_fan'})
+        self.assertEqual(list(self.search('boat')['profiles']), [fan])
+
+    def test_posts_follow_edits_and_deletes(self):
+        """Editing a caption reindexes the post, and a deleted post drops out of the results."""
+        author = make_profile('author')
+        post = Post.objects.create(profile=author, caption='Sunset over the harbor')
+        other = Post.objects.create(profile=author, caption='Harbor at noon')
+        self.assertEqual({found.pk for found in self.search('harb')['posts']}, {post.pk, other.pk})
+
+        post.caption = 'Sunrise in the mountains'
+        post.save()
+        self.assertEqual([found.pk for found in self.search('harbor')['posts']], [other.pk])
+        self.assertEqual([found.pk for found in self.search('mountains')['posts']], [post.pk])
+
+        other.delete()
+        self.assertEqual(list(self.search('harbor')['posts']), [])
 
-# Create your tests here.
+    def test_results_are_paginated(self):
+        """Matching posts are split into pages, each showing its own posts."""
+        author = make_profile('author')
+        make_posts(author, 30, [])
+        first, second = self.search('post'), self.search('post', page=2)
+        self.assertEqual((len(first['posts']), len(second['posts'])), (24, 6))
+        self.assertFalse({post.pk for post in first['posts']} & {post.pk for post in second['posts']})
+        self.assertContains(self.client.get(reverse('search'), {'query': 'post'}), '?query=post&page=2')
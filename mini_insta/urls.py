@@ -4,7 +4,7 @@
 
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from .views import ProfileListView, ProfileDetailView, PostDetailView, CreatePostView, UpdateProfileView, UpdatePostView, DeletePostView, ShowFollowersDetailView, ShowFollowingDetailView, PostFeedListView, SearchView, LogoutConfirmationView, CreateProfileView, FollowProfileView, UnfollowProfileView, LikePostView, UnlikePostView
+from .views import ProfileListView, ProfileDetailView, PostDetailView, CreatePostView, UpdateProfileView, UpdatePostView, DeletePostView, ShowFollowersDetailView, ShowFollowingDetailView, PostFeedListView, PostFeedAPIView, SearchView, LogoutConfirmationView, CreateProfileView, FollowProfileView, UnfollowProfileView, LikePostView, UnlikePostView
 
 urlpatterns = [
     path('', ProfileListView.as_view(), name='show_all_profiles'),
@@ -14,6 +14,7 @@ urlpatterns = [
     path('profile/<int:pk>/follow', FollowProfileView.as_view(), name='follow_profile'),
     path('profile/<int:pk>/delete_follow', UnfollowProfileView.as_view(), name='delete_follow'),
     path('profile/feed', PostFeedListView.as_view(), name='show_feed'),
+    path('profile/feed.json', PostFeedAPIView.as_view(), name='feed_api'),
     path('profile/search', SearchView.as_view(), name='search'),
     path('post/<int:pk>/', PostDetailView.as_view(), name='show_post'),
     path('post/<int:pk>/like', LikePostView.as_view(), name='like_post'),
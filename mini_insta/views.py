@@ -2,7 +2,7 @@
 # Author: Travis Falk(travisf@bu.edu), 9/25/2025
 # Description: View definitions for mini_insta app
 
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView, View
 from django.shortcuts import render, redirect
 from .models import Profile, Post, Photo, Follow, Like
 from .forms import CreatePostForm, UpdateProfileForm, UpdatePostForm, CreateProfileForm
@@ -10,6 +10,10 @@ from django.urls import reverse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
+from django.http import JsonResponse, HttpResponseNotModified
+from .feeds import feed_page, FEED_PAGE_SIZE, MAX_FEED_PAGE_SIZE
+from .search import ranked_post_ids, ranked_profile_ids
+import hashlib
 
 # Create your views here.
 class CustomLoginRequiredMixin(LoginRequiredMixin):
@@ -48,10 +52,13 @@ class ProfileDetailView(DetailView):
     model = Profile
     template_name = 'mini_insta/show_profile.html'
     context_object_name = 'profile'
+    # The template compares the profile's user with the logged in user
+    queryset = Profile.objects.select_related('user')
 
     def get_context_data(self, **kwargs):
-        """Add flags related to the viewing user for template logic."""
+        """Add flags related to the viewing user and the profile's posts for template logic."""
         context = super().get_context_data(**kwargs)
+        context['posts'] = self.object.get_all_posts().with_photos()
         # Determine if logged-in user follows this profile
         if self.request.user.is_authenticated:
             try:
@@ -136,28 +143,53 @@ class PostFeedListView(CustomLoginRequiredMixin, ListView):
 
     template_name = 'mini_insta/show_feed.html'
     context_object_name = 'posts'
+    # Number of newest posts shown
+    feed_length = 50
 
     def get_queryset(self):
-        '''Return the QuerySet of posts for the feed'''
-        # Get profile from logged in user
-        profile = self.get_profile()
-        return profile.get_post_feed()
+        '''Return the QuerySet of the newest posts for the feed'''
+        # Get profile from logged in user (kept for get_context_data)
+        self.profile = self.get_profile()
+        # Authors, photos, comments and like counts are loaded up front rather than per post
+        return self.profile.get_post_feed().with_details()[:self.feed_length]
     
     def get_context_data(self, **kwargs):
         '''Add the profile to the context data'''
         context = super().get_context_data(**kwargs)
-        # Get profile from logged in user
-        profile = self.get_profile()
+        profile = self.profile
         context['profile'] = profile
         # Add viewer_profile for navbar
         context['viewer_profile'] = profile
         return context
 
+class PostFeedAPIView(CustomLoginRequiredMixin, View):
+    '''Define a JSON endpoint returning the feed a page at a time (for infinite scroll)'''
+
+    def get(self, request):
+        '''Handle ?after=<cursor>&limit=N and return {"posts": [...], "next": cursor or null}'''
+        try:
+            limit = min(max(int(request.GET.get('limit', FEED_PAGE_SIZE)), 1), MAX_FEED_PAGE_SIZE)
+            posts, next_cursor = feed_page(self.get_profile(), request.GET.get('after'), limit)
+        except ValueError:
+            return JsonResponse({'error': 'Expected after=<cursor from a previous page> and limit=N'}, status=400)
+
+        # The ETag is a hash of the page, so a client polling an unchanged page gets an empty 304
+        response = JsonResponse({'posts': posts, 'next': next_cursor})
+        etag = '"' + hashlib.md5(response.content).hexdigest() + '"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
 class SearchView(CustomLoginRequiredMixin, ListView):
     '''Define a view to search for profiles and posts'''
 
     template_name = 'mini_insta/search_results.html'
     context_object_name = 'posts'
+    # Posts per page of results, and profiles shown above them
+    paginate_by = 24
+    profile_limit = 12
 
     def dispatch(self, request, *args, **kwargs):
         '''Handle the request and return the appropriate template'''
@@ -171,14 +203,19 @@ class SearchView(CustomLoginRequiredMixin, ListView):
             return super().dispatch(request, *args, **kwargs)
     
     def get_queryset(self):
-        '''Return the QuerySet of posts that match the search query'''
+        '''Return the ids of the posts that match the search query, best match first'''
         query = self.request.GET.get('query', '')
-        return Post.objects.filter(caption__icontains=query)
+        # Only the ids are paginated; the posts on the current page are loaded in get_context_data
+        return ranked_post_ids(query)
     
     def get_context_data(self, **kwargs):
         '''Add additional context data for the template'''
         context = super().get_context_data(**kwargs)
         
+        # Load the posts on this page of results, keeping their ranking order
+        posts = Post.objects.select_related('profile').with_photos().in_bulk(context['posts'])
+        context['posts'] = [posts[pk] for pk in context['posts'] if pk in posts]
+        
         # Get the profile from logged in user
         profile = self.get_profile()
         context['profile'] = profile
@@ -189,9 +226,10 @@ class SearchView(CustomLoginRequiredMixin, ListView):
         query = self.request.GET.get('query', '')
         context['query'] = query
         
-        # Get matching profiles
-        matching_profiles = Profile.objects.filter(username__icontains=query) | Profile.objects.filter(display_name__icontains=query) | Profile.objects.filter(bio_text__icontains=query)
-        context['profiles'] = matching_profiles
+        # Get the best matching profiles
+        profile_ids = ranked_profile_ids(query, limit=self.profile_limit)
+        profiles = Profile.objects.in_bulk(profile_ids)
+        context['profiles'] = [profiles[pk] for pk in profile_ids if pk in profiles]
         
         return context
 
@@ -0,0 +1,85 @@
+# File: addresses.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Street address normalization used by the geocoding index
+
+import re
+
+# Abbreviations expanded so "12 Main St" and "12 MAIN STREET" normalize the same way
+ADDRESS_ABBREVIATIONS = {
+    'ST': 'STREET', 'STR': 'STREET',
+    'AVE': 'AVENUE', 'AV': 'AVENUE',
+    'RD': 'ROAD',
+    'DR': 'DRIVE',
+    'LN': 'LANE',
+    'BLVD': 'BOULEVARD',
+    'CT': 'COURT',
+    'PL': 'PLACE',
+    'TER': 'TERRACE', 'TERR': 'TERRACE',
+    'PKWY': 'PARKWAY',
+    'HWY': 'HIGHWAY',
+    'SQ': 'SQUARE',
+    'CIR': 'CIRCLE',
+    'WAY': 'WAY',
+    'HTS': 'HEIGHTS',
+    'MT': 'MOUNT',
+    'N': 'NORTH', 'S': 'SOUTH', 'E': 'EAST', 'W': 'WEST',
+}
+
+# A leading house number such as "12", "12A" or "12-14"
+HOUSE_NUMBER_PATTERN = re.compile(r'^(\d+)[A-Z]?(?:-\d+[A-Z]?)?$')
+
+# A ZIP code (ZIP+4 keeps only its first five digits)
+ZIP_CODE_PATTERN = re.compile(r'\b(\d{5})(?:-\d{4})?\b')
+
+# State names that may follow the city ("Worcester, MA 01608" or "Worcester Massachusetts")
+STATE_NAMES = {'MA', 'MASS', 'MASSACHUSETTS'}
+
+
+def normalize_address(address):
+    """
+    Return (normalized address, normalized street, house number) for a street address.
+
+    Only the part before the first comma is used, so "12 Main St, Boston MA"
+    becomes ('12 MAIN STREET', 'MAIN STREET', 12). The house number is None when
+    the address does not start with one.
+    """
+    street_part = address.split(',')[0].upper()
+    tokens = re.sub(r'[^A-Z0-9\- ]', ' ', street_part).split()
+
+    house_number = None
+    if tokens:
+        match = HOUSE_NUMBER_PATTERN.match(tokens[0])
+        if match:
+            house_number = int(match.group(1))
+
+    if house_number is None:
+        street = ' '.join(ADDRESS_ABBREVIATIONS.get(token, token) for token in tokens)
+        return street, street, None
+
+    street = ' '.join(ADDRESS_ABBREVIATIONS.get(token, token) for token in tokens[1:])
+    return f'{tokens[0]} {street}'.strip(), street, house_number
+
+
+def normalize_city(city):
+    """Return a city name in the canonical form stored in Property.normalized_city (upper case, punctuation removed)."""
+    return ' '.join(re.sub(r'[^A-Z0-9 ]', ' ', city.upper()).split())
+
+
+def address_locality(address):
+    """
+    Return (normalized city, ZIP code) from the part of an address after its
+    first comma, so "12 Main St, Worcester, MA 01608" gives ('WORCESTER', '01608').
+    Either is '' when the address doesn't give it.
+    """
+    rest = ','.join(address.split(',')[1:]).upper()
+    match = ZIP_CODE_PATTERN.search(rest)
+    zip_code = match.group(1) if match else ''
+    rest = ZIP_CODE_PATTERN.sub(' ', rest)
+
+    for part in rest.split(','):
+        words = normalize_city(part).split()
+        while words and words[-1] in STATE_NAMES:
+            words.pop()
+        if words:
+            return ' '.join(words), zip_code
+    return '', zip_code
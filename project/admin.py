@@ -8,9 +8,11 @@ from .models import PropertyOwner
 from .models import UserProfile
 from .models import Property
 from .models import List
+from .models import Job
 
 # Register your models here.
 admin.site.register(PropertyOwner)
 admin.site.register(UserProfile)
 admin.site.register(Property)
 admin.site.register(List)
+admin.site.register(Job)
@@ -0,0 +1,103 @@
+# File: analytics.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Per-list analytics (value, age, style and owner type breakdowns) from GROUP BY aggregates
+
+from django.db.models import Case, When, Value, F, Count, Sum, IntegerField, ExpressionWrapper
+from .models import List
+
+# Lower edges of the assessed value histogram buckets (the last bucket is open-ended)
+VALUE_BUCKET_EDGES = [0, 100_000, 250_000, 500_000, 750_000, 1_000_000, 2_000_000, 5_000_000]
+
+# Styles shown by name; the rest are grouped as Other
+STYLE_LIMIT = 8
+
+
+def format_dollars(amount):
+    """Return a short dollar label such as $250k or $1.5M."""
+    if amount >= 1_000_000:
+        return f'${amount / 1_000_000:g}M'
+    return f'${amount // 1000}k'
+
+
+def value_bucket_labels():
+    """Return the label of each assessed value bucket."""
+    labels = [f'Under {format_dollars(VALUE_BUCKET_EDGES[1])}']
+    for low, high in zip(VALUE_BUCKET_EDGES[1:], VALUE_BUCKET_EDGES[2:]):
+        labels.append(f'{format_dollars(low)} to {format_dollars(high)}')
+    labels.append(f'{format_dollars(VALUE_BUCKET_EDGES[-1])} and up')
+    return labels
+
+
+def with_shares(groups, total):
+    """Add each group's percentage of the list and its bar width (relative to the largest group)."""
+    largest = max((group['count'] for group in groups), default=0)
+    for group in groups:
+        group['percent'] = round(100 * group['count'] / total, 1) if total else 0
+        group['width'] = round(100 * group['count'] / largest) if largest else 0
+    return groups
+
+
+def compute_list_analytics(marketing_list):
+    """
+    Return the analytics of a list's members as a JSON-ready dictionary.
+    Every figure comes from a GROUP BY query; no Property is loaded.
+    """
+    members = marketing_list.get_members()
+    total = members.count()
+
+    # Assessed value histogram: the bucket index is worked out by the database
+    bucket = Case(
+        *[When(assessed_value__lt=edge, then=Value(index)) for index, edge in enumerate(VALUE_BUCKET_EDGES[1:])],
+        default=Value(len(VALUE_BUCKET_EDGES) - 1),
+        output_field=IntegerField(),
+    )
+    bucket_counts = dict(
+        members.annotate(bucket=bucket).values('bucket').annotate(count=Count('id')).order_by().values_list('bucket', 'count')
+    )
+    values = [
+        {'label': label, 'count': bucket_counts.get(index, 0)}
+        for index, label in enumerate(value_bucket_labels())
+    ]
+
+    # Year built by decade (a year of 0 means it is not recorded)
+    decade = ExpressionWrapper(F('year_built') / 10 * 10, output_field=IntegerField())
+    decades = [
+        {'label': f'{row["decade"]}s' if row['decade'] else 'Unknown', 'count': row['count']}
+        for row in members.annotate(decade=decade).values('decade').annotate(count=Count('id')).order_by('decade')
+    ]
+
+    # Most common styles, with the remainder grouped together
+    styles = [
+        {'label': row['style'] or 'Unknown', 'count': row['count']}
+        for row in members.values('style').annotate(count=Count('id')).order_by('-count', 'style')[:STYLE_LIMIT]
+    ]
+    other = total - sum(style['count'] for style in styles)
+    if other:
+        styles.append({'label': 'Other', 'count': other})
+
+    # Company vs. individual owners, by number of properties and by value
+    owners = [
+        {'label': 'Company' if row['owner__is_company'] else 'Individual',
+         'count': row['count'], 'total_value': row['total_value'] or 0}
+        for row in members.values('owner__is_company').annotate(
+            count=Count('id'), total_value=Sum('assessed_value')).order_by('-owner__is_company')
+    ]
+
+    return {
+        'total': total,
+        'value_buckets': with_shares(values, total),
+        'decades': with_shares(decades, total),
+        'styles': with_shares(styles, total),
+        'owners': with_shares(owners, total),
+    }
+
+
+def get_list_analytics(marketing_list):
+    """
+    Return a list's analytics, computing and storing them on the list if they
+    are not cached (refresh_aggregates clears them whenever membership changes).
+    """
+    if marketing_list.analytics is None:
+        marketing_list.analytics = compute_list_analytics(marketing_list)
+        List.objects.filter(pk=marketing_list.pk).update(analytics=marketing_list.analytics)
+    return marketing_list.analytics
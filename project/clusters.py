@@ -0,0 +1,96 @@
+# File: clusters.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Pre-aggregated map clusters (count, centroid, total value) per grid cell and zoom level
+
+from math import floor
+from django.db import transaction
+from django.db.models import Count, Sum, F
+from django.db.models.functions import Floor
+from .models import Property, PropertyCluster
+
+# Zoom levels with stored clusters; wider views use the lowest level
+MIN_CLUSTER_ZOOM = 5
+MAX_CLUSTER_ZOOM = 15
+
+# Cluster cells per 256px map tile side (so one cell is roughly 64px on screen)
+CELLS_PER_TILE = 4
+
+
+def cluster_level(zoom):
+    """Return the stored cluster level to use for a Leaflet zoom level."""
+    return max(MIN_CLUSTER_ZOOM, min(MAX_CLUSTER_ZOOM, zoom))
+
+
+def cell_size(level):
+    """Return the side of one cluster cell in degrees at a level."""
+    return 360 / (2 ** level) / CELLS_PER_TILE
+
+
+def cell_for(level, lat, lon):
+    """Return the (row, col) cluster cell that a point falls in."""
+    size = cell_size(level)
+    return int(floor(lat / size)), int(floor(lon / size))
+
+
+def rebuild_clusters(property_model=Property, cluster_model=PropertyCluster):
+    """
+    Recompute every cluster level from scratch with one GROUP BY per level.
+    (The models can be swapped for historical models when run from a migration.)
+    """
+    with transaction.atomic():
+        cluster_model.objects.all().delete()
+        for level in range(MIN_CLUSTER_ZOOM, MAX_CLUSTER_ZOOM + 1):
+            size = cell_size(level)
+            cells = (
+                property_model.objects
+                .annotate(row=Floor(F('lat') / size), col=Floor(F('lon') / size))
+                .values('row', 'col')
+                .annotate(count=Count('id'), lat_sum=Sum('lat'), lon_sum=Sum('lon'), total_value=Sum('assessed_value'))
+                .order_by()
+            )
+            cluster_model.objects.bulk_create(
+                (cluster_model(level=level, row=int(cell['row']), col=int(cell['col']), count=cell['count'],
+                               lat_sum=cell['lat_sum'], lon_sum=cell['lon_sum'], total_value=cell['total_value'] or 0)
+                 for cell in cells.iterator(chunk_size=5000)),
+                batch_size=5000
+            )
+
+
+def adjust_clusters(lat, lon, assessed_value, sign):
+    """Add (sign=1) or remove (sign=-1) one property from its cell at every level."""
+    for level in range(MIN_CLUSTER_ZOOM, MAX_CLUSTER_ZOOM + 1):
+        row, col = cell_for(level, lat, lon)
+        updated = PropertyCluster.objects.filter(level=level, row=row, col=col).update(
+            count=F('count') + sign,
+            lat_sum=F('lat_sum') + sign * lat,
+            lon_sum=F('lon_sum') + sign * lon,
+            total_value=F('total_value') + sign * assessed_value,
+        )
+        if not updated and sign > 0:
+            PropertyCluster.objects.create(level=level, row=row, col=col, count=1,
+                                           lat_sum=lat, lon_sum=lon, total_value=assessed_value)
+        elif sign < 0:
+            PropertyCluster.objects.filter(level=level, row=row, col=col, count__lte=0).delete()
+
+
+def clusters_in_box(zoom, min_lat, max_lat, min_lon, max_lon):
+    """Return the clusters that overlap a lat/lon box as a list of dictionaries."""
+    level = cluster_level(zoom)
+    first_row, first_col = cell_for(level, min_lat, min_lon)
+    last_row, last_col = cell_for(level, max_lat, max_lon)
+
+    cells = PropertyCluster.objects.filter(
+        level=level,
+        row__range=(first_row, last_row),
+        col__range=(first_col, last_col),
+    ).values_list('count', 'lat_sum', 'lon_sum', 'total_value')
+
+    return [
+        {
+            'lat': lat_sum / count,
+            'lon': lon_sum / count,
+            'count': count,
+            'total_value': total_value,
+        }
+        for count, lat_sum, lon_sum, total_value in cells
+    ]
@@ -0,0 +1,146 @@
+# File: comparables.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Nearest comparable properties (same style, similar age) from k-d trees built ahead of time, keyed on the property data version
+
+import numpy as np
+from .models import Property
+from .geometry import unit_vectors, chord_to_miles
+from .kdtree import KDTree
+from .snapshot import data_version, data_file_path, write_data_file
+
+# Comparables shown for one property
+COMPARABLE_COUNT = 10
+
+# How far apart (in years) the year built of a comparable may be
+YEAR_BUILT_WINDOW = 15
+
+# Years covered by each tree, so a query only searches the trees of the years it allows
+# (one tree per style would make a narrow window reject most points without pruning any nodes)
+YEAR_BAND_SIZE = 15
+
+
+def year_band(year):
+    """Return the band (of YEAR_BAND_SIZE years) a year built falls in; works on numpy arrays too."""
+    return year // YEAR_BAND_SIZE
+
+
+class ComparablesIndex:
+    """One k-d tree per style and band of years built over property locations, with ids and years lined up with the tree."""
+
+    def __init__(self):
+        self.trees = {}
+
+    @classmethod
+    def build(cls):
+        """Build the index from every property in the database."""
+        index = cls()
+        rows = Property.objects.order_by('style', 'year_built', 'id').values_list('style', 'id', 'year_built', 'lat', 'lon')
+        records = np.array(
+            list(rows.iterator(chunk_size=10000)),
+            dtype=[('style', object), ('id', '<i8'), ('year', '<i8'), ('lat', '<f8'), ('lon', '<f8')],
+        )
+        if not len(records):
+            return index
+
+        # Rows are sorted by style and year, so each (style, band) is one contiguous run
+        styles = records['style']
+        bands = year_band(records['year'])
+        boundaries = np.flatnonzero((styles[1:] != styles[:-1]) | (bands[1:] != bands[:-1])) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(records)]):
+            group = records[start:end]
+            tree = KDTree(unit_vectors(group['lat'], group['lon']))
+            index.trees[group['style'][0], int(bands[start])] = (tree, group['id'][tree.order], group['year'][tree.order])
+        return index
+
+    def save(self, file):
+        """Write the index to an open binary file as an .npz archive (no pickled objects)."""
+        arrays = {
+            'styles': np.array([style for style, _ in self.trees], dtype=str),
+            'bands': np.array([band for _, band in self.trees], dtype=np.int64),
+        }
+        for number, (tree, ids, years) in enumerate(self.trees.values()):
+            arrays.update({f'{number}_{name}': array for name, array in tree.to_arrays().items()})
+            arrays[f'{number}_ids'] = ids
+            arrays[f'{number}_years'] = years
+        np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save (a KeyError means the file is from before trees were split by year band)."""
+        index = cls()
+        with np.load(path, allow_pickle=False) as archive:
+            for number, key in enumerate(zip(archive['styles'].tolist(), archive['bands'].tolist())):
+                tree = KDTree.from_arrays({name: archive[f'{number}_{name}'] for name in KDTree.ARRAY_NAMES})
+                index.trees[key] = (tree, archive[f'{number}_ids'], archive[f'{number}_years'])
+        return index
+
+    def nearest(self, style, lat, lon, year_built, exclude_id=None, k=COMPARABLE_COUNT, year_window=YEAR_BUILT_WINDOW):
+        """Return up to k (property id, distance in miles) pairs of the closest matching properties."""
+        point = unit_vectors([lat], [lon])[0]
+
+        # Search the trees of every band the window touches and keep the k closest overall
+        candidates = []
+        for band in range(year_band(year_built - year_window), year_band(year_built + year_window) + 1):
+            if (style, band) not in self.trees:
+                continue
+            tree, ids, years = self.trees[style, band]
+
+            def accept(start, end):
+                matches = np.abs(years[start:end] - year_built) <= year_window
+                if exclude_id is not None:
+                    matches &= ids[start:end] != exclude_id
+                return matches
+
+            positions, chords = tree.query(point, k, accept=accept)
+            candidates += zip(chords.tolist(), ids[positions].tolist())
+
+        candidates.sort()
+        chords = np.array([chord for chord, _ in candidates[:k]], dtype=np.float64)
+        return list(zip([property_id for _, property_id in candidates[:k]], chord_to_miles(chords).tolist()))
+
+
+# The index for this process: (data version it was built from, index)
+_loaded = (None, None)
+
+
+def comparables_path(version):
+    """Return the location of the comparables index file for a data version."""
+    return data_file_path('property_comparables', version, 'npz')
+
+
+def build_comparables_index(version=None):
+    """
+    Build the comparables index for the current data version (or version) and
+    write it to its file. Run by the loader and the refresh_indexes job, never
+    while serving a request.
+    """
+    version = version or data_version()
+    write_data_file('property_comparables', version, 'npz', ComparablesIndex.build().save)
+
+
+def get_comparables_index():
+    """
+    Return the comparables index for the current data version, loaded from its
+    file. Until the file for a new version is built, the index this process
+    already has (or an empty one) is used and a rebuild is queued.
+    """
+    global _loaded
+    version = data_version()
+    if _loaded[0] != version:
+        try:
+            _loaded = (version, ComparablesIndex.load(comparables_path(version)))
+        except (FileNotFoundError, KeyError):
+            # Not built yet for this version, or written in an older layout
+            from .indexes import schedule_index_refresh
+
+            schedule_index_refresh()
+            return _loaded[1] or ComparablesIndex()
+    return _loaded[1]
+
+
+def find_comparables(prop, k=COMPARABLE_COUNT):
+    """Return [(Property, distance in miles), ...] for the k nearest properties like prop, closest first."""
+    nearest = get_comparables_index().nearest(
+        prop.style, prop.lat, prop.lon, prop.year_built, exclude_id=prop.pk, k=k)
+    properties = Property.objects.select_related('owner').in_bulk([property_id for property_id, _ in nearest])
+    return [(properties[property_id], distance) for property_id, distance in nearest if property_id in properties]
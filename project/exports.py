@@ -0,0 +1,274 @@
+# File: exports.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Export engine (CSV, NDJSON, XLSX, Parquet writers) used to export marketing lists
+
+import csv
+import io
+import json
+import os
+import zlib
+from importlib.util import find_spec
+from django.conf import settings
+
+# Properties fetched from the database per round trip while exporting
+EXPORT_CHUNK_SIZE = 2000
+
+# Rows written to the buffer before it is handed to the response
+ROWS_PER_YIELD = 500
+
+EXPORT_HEADER = [
+    'Property Address',
+    'City',
+    'Zip Code',
+    'Style',
+    'Year Built',
+    'Owner Name',
+    'Owner Address',
+    'Owner Type',
+    'Assessed Value',
+    'Latitude',
+    'Longitude'
+]
+
+# Column names used by the formats that need identifiers rather than titles (NDJSON, Parquet)
+EXPORT_FIELDS = [
+    'address',
+    'city',
+    'zip_code',
+    'style',
+    'year_built',
+    'owner_name',
+    'owner_address',
+    'owner_type',
+    'assessed_value',
+    'lat',
+    'lon',
+]
+
+
+def export_row(property):
+    """Return the exported column values for one property (owner must already be loaded)."""
+    return [
+        property.address,
+        property.city,
+        property.zip_code,
+        property.style,
+        property.year_built,
+        property.owner.name,
+        property.owner.address,
+        'Company' if property.owner.is_company else 'Individual',
+        property.assessed_value,
+        property.lat,
+        property.lon
+    ]
+
+
+def iter_export_rows(queryset, progress=None):
+    """
+    Yield the exported column values of every property in queryset, in id order.
+    Owners are joined in the same query and rows are fetched with a chunked
+    iterator, so memory use does not grow with the size of the list.
+    progress, if given, is called with the number of rows written so far.
+    """
+    rows = queryset.select_related('owner').order_by('pk').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for count, property in enumerate(rows, start=1):
+        yield export_row(property)
+        if progress and count % EXPORT_CHUNK_SIZE == 0:
+            progress(count)
+
+
+def iter_csv(queryset, progress=None):
+    """Yield the CSV export of queryset as a series of text chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+
+    for count, row in enumerate(iter_export_rows(queryset, progress), start=1):
+        writer.writerow(row)
+        if count % ROWS_PER_YIELD == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def iter_ndjson(queryset, progress=None):
+    """Yield the newline-delimited JSON export of queryset (one object per property) as text chunks."""
+    lines = []
+    for row in iter_export_rows(queryset, progress):
+        lines.append(json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n')
+        if len(lines) == ROWS_PER_YIELD:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+
+def iter_gzip(chunks, encoding='utf-8'):
+    """Compress a stream of text chunks into a gzip byte stream on the fly."""
+    compressor = zlib.compressobj(wbits=31) # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(encoding))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class ExportFormat:
+    """
+    One export file format. Streaming formats implement iter_chunks (text
+    chunks); the others implement write, which fills a binary file.
+    """
+    name = ''
+    label = ''
+    extension = ''
+    content_type = 'application/octet-stream'
+    streaming = False
+
+    # Optional package the format needs (checked without importing it)
+    requires = None
+
+    def available(self):
+        """Return True if the package this format needs is installed."""
+        return self.requires is None or find_spec(self.requires) is not None
+
+    def iter_chunks(self, queryset, progress=None):
+        """Yield the export as text chunks (streaming formats only)."""
+        raise NotImplementedError
+
+    def write(self, queryset, file, progress=None):
+        """Write the export of queryset to an open binary file."""
+        for chunk in self.iter_chunks(queryset, progress):
+            file.write(chunk.encode('utf-8'))
+
+
+class CSVFormat(ExportFormat):
+    """Comma-separated values with a header row."""
+    name = 'csv'
+    label = 'CSV'
+    extension = 'csv'
+    content_type = 'text/csv'
+    streaming = True
+
+    def iter_chunks(self, queryset, progress=None):
+        return iter_csv(queryset, progress)
+
+
+class NDJSONFormat(ExportFormat):
+    """One JSON object per line."""
+    name = 'ndjson'
+    label = 'NDJSON'
+    extension = 'ndjson'
+    content_type = 'application/x-ndjson'
+    streaming = True
+
+    def iter_chunks(self, queryset, progress=None):
+        return iter_ndjson(queryset, progress)
+
+
+class XLSXFormat(ExportFormat):
+    """An Excel workbook, written row by row with openpyxl's write-only mode."""
+    name = 'xlsx'
+    label = 'Excel (XLSX)'
+    extension = 'xlsx'
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    requires = 'openpyxl'
+
+    def write(self, queryset, file, progress=None):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Properties')
+        sheet.append(EXPORT_HEADER)
+        for row in iter_export_rows(queryset, progress):
+            sheet.append(row)
+        workbook.save(file)
+
+
+class ParquetFormat(ExportFormat):
+    """An Apache Parquet file written with pyarrow, one row group per fetched chunk."""
+    name = 'parquet'
+    label = 'Parquet'
+    extension = 'parquet'
+    requires = 'pyarrow'
+
+    def write(self, queryset, file, progress=None):
+        import pyarrow
+        import pyarrow.parquet
+
+        schema = pyarrow.schema([
+            ('address', pyarrow.string()),
+            ('city', pyarrow.string()),
+            ('zip_code', pyarrow.string()),
+            ('style', pyarrow.string()),
+            ('year_built', pyarrow.int32()),
+            ('owner_name', pyarrow.string()),
+            ('owner_address', pyarrow.string()),
+            ('owner_type', pyarrow.string()),
+            ('assessed_value', pyarrow.int64()),
+            ('lat', pyarrow.float64()),
+            ('lon', pyarrow.float64()),
+        ])
+
+        def write_batch(writer, rows):
+            columns = list(zip(*rows))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+
+        with pyarrow.parquet.ParquetWriter(file, schema) as writer:
+            rows = []
+            for row in iter_export_rows(queryset, progress):
+                rows.append(row)
+                if len(rows) == EXPORT_CHUNK_SIZE:
+                    write_batch(writer, rows)
+                    rows = []
+            if rows:
+                write_batch(writer, rows)
+
+
+# Every export format, by the name used in ?format=
+EXPORT_FORMATS = {export_format.name: export_format for export_format in (
+    CSVFormat(),
+    NDJSONFormat(),
+    XLSXFormat(),
+    ParquetFormat(),
+)}
+
+
+def available_formats():
+    """Return the export formats whose packages are installed."""
+    return [export_format for export_format in EXPORT_FORMATS.values() if export_format.available()]
+
+
+def export_job_threshold():
+    """Return the list size above which exports run as a background job (EXPORT_JOB_THRESHOLD setting)."""
+    return getattr(settings, 'EXPORT_JOB_THRESHOLD', 50000)
+
+
+def export_filename(marketing_list, export_format):
+    """Return the download file name for a list export."""
+    return f'{marketing_list.list_name}_properties.{export_format.extension}'
+
+
+def run_export_job(job):
+    """
+    Job handler: write a list export to MEDIA_ROOT/exports and attach it to the job.
+    The payload holds list_id and format.
+    """
+    from .jobs import set_progress
+    from .models import List
+
+    marketing_list = List.objects.get(pk=job.payload['list_id'])
+    export_format = EXPORT_FORMATS[job.payload['format']]
+
+    name = f'exports/list_{marketing_list.pk}_job_{job.pk}.{export_format.extension}'
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    total = marketing_list.property_count
+    with open(path, 'wb') as file:
+        export_format.write(marketing_list.get_members(), file,
+                            progress=lambda done: set_progress(job, done, total))
+    job.result_file.name = name
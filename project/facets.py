@@ -0,0 +1,51 @@
+# File: facets.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Precomputed city / zip code / style counts for the property filter dropdowns
+
+from django.db import transaction
+from django.db.models import Count, Sum, F
+from .models import Property, PropertyFacet
+
+# The fields stored in PropertyFacet that can be used as dropdown filters
+FACET_FIELDS = ['city', 'zip_code', 'style']
+
+
+def rebuild_facets(property_model=Property, facet_model=PropertyFacet):
+    """
+    Recompute the facet table from scratch with a single GROUP BY.
+    (The models can be swapped for historical models when run from a migration.)
+    """
+    combinations = (
+        property_model.objects
+        .values(*FACET_FIELDS)
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        facet_model.objects.all().delete()
+        facet_model.objects.bulk_create(
+            (facet_model(**combination) for combination in combinations.iterator(chunk_size=5000)),
+            batch_size=5000
+        )
+
+
+def adjust_facet(city, zip_code, style, change):
+    """Add change (1 or -1) to the count of one facet combination."""
+    facet = PropertyFacet.objects.filter(city=city, zip_code=zip_code, style=style)
+    updated = facet.update(count=F('count') + change)
+    if not updated and change > 0:
+        PropertyFacet.objects.create(city=city, zip_code=zip_code, style=style, count=change)
+    elif change < 0:
+        facet.filter(count__lte=0).delete()
+
+
+def facet_counts(field, **filters):
+    """
+    Return (value, property count) pairs for one facet field, sorted by value.
+    Any filters on the other facet fields (e.g. zip_code='02134') narrow the counts.
+    """
+    facets = PropertyFacet.objects.all()
+    for other_field, value in filters.items():
+        if value and other_field != field:
+            facets = facets.filter(**{other_field: value})
+    return list(facets.values(field).annotate(total=Sum('count')).order_by(field).values_list(field, 'total'))
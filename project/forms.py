@@ -2,6 +2,7 @@
 # Author: Travis Falk(travisf@bu.edu), 12/2/2025
 # Description: Form definitions for project app
 
+import math
 from django import forms
 from .models import *
 
@@ -32,6 +33,82 @@ class CreateListForm(forms.ModelForm):
 class CreateListMapForm(forms.ModelForm):
     """Form to create a new list via map interface."""
 
+    # Limits on drawn selections
+    MAX_POLYGON_POINTS = 500
+    MAX_CIRCLES = 50
+    MAX_CIRCLE_RADIUS = 25
+
+    class Meta:
+        model = List
+        fields = ['list_name', 'notes', 'radius_miles', 'center_lat', 'center_lon', 'selection']
+
+    @staticmethod
+    def check_point(lat, lon):
+        """Reject a point that isn't a finite latitude and longitude."""
+        if not (math.isfinite(lat) and math.isfinite(lon)) or not -90 <= lat <= 90 or not -180 <= lon <= 180:
+            raise forms.ValidationError('Points must have -90 <= latitude <= 90 and -180 <= longitude <= 180.')
+
+    def clean_selection(self):
+        """Check a drawn polygon or set of circles and convert its numbers to floats."""
+        selection = self.cleaned_data.get('selection')
+        if not selection:
+            return None
+
+        try:
+            if selection['type'] == 'polygon':
+                points = [[float(lat), float(lon)] for lat, lon in selection['points']]
+                if not 3 <= len(points) <= self.MAX_POLYGON_POINTS:
+                    raise forms.ValidationError(f'A polygon needs between 3 and {self.MAX_POLYGON_POINTS} points.')
+                for lat, lon in points:
+                    self.check_point(lat, lon)
+                return {'type': 'polygon', 'points': points}
+
+            if selection['type'] == 'circles':
+                circles = [[float(lat), float(lon), float(radius)] for lat, lon, radius in selection['circles']]
+                if not 1 <= len(circles) <= self.MAX_CIRCLES:
+                    raise forms.ValidationError(f'Draw between 1 and {self.MAX_CIRCLES} circles.')
+                for lat, lon, radius in circles:
+                    self.check_point(lat, lon)
+                if any(not 0 < radius <= self.MAX_CIRCLE_RADIUS for lat, lon, radius in circles):
+                    raise forms.ValidationError(f'Each circle radius must be between 0 and {self.MAX_CIRCLE_RADIUS} miles.')
+                return {'type': 'circles', 'circles': circles}
+        except (KeyError, TypeError, ValueError):
+            pass
+
+        raise forms.ValidationError('The drawn selection is not a polygon or a set of circles.')
+
+class ListDetailsForm(forms.ModelForm):
+    """Form to rename a list or edit its notes (used for lists made by combining others)."""
+
     class Meta:
         model = List
-        fields = ['list_name', 'notes', 'radius_miles', 'center_lat', 'center_lon']
\ No newline at end of file
+        fields = ['list_name', 'notes']
+
+
+class CombineListsForm(forms.Form):
+    """Form to combine two of the user's lists into a new one."""
+
+    OPERATION_CHOICES = [
+        ('union', 'Union (properties in either list)'),
+        ('intersection', 'Intersection (properties in both lists)'),
+        ('difference', 'Difference (properties in the first list but not the second)'),
+    ]
+
+    list_name = forms.CharField(label='New List Name')
+    first = forms.ModelChoiceField(queryset=List.objects.none(), label='First List')
+    operation = forms.ChoiceField(choices=OPERATION_CHOICES)
+    second = forms.ModelChoiceField(queryset=List.objects.none(), label='Second List')
+
+    def __init__(self, *args, profile=None, **kwargs):
+        """Offer only the given profile's lists."""
+        super().__init__(*args, **kwargs)
+        lists = List.objects.filter(creator=profile).order_by('list_name')
+        self.fields['first'].queryset = lists
+        self.fields['second'].queryset = lists
+
+    def clean(self):
+        """Require two different lists."""
+        cleaned_data = super().clean()
+        if cleaned_data.get('first') and cleaned_data.get('first') == cleaned_data.get('second'):
+            raise forms.ValidationError('Choose two different lists.')
+        return cleaned_data
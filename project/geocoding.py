@@ -0,0 +1,114 @@
+# File: geocoding.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Indexed address lookup against our local Property table
+
+from functools import lru_cache
+from .models import Property
+from .addresses import normalize_address, address_locality
+from .snapshot import data_version
+
+# How many prefix matches are ranked before picking the best one
+PREFIX_CANDIDATES = 25
+
+# Sorts after every character, so [prefix, prefix + PREFIX_END) is an index range scan
+PREFIX_END = '\U0010ffff'
+
+
+def locality_filters(city, zip_code):
+    """
+    Return the filters to try in turn, most specific first: the ZIP code and city,
+    each on its own, then the whole state. A filter is only tried if the address gave it.
+    """
+    filters = []
+    if city and zip_code:
+        filters.append({'normalized_city': city, 'zip_code': zip_code})
+    if zip_code:
+        filters.append({'zip_code': zip_code})
+    if city:
+        filters.append({'normalized_city': city})
+    filters.append({})
+    return filters
+
+
+def rank_candidates(candidates, house_number):
+    """Pick the best (lat, lon) from (normalized_address, house_number, lat, lon) rows."""
+    def rank(row):
+        normalized, number, lat, lon = row
+        same_number = house_number is not None and number == house_number
+        return (not same_number, len(normalized), normalized)
+
+    best = min(candidates, key=rank)
+    return best[2], best[3]
+
+
+def closest_house_number(street, house_number, locality):
+    """
+    Return (lat, lon) of the property on street (within locality) whose house number
+    is closest to house_number, from the nearest number above and the nearest below
+    (two index seeks on (street, house number)), or None if the street has no numbers.
+    """
+    on_street = Property.objects.filter(normalized_street=street, **locality)
+    above = (on_street.filter(house_number__gte=house_number).order_by('house_number', 'id')
+             .values_list('house_number', 'lat', 'lon').first())
+    below = (on_street.filter(house_number__lt=house_number).order_by('-house_number', 'id')
+             .values_list('house_number', 'lat', 'lon').first())
+    closest = min([row for row in (above, below) if row], key=lambda row: abs(row[0] - house_number), default=None)
+    return closest and (closest[1], closest[2])
+
+
+@lru_cache(maxsize=4096)
+def lookup_normalized(normalized, street, house_number, city, zip_code, version):
+    """
+    Return (lat, lon) for a normalized address, or (None, None) if nothing matches.
+    Tries an exact match, then a prefix match, then a match on the street alone,
+    each first within the address's ZIP code and city (see locality_filters). The
+    closest house number on the street is only looked for within the city or ZIP
+    code the address gave. version is only part of the cache key, so new data means new lookups.
+    """
+    localities = locality_filters(city, zip_code)
+
+    # Exact match on the indexed normalized address
+    for locality in localities:
+        exact = (Property.objects.filter(normalized_address=normalized, **locality)
+                 .order_by('id').values_list('lat', 'lon').first())
+        if exact:
+            return exact
+
+    # Prefix match ("12 MAIN" finds "12 MAIN STREET"), ranked so the shortest completion wins
+    for locality in localities:
+        candidates = list(
+            Property.objects.filter(normalized_address__gte=normalized, normalized_address__lt=normalized + PREFIX_END,
+                                    **locality)
+            .order_by('normalized_address', 'id')
+            .values_list('normalized_address', 'house_number', 'lat', 'lon')[:PREFIX_CANDIDATES]
+        )
+        if candidates:
+            return rank_candidates(candidates, house_number)
+
+    # No house number given ("Main St"): use a property on the first street starting with the text
+    if house_number is None:
+        for locality in localities:
+            on_street = Property.objects.filter(normalized_street__gte=street, normalized_street__lt=street + PREFIX_END,
+                                                **locality)
+            first = on_street.order_by('normalized_street').values_list('lat', 'lon').first()
+            if first:
+                return first
+        return None, None
+
+    # Right street, but the house number isn't in our data: use the closest number in the same place
+    if street:
+        for locality in localities[:-1] or localities:
+            closest = closest_house_number(street, house_number, locality)
+            if closest:
+                return closest
+
+    return None, None
+
+
+def geocode_address(address):
+    """Convert an address to latitude and longitude using our local database."""
+    normalized, street, house_number = normalize_address(address or '')
+    if not normalized:
+        return None, None
+    city, zip_code = address_locality(address)
+    return lookup_normalized(normalized, street, house_number, city, zip_code, data_version())
@@ -0,0 +1,131 @@
+# File: geometry.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Distance and grid-cell helpers shared by the project app
+
+from math import radians, degrees, cos, sin, asin, sqrt, floor, pi
+import numpy as np
+
+# Radius of earth in miles
+EARTH_RADIUS_MILES = 3956
+
+# Length of one degree of latitude in miles (about 69)
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * pi / 180
+
+# Size of one grid cell in degrees (about 0.7 miles of latitude in Massachusetts)
+GRID_CELL_DEGREES = 0.01
+
+# Number of cells in one row of the grid (one full circle of longitude)
+GRID_COLUMNS = int(round(360 / GRID_CELL_DEGREES))
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Calculate the great circle distance between two points on earth (in miles)."""
+    # Source: https://stackoverflow.com/questions/4913349/haversine-formula-in-python-bearing-and-distance-between-two-gps-points
+
+    # Convert decimal degrees to radians
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+
+    # Haversine formula
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+
+    return c * EARTH_RADIUS_MILES
+
+
+def grid_row(lat):
+    """Return the grid row that a latitude falls in."""
+    return int(floor((lat + 90) / GRID_CELL_DEGREES))
+
+
+def grid_column(lon):
+    """Return the grid column that a longitude falls in."""
+    return int(floor((lon + 180) / GRID_CELL_DEGREES)) % GRID_COLUMNS
+
+
+def grid_cell_for(lat, lon):
+    """Return the grid cell number for a point (row-major, so cells in one row are consecutive)."""
+    return grid_row(lat) * GRID_COLUMNS + grid_column(lon)
+
+
+def bounding_box(lat, lon, radius_miles):
+    """Return (min_lat, max_lat, min_lon, max_lon) of a box that fully contains the circle."""
+    lat_delta = radius_miles / MILES_PER_DEGREE
+
+    # A circle that reaches a pole spans every longitude
+    if abs(lat) + lat_delta >= 90:
+        return max(lat - lat_delta, -90), min(lat + lat_delta, 90), -180, 180
+
+    # Otherwise its widest point is where a meridian touches it
+    lon_delta = degrees(asin(sin(radians(lat_delta)) / cos(radians(lat))))
+
+    return lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
+
+
+def grid_cell_ranges(min_lat, max_lat, min_lon, max_lon):
+    """Return a list of (first_cell, last_cell) ranges that cover a lat/lon box, one per grid row."""
+    if max_lon - min_lon >= 360:
+        first_column, last_column = 0, GRID_COLUMNS - 1
+    else:
+        first_column = grid_column(min_lon)
+        last_column = grid_column(max_lon)
+
+    ranges = []
+    for row in range(grid_row(min_lat), grid_row(max_lat) + 1):
+        row_start = row * GRID_COLUMNS
+        if first_column <= last_column:
+            ranges.append((row_start + first_column, row_start + last_column))
+        else:
+            # The box crosses the 180th meridian, so the row is split in two
+            ranges.append((row_start + first_column, row_start + GRID_COLUMNS - 1))
+            ranges.append((row_start, row_start + last_column))
+    return ranges
+
+
+def haversine_distances(lat, lon, lats, lons):
+    """Vectorized haversine: distance in miles from (lat, lon) to every point in the lats/lons arrays."""
+    lat1 = np.radians(lat)
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lats - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64)) - np.radians(lon)
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lats) * np.sin(dlon/2)**2
+    return 2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS_MILES
+
+
+def points_in_polygon(lats, lons, polygon):
+    """
+    Vectorized even-odd test: return a boolean array saying which (lat, lon) points fall
+    inside polygon, a list of [lat, lon] vertices (treated as flat, fine at town scale).
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    inside = np.zeros(lats.shape, dtype=bool)
+
+    # Count how many polygon edges a ray running east from each point crosses
+    for i in range(len(polygon)):
+        lat1, lon1 = polygon[i]
+        lat2, lon2 = polygon[(i + 1) % len(polygon)]
+        if lat1 == lat2:
+            continue
+        spans = (lat1 > lats) != (lat2 > lats)
+        crossing_lon = lon1 + (lon2 - lon1) * (lats - lat1) / (lat2 - lat1)
+        inside ^= spans & (lons < crossing_lon)
+    return inside
+
+
+def unit_vectors(lats, lons):
+    """
+    Return an (n, 3) array of points on the unit sphere for the lats/lons arrays.
+    Straight-line (chord) distance between them grows with great circle distance,
+    so nearest neighbours can be found with plain Euclidean geometry.
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lats = np.cos(lats)
+    return np.column_stack((cos_lats * np.cos(lons), cos_lats * np.sin(lons), np.sin(lats)))
+
+
+def chord_to_miles(chord):
+    """Convert a chord length between unit vectors into a great circle distance in miles."""
+    return 2 * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0)) * EARTH_RADIUS_MILES
@@ -0,0 +1,40 @@
+# File: idsets.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Compact storage for large sets of property ids (sorted, delta-encoded, zlib-compressed)
+
+import zlib
+import numpy as np
+
+# Gaps between neighbouring ids are stored as 32-bit integers
+MAX_ID = 2 ** 32 - 1
+
+
+def unique_ids(ids):
+    """Return ids (any iterable of integers) as a sorted numpy array without duplicates."""
+    if not isinstance(ids, np.ndarray):
+        ids = np.fromiter(ids, dtype=np.int64)
+    ids = np.sort(ids.astype(np.int64, copy=False))
+    if len(ids):
+        ids = ids[np.concatenate(([True], ids[1:] != ids[:-1]))]
+    return ids
+
+
+def encode_ids(ids):
+    """
+    Encode a collection of ids as bytes. The ids are sorted and de-duplicated, and
+    each is stored as its gap from the previous one, so dense id ranges become runs
+    of small numbers that zlib squeezes to a fraction of a byte per id.
+    """
+    ids = unique_ids(ids)
+    if len(ids) and (ids[0] < 0 or ids[-1] > MAX_ID):
+        raise ValueError('Ids must be between 0 and 2**32 - 1')
+    gaps = np.diff(ids, prepend=0).astype('<u4')
+    return zlib.compress(gaps.tobytes())
+
+
+def decode_ids(data):
+    """Decode bytes made by encode_ids into a sorted numpy array of ids."""
+    if not data:
+        return np.empty(0, dtype=np.int64)
+    gaps = np.frombuffer(zlib.decompress(bytes(data)), dtype='<u4')
+    return np.cumsum(gaps, dtype=np.int64)
@@ -0,0 +1,26 @@
+# File: indexes.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Rebuilding the files derived from property data (the coordinate snapshot and comparables index) outside of requests
+
+from .models import Job
+from .jobs import enqueue_job
+from .snapshot import data_version, build_snapshot
+from .comparables import build_comparables_index
+
+
+def refresh_property_indexes():
+    """Build the derived files for the current data version (called by the loader and the refresh_indexes job)."""
+    version = data_version()
+    build_snapshot(version)
+    build_comparables_index(version)
+
+
+def schedule_index_refresh():
+    """Queue a refresh_indexes job, unless one is already waiting (it will see the latest data when it runs)."""
+    if not Job.objects.filter(kind='refresh_indexes', status='queued').exists():
+        enqueue_job('refresh_indexes', {'description': 'Rebuilding property indexes'})
+
+
+def run_refresh_indexes_job(job):
+    """Job handler: rebuild the derived files."""
+    refresh_property_indexes()
@@ -0,0 +1,132 @@
+# File: jobs.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: A small database-backed job queue worked by the run_jobs management command
+# (at least one `python manage.py run_jobs` must be running, or list builds and large exports stay queued)
+
+import threading
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, DatabaseError
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+
+# Function that runs each kind of job; it is given the Job and may call set_progress
+JOB_HANDLERS = {
+    'export_list': 'project.exports.run_export_job',
+    'build_list': 'project.listbuilds.run_build_list_job',
+    'refresh_indexes': 'project.indexes.run_refresh_indexes_job',
+}
+
+# Function called with a job that is given up on without its handler finishing (its worker kept dying)
+JOB_ABANDON_HANDLERS = {
+    'build_list': 'project.listbuilds.abandon_build_list_job',
+}
+
+# Seconds between heartbeats written while a job runs
+HEARTBEAT_INTERVAL = 30
+
+
+def job_stale_after():
+    """Return the seconds without a heartbeat after which a running job's worker is taken to be dead (JOB_STALE_AFTER setting)."""
+    return getattr(settings, 'JOB_STALE_AFTER', 300)
+
+
+def job_max_attempts():
+    """Return how many times a job is claimed before a dead worker makes it fail (JOB_MAX_ATTEMPTS setting)."""
+    return getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+
+
+def enqueue_job(kind, payload, creator=None):
+    """Queue a job of a registered kind and return it."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    return Job.objects.create(kind=kind, payload=payload, creator=creator)
+
+
+def requeue_stale_jobs():
+    """
+    Find running jobs whose worker stopped writing heartbeats (it crashed or was
+    killed) and queue them again, or mark them failed once they have used up
+    job_max_attempts(). Each change is a conditional UPDATE on the old
+    heartbeat, so only one worker acts on a stale job.
+    Returns the number of jobs requeued or failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=job_stale_after())
+    # Jobs claimed before heartbeats were recorded have only their start time
+    stale = Job.objects.filter(status='running').filter(
+        Q(heartbeat__lt=cutoff) | Q(heartbeat=None, started__lt=cutoff)
+    ).values_list('pk', 'heartbeat', 'attempts')
+    changed = 0
+    for job_id, heartbeat, attempts in stale:
+        still_stale = Job.objects.filter(pk=job_id, status='running', heartbeat=heartbeat)
+        if attempts < job_max_attempts():
+            changed += still_stale.update(status='queued', progress=0)
+        elif still_stale.update(status='failed', finished=timezone.now(),
+                                error=f'The worker running this job stopped responding {attempts} times.'):
+            changed += 1
+            job = Job.objects.get(pk=job_id)
+            if job.kind in JOB_ABANDON_HANDLERS:
+                import_string(JOB_ABANDON_HANDLERS[job.kind])(job)
+    return changed
+
+
+def claim_next_job():
+    """
+    Mark the oldest queued job as running and return it, or None if the queue is empty.
+    The claim is a conditional UPDATE, so several workers never run the same job.
+    Jobs left running by a dead worker are requeued first.
+    """
+    requeue_stale_jobs()
+    for job_id in Job.objects.filter(status='queued').order_by('pk').values_list('pk', flat=True)[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running', started=now, heartbeat=now, attempts=F('attempts') + 1)
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def set_progress(job, done, total):
+    """Record that done of total steps are finished (only written when the percentage changes)."""
+    percent = min(99, int(done * 100 / total)) if total else 0
+    if percent != job.progress:
+        job.progress = percent
+        Job.objects.filter(pk=job.pk).update(progress=percent)
+
+
+def send_heartbeats(job_id, stopped):
+    """Write a heartbeat for a running job every HEARTBEAT_INTERVAL seconds until stopped is set."""
+    try:
+        while not stopped.wait(HEARTBEAT_INTERVAL):
+            try:
+                Job.objects.filter(pk=job_id, status='running').update(heartbeat=timezone.now())
+            except DatabaseError:
+                # The database is busy (SQLite allows one writer); the next beat will get through
+                pass
+    finally:
+        connection.close()
+
+
+def run_job(job):
+    """Run a claimed job with its handler (writing heartbeats meanwhile) and record whether it finished or failed."""
+    stopped = threading.Event()
+    heartbeat = threading.Thread(target=send_heartbeats, args=(job.pk, stopped), daemon=True)
+    heartbeat.start()
+    try:
+        import_string(JOB_HANDLERS[job.kind])(job)
+    except Exception as e:
+        job.status = 'failed'
+        job.error = f'{e}\n\n{traceback.format_exc()}'
+    else:
+        job.status = 'done'
+        job.progress = 100
+    finally:
+        stopped.set()
+        heartbeat.join()
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'progress', 'error', 'result_file', 'finished'])
+    return job
+
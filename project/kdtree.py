@@ -0,0 +1,126 @@
+# File: kdtree.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: A small numpy k-d tree for k-nearest-neighbour queries over a fixed set of points
+
+import heapq
+import numpy as np
+
+# Points kept together in one leaf and compared in a single vectorized step
+LEAF_SIZE = 64
+
+
+class KDTree:
+    """
+    A k-d tree over an (n, d) array of points.
+
+    The points are reordered so every node covers a contiguous slice of
+    self.points; self.order maps those positions back to the caller's rows, so
+    any per-point data can be lined up with points[self.order].
+    """
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        points = np.asarray(points, dtype=np.float64)
+        order = np.arange(len(points))
+
+        # Nodes are stored as parallel lists; a split of -1 marks a leaf
+        self.starts, self.ends, self.split_dims, self.split_values, self.lefts, self.rights = [], [], [], [], [], []
+
+        def add_node(start, end):
+            self.starts.append(start)
+            self.ends.append(end)
+            self.split_dims.append(-1)
+            self.split_values.append(0.0)
+            self.lefts.append(-1)
+            self.rights.append(-1)
+            return len(self.starts) - 1
+
+        if len(points):
+            pending = [add_node(0, len(points))]
+            while pending:
+                node = pending.pop()
+                start, end = self.starts[node], self.ends[node]
+                if end - start <= leaf_size:
+                    continue
+
+                # Split the widest dimension at its median
+                rows = order[start:end]
+                node_points = points[rows]
+                dim = int(np.argmax(node_points.max(axis=0) - node_points.min(axis=0)))
+                middle = (end - start) // 2
+                partition = np.argpartition(node_points[:, dim], middle)
+                order[start:end] = rows[partition]
+
+                self.split_dims[node] = dim
+                self.split_values[node] = float(points[order[start + middle], dim])
+                self.lefts[node] = add_node(start, start + middle)
+                self.rights[node] = add_node(start + middle, end)
+                pending += [self.lefts[node], self.rights[node]]
+
+        self.order = order
+        self.points = points[order]
+
+    # Arrays that fully describe a built tree (see to_arrays and from_arrays)
+    ARRAY_NAMES = ('points', 'order', 'starts', 'ends', 'split_dims', 'split_values', 'lefts', 'rights')
+
+    def to_arrays(self):
+        """Return the built tree as a dictionary of numpy arrays (for np.savez)."""
+        return {name: np.asarray(getattr(self, name)) for name in self.ARRAY_NAMES}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Return the tree described by arrays from to_arrays, without rebuilding it."""
+        tree = cls.__new__(cls)
+        tree.points = np.asarray(arrays['points'], dtype=np.float64)
+        tree.order = np.asarray(arrays['order'], dtype=np.int64)
+        # Node fields go back to lists, which are quicker to index one item at a time while searching
+        for name in ('starts', 'ends', 'split_dims', 'split_values', 'lefts', 'rights'):
+            setattr(tree, name, np.asarray(arrays[name]).tolist())
+        return tree
+
+    def query(self, point, k, accept=None):
+        """
+        Return (positions, distances) of the k points nearest to point, closest first.
+
+        Positions index self.points (use self.order to map them back). accept, if
+        given, is called with (start, end) and returns a boolean mask saying which
+        points in that slice may be returned.
+        """
+        point = np.asarray(point, dtype=np.float64)
+        best = []  # max-heap of (-squared distance, position), at most k long
+
+        def search(node):
+            split_dim = self.split_dims[node]
+            if split_dim < 0:
+                start, end = self.starts[node], self.ends[node]
+                distances = ((self.points[start:end] - point) ** 2).sum(axis=1)
+                if accept is not None:
+                    distances[~accept(start, end)] = np.inf
+                if len(distances) > k:
+                    candidates = np.argpartition(distances, k)[:k]
+                else:
+                    candidates = np.arange(len(distances))
+                for offset in candidates:
+                    distance = distances[offset]
+                    if distance == np.inf:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, start + offset))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, start + offset))
+                return
+
+            # Visit the side of the split the point is on first, then the other
+            # side only if it could still hold something closer
+            gap = point[split_dim] - self.split_values[node]
+            near, far = (self.lefts[node], self.rights[node]) if gap < 0 else (self.rights[node], self.lefts[node])
+            search(near)
+            if len(best) < k or gap * gap < -best[0][0]:
+                search(far)
+
+        if self.starts and k > 0:
+            search(0)
+
+        best.sort(reverse=True)
+        positions = np.array([position for _, position in best], dtype=np.int64)
+        distances = np.sqrt(np.array([-distance for distance, _ in best], dtype=np.float64))
+        return positions, distances
@@ -0,0 +1,67 @@
+# File: listbuilds.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Background materialization of list membership (geocoding, spatial search, membership sync)
+
+from .models import List
+from .jobs import enqueue_job, set_progress
+from .geocoding import geocode_address
+from .spatial import find_list_properties
+from .membership import sync_list_properties
+
+
+def set_build_state(marketing_list, status, progress):
+    """Record a list's build status and progress percentage."""
+    marketing_list.build_status = status
+    marketing_list.build_progress = progress
+    List.objects.filter(pk=marketing_list.pk).update(build_status=status, build_progress=progress)
+
+
+def queue_list_build(marketing_list, geocode=False):
+    """
+    Mark a saved list as pending and queue a job to (re)build its membership.
+    With geocode, the job first looks up center_address to set the list's center.
+    """
+    set_build_state(marketing_list, 'pending', 0)
+    return enqueue_job('build_list', {
+        'list_id': marketing_list.pk,
+        'geocode': geocode,
+        'description': f'Building {marketing_list.list_name}',
+    }, creator=marketing_list.creator)
+
+
+def run_build_list_job(job):
+    """
+    Job handler: geocode the list's center if asked, find the properties inside
+    its area and sync its membership, reporting progress as each step finishes.
+    """
+    marketing_list = List.objects.get(pk=job.payload['list_id'])
+    set_build_state(marketing_list, 'building', 5)
+
+    try:
+        if job.payload.get('geocode'):
+            lat, lon = geocode_address(marketing_list.center_address)
+            if lat is None or lon is None:
+                raise ValueError(f'Could not locate "{marketing_list.center_address}"')
+            marketing_list.center_lat = lat
+            marketing_list.center_lon = lon
+            marketing_list.save(update_fields=['center_lat', 'center_lon'])
+            set_build_state(marketing_list, 'building', 25)
+            set_progress(job, 25, 100)
+
+        property_ids = find_list_properties(marketing_list)
+        set_build_state(marketing_list, 'building', 50)
+        set_progress(job, 50, 100)
+
+        sync_list_properties(marketing_list, property_ids)
+    except Exception:
+        set_build_state(marketing_list, 'failed', marketing_list.build_progress)
+        raise
+
+    set_build_state(marketing_list, 'ready', 100)
+
+
+def abandon_build_list_job(job):
+    """Mark the list of a build job that was given up on as failed, so its page stops waiting for it."""
+    marketing_list = List.objects.filter(pk=job.payload.get('list_id')).first()
+    if marketing_list:
+        set_build_state(marketing_list, 'failed', marketing_list.build_progress)
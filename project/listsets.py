@@ -0,0 +1,78 @@
+# File: listsets.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Union, intersection and difference of marketing lists as set-based SQL or on compressed ids
+
+import numpy as np
+from django.db import connection, transaction
+from .models import List
+from .idsets import unique_ids
+from .membership import compression_threshold, sync_list_properties
+
+# Supported operations and the SQL compound operator that performs each one
+LIST_OPERATIONS = {
+    'union': 'UNION',
+    'intersection': 'INTERSECT',
+    'difference': 'EXCEPT',
+}
+
+# The same operations on sorted id arrays without duplicates, for lists stored as compressed ids
+ARRAY_OPERATIONS = {
+    'union': lambda first, second: unique_ids(np.concatenate([first, second])),
+    'intersection': lambda first, second: np.intersect1d(first, second, assume_unique=True),
+    'difference': lambda first, second: np.setdiff1d(first, second, assume_unique=True),
+}
+
+# How each operation is described in the new list's notes
+OPERATION_LABELS = {
+    'union': 'in either',
+    'intersection': 'in both',
+    'difference': 'in the first but not the second',
+}
+
+
+def largest_result(operation, first, second):
+    """Return the most members combining first and second with operation can produce."""
+    if operation == 'union':
+        return first.property_count + second.property_count
+    if operation == 'intersection':
+        return min(first.property_count, second.property_count)
+    return first.property_count
+
+
+def combine_lists(operation, first, second, list_name, creator):
+    """
+    Create a new list holding the union, intersection or difference (first minus
+    second) of two lists' properties. No properties are loaded: small lists are
+    combined by one INSERT ... SELECT over the membership table, and compressed
+    (or large) lists by set operations on their sorted id arrays.
+    Returns the new List.
+    """
+    if operation not in LIST_OPERATIONS:
+        raise ValueError(f'Unknown list operation: {operation}')
+
+    through = List.properties.through
+    table = connection.ops.quote_name(through._meta.db_table)
+
+    with transaction.atomic():
+        combined = List.objects.create(
+            creator=creator,
+            list_name=list_name,
+            notes=f'Properties {OPERATION_LABELS[operation]} of "{first.list_name}" and "{second.list_name}".',
+            selection={'type': 'combined', 'operation': operation, 'lists': [first.pk, second.pk]},
+        )
+        if first.is_compressed() or second.is_compressed() or \
+                largest_result(operation, first, second) >= compression_threshold():
+            member_ids = ARRAY_OPERATIONS[operation](first.get_member_ids(), second.get_member_ids())
+            sync_list_properties(combined, member_ids)
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table} (list_id, property_id) '
+                    f'SELECT %s, property_id FROM {table} WHERE list_id = %s '
+                    f'{LIST_OPERATIONS[operation]} '
+                    f'SELECT %s, property_id FROM {table} WHERE list_id = %s',
+                    [combined.pk, first.pk, combined.pk, second.pk]
+                )
+            combined.refresh_aggregates()
+
+    return combined
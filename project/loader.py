@@ -0,0 +1,437 @@
+# File: loader.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: High-throughput bulk loader for the assessor parcel CSV
+
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.conf import settings
+from django.db import connection, transaction
+from .models import PropertyOwner, Property, List, OwnerPortfolio
+from .parcels import parse_parcel_rows, owner_key
+from .addresses import normalize_city
+from .snapshot import bump_data_version
+from .indexes import refresh_property_indexes
+from .clusters import rebuild_clusters
+from .facets import rebuild_facets
+from .search import rebuild_search_index, reindex_properties
+from .portfolios import refresh_portfolios
+from .membership import lists_containing, drop_compressed_members
+
+# CSV rows parsed and inserted together in one transaction
+DEFAULT_BATCH_SIZE = 5000
+
+
+def default_parcel_file():
+    """Return the default location of the parcel CSV (properties.csv in the project root)."""
+    return os.path.join(settings.BASE_DIR, 'properties.csv')
+
+
+def read_row_chunks(file, chunk_size):
+    """Yield lists of up to chunk_size rows from an open CSV file."""
+    reader = csv.DictReader(file)
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_chunks(chunks, workers):
+    """
+    Yield (rows read, parsed rows) for each chunk, in order.
+    With more than one worker the chunks are parsed in a process pool, keeping
+    only a few chunks in flight so memory stays bounded.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield len(chunk), parse_parcel_rows(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in chunks:
+            pending.append((len(chunk), pool.submit(parse_parcel_rows, chunk)))
+            if len(pending) >= workers * 2:
+                rows_read, future = pending.pop(0)
+                yield rows_read, future.result()
+        for rows_read, future in pending:
+            yield rows_read, future.result()
+
+
+def clear_property_data():
+    """
+    Delete every property, owner, owner portfolio and list membership with plain SQL deletes,
+    and reset every list's summary figures and analytics.
+    (QuerySet.delete() would load every row to send delete signals.)
+    """
+    with connection.cursor() as cursor:
+        for model in (List.properties.through, Property, OwnerPortfolio, PropertyOwner):
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+    bump_data_version()
+    
+    # Every list is now empty
+    List.objects.update(
+        member_ids=None, min_member_id=None, max_member_id=None, property_count=0, total_assessed_value=0,
+        min_assessed_value=None, max_assessed_value=None, median_assessed_value=None,
+        min_year_built=None, max_year_built=None, analytics=None,
+    )
+
+
+def property_fields(values, owner_ids):
+    """Return the Property field values for one parsed row (the owner must already be in owner_ids)."""
+    return {
+        'owner_id': owner_ids[values[15]],
+        'address': values[3],
+        'city': values[4],
+        'zip_code': values[5],
+        'assessed_value': values[6],
+        'style': values[7],
+        'year_built': values[8],
+        'lat': values[9],
+        'lon': values[10],
+        'grid_cell': values[11],
+        'normalized_address': values[12],
+        'normalized_street': values[13],
+        'house_number': values[14],
+        'normalized_city': normalize_city(values[4]),
+    }
+
+
+def create_owners(parsed_rows, owner_ids, look_up_existing=False):
+    """
+    Create the owners of parsed_rows that are not already in owner_ids and add
+    them to it. With look_up_existing, owners already in the database (matched
+    on their normalized name) are reused first. Returns the number created.
+    """
+    missing = {values[15]: values for values in parsed_rows if values[15] not in owner_ids}
+
+    if look_up_existing and missing:
+        names = {owner_key[0] for owner_key in missing}
+        for owner_id, name, address, is_company in (
+            PropertyOwner.objects.filter(normalized_name__in=names)
+            .order_by('pk').values_list('pk', 'name', 'address', 'is_company')
+        ):
+            owner_ids.setdefault(owner_key(name, address, is_company), owner_id)
+        missing = {key: values for key, values in missing.items() if key not in owner_ids}
+
+    # Owners seen for the first time, deduplicated in memory by normalized owner key
+    new_owners = {
+        key: PropertyOwner(name=values[0], address=values[1], is_company=values[2], normalized_name=key[0])
+        for key, values in missing.items()
+    }
+    PropertyOwner.objects.bulk_create(new_owners.values(), batch_size=DEFAULT_BATCH_SIZE)
+    for key, owner in new_owners.items():
+        owner_ids[key] = owner.pk
+    return len(new_owners)
+
+
+def insert_chunk(parsed_rows, owner_ids, seen_parcels):
+    """
+    Insert one chunk of parsed rows, creating any owners not already in owner_ids,
+    and refresh the portfolios of the owners the chunk touched. A parcel id already
+    in seen_parcels is not stored again, since parcel ids must be unique.
+    Returns (owners created, properties created).
+    """
+    owners_created = create_owners(parsed_rows, owner_ids)
+
+    properties = []
+    for values in parsed_rows:
+        parcel_id = values[16]
+        if parcel_id in seen_parcels:
+            parcel_id = None
+        elif parcel_id is not None:
+            seen_parcels.add(parcel_id)
+        properties.append(Property(parcel_id=parcel_id, **property_fields(values, owner_ids)))
+    Property.objects.bulk_create(properties, batch_size=DEFAULT_BATCH_SIZE)
+
+    refresh_portfolios(owner_ids[values[15]] for values in parsed_rows)
+
+    return owners_created, len(parsed_rows)
+
+
+def report(stdout, message):
+    """Write a progress message to stdout (such as a management command's self.stdout), if one was given."""
+    if stdout is not None:
+        stdout.write(message + '\n')
+
+
+def load_parcels(file_path=None, batch_size=DEFAULT_BATCH_SIZE, workers=1, stdout=None):
+    """
+    Replace all property and owner data with the contents of the parcel CSV.
+
+    Rows are parsed in chunks of batch_size (optionally across a process pool),
+    owners are deduplicated in memory, and each chunk is written with bulk_create.
+    The old data is cleared and the new data written in one transaction, so a file
+    that fails to parse (or has no usable rows) or a crash part way through leaves
+    the old data in place. Progress is written to stdout if it is given.
+
+    Returns:
+        Dictionary with counts of created records and throughput numbers
+    """
+    file_path = file_path or default_parcel_file()
+
+    rows_read = 0
+    owners_created = 0
+    properties_created = 0
+
+    # Maps normalized owner keys to the id of the PropertyOwner already created
+    owner_ids = {}
+    seen_parcels = set()
+
+    report(stdout, f"Loading data from {file_path}...")
+    start = time.perf_counter()
+
+    with open(file_path, 'r', encoding='utf-8', newline='') as file, transaction.atomic():
+        clear_property_data()
+
+        for chunk_rows, parsed_rows in parse_chunks(read_row_chunks(file, batch_size), workers):
+            new_owners, new_properties = insert_chunk(parsed_rows, owner_ids, seen_parcels)
+            rows_read += chunk_rows
+            owners_created += new_owners
+            properties_created += new_properties
+
+            elapsed = time.perf_counter() - start
+            report(stdout, f"  Processed {rows_read} rows... ({properties_created} properties, {owners_created} owners, "
+                           f"{rows_read / elapsed:,.0f} rows/s)")
+
+        if not properties_created:
+            raise ValueError(f'{file_path} has no usable parcel rows; the existing data was kept.')
+
+        # Rebuild the map clusters, the filter facets and the full-text search index
+        rebuild_clusters()
+        rebuild_facets()
+        rebuild_search_index()
+        bump_data_version()
+
+    # Rebuild the coordinate snapshot used for distance filtering from the committed data
+    refresh_property_indexes()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'rows_read': rows_read,
+        'owners_created': owners_created,
+        'properties_created': properties_created,
+        'seconds': elapsed,
+        'rows_per_second': rows_read / elapsed if elapsed else 0,
+    }
+
+    # Print final statistics
+    report(stdout, f"Property Owners Created: {owners_created}")
+    report(stdout, f"Properties Created: {properties_created}")
+    report(stdout, f"Finished in {elapsed:.1f}s ({stats['rows_per_second']:,.0f} rows/s)")
+
+    return stats
+
+
+# Property fields compared, and rewritten when they differ, on a refresh
+REFRESH_FIELDS = [
+    'owner_id', 'address', 'city', 'zip_code', 'assessed_value', 'style', 'year_built',
+    'lat', 'lon', 'grid_cell', 'normalized_address', 'normalized_street', 'house_number', 'normalized_city',
+]
+
+# Ids per IN (...) clause when deleting or looking up by property id
+ID_BATCH_SIZE = 900
+
+
+def refresh_chunk(parsed_rows, owner_ids, seen_parcels):
+    """
+    Compare one chunk of parsed rows with the stored properties of the same parcel
+    ids, inserting new parcels and updating changed ones with bulk queries.
+    Rows without a parcel id, or repeating one already seen, are skipped.
+    Returns a dictionary of counts plus the ids written and the owners touched
+    (whose portfolios the caller refreshes once at the end).
+    """
+    rows = {}
+    for values in parsed_rows:
+        parcel_id = values[16]
+        if parcel_id is not None and parcel_id not in seen_parcels:
+            seen_parcels.add(parcel_id)
+            rows[parcel_id] = values
+
+    owners_created = create_owners(list(rows.values()), owner_ids, look_up_existing=True)
+
+    stored = {
+        row[1]: row
+        for row in Property.objects.filter(parcel_id__in=list(rows)).values_list('pk', 'parcel_id', *REFRESH_FIELDS)
+    }
+
+    inserts = []
+    updates = []
+    touched_owners = set()
+    for parcel_id, values in rows.items():
+        fields = property_fields(values, owner_ids)
+        old = stored.get(parcel_id)
+        if old is None:
+            inserts.append(Property(parcel_id=parcel_id, **fields))
+        elif old[2:] != tuple(fields[field] for field in REFRESH_FIELDS):
+            updates.append(Property(pk=old[0], parcel_id=parcel_id, **fields))
+            touched_owners.add(old[2])
+        else:
+            continue
+        touched_owners.add(fields['owner_id'])
+
+    Property.objects.bulk_create(inserts, batch_size=DEFAULT_BATCH_SIZE)
+    Property.objects.bulk_update(updates, REFRESH_FIELDS, batch_size=1000)
+
+    return {
+        'owners_created': owners_created,
+        'inserted_ids': [prop.pk for prop in inserts],
+        'updated_ids': [prop.pk for prop in updates],
+        'unchanged': len(rows) - len(inserts) - len(updates),
+        'skipped': len(parsed_rows) - len(rows),
+        'touched_owners': touched_owners,
+    }
+
+
+def delete_properties(property_ids):
+    """
+    Delete properties and their list memberships with plain SQL deletes in batches
+    (compressed lists drop them from their stored ids).
+    Returns the ids of the owners who held them.
+    """
+    through_table = connection.ops.quote_name(List.properties.through._meta.db_table)
+    property_table = connection.ops.quote_name(Property._meta.db_table)
+    owner_ids = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(property_ids), ID_BATCH_SIZE):
+            batch = property_ids[start:start + ID_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            owner_ids.update(Property.objects.filter(pk__in=batch).values_list('owner_id', flat=True).distinct())
+            cursor.execute(f'DELETE FROM {through_table} WHERE property_id IN ({placeholders})', batch)
+            cursor.execute(f'DELETE FROM {property_table} WHERE id IN ({placeholders})', batch)
+    if property_ids:
+        drop_compressed_members(property_ids)
+    return owner_ids
+
+
+def refresh_derived_data(changed_ids, updated_ids, stale_ids, touched_owners):
+    """
+    Delete the stale properties and bring everything derived from property data
+    in line with a refresh that inserted or updated changed_ids: owner portfolios
+    (dropping owners left with nothing), list figures, the search index, the data
+    version, the coordinate snapshot, map clusters and filter facets.
+    """
+    with transaction.atomic():
+        affected_lists = lists_containing(updated_ids + stale_ids)
+        touched_owners = touched_owners | delete_properties(stale_ids)
+
+        # Recompute touched portfolios and drop owners whose properties all moved away or were removed
+        touched_owners = sorted(touched_owners)
+        for start_index in range(0, len(touched_owners), ID_BATCH_SIZE):
+            batch = touched_owners[start_index:start_index + ID_BATCH_SIZE]
+            refresh_portfolios(batch)
+            PropertyOwner.objects.filter(pk__in=batch, property__isnull=True).delete()
+
+        for marketing_list in List.objects.filter(pk__in=affected_lists):
+            marketing_list.refresh_aggregates()
+        reindex_properties(changed_ids + stale_ids)
+        bump_data_version()
+
+    refresh_property_indexes()
+    rebuild_clusters()
+    rebuild_facets()
+
+
+def refresh_parcels(file_path=None, batch_size=DEFAULT_BATCH_SIZE, workers=1, stdout=None):
+    """
+    Bring the property data in line with the parcel CSV by writing only the differences.
+
+    Rows are matched to stored properties on their parcel id. New parcels are
+    inserted, changed ones are updated in place (so list memberships are kept),
+    and stored parcels missing from the file are deleted. Derived data (search
+    index, owner portfolios, list figures, snapshot, clusters and facets) is
+    refreshed afterwards, and only if something changed. A file with no usable
+    rows is rejected before anything is deleted. Progress is written to stdout
+    if it is given.
+
+    Each chunk is committed on its own. If the refresh fails part way, the chunks
+    already written are kept and the derived data is refreshed for them before the
+    error is raised, so running the refresh again picks up where it stopped.
+
+    Properties stored without a parcel id (rows that had none, or repeated one,
+    in a full load) can't be matched to the file, so they are left as they are
+    and counted in properties_unmatched; a full load replaces them.
+
+    Returns:
+        Dictionary with counts of inserted, updated, unchanged, deleted and
+        unmatched properties and throughput numbers
+    """
+    file_path = file_path or default_parcel_file()
+
+    if Property.objects.exists() and not Property.objects.exclude(parcel_id=None).exists():
+        raise ValueError('The stored properties have no parcel ids; run a full load before refreshing.')
+
+    stats = {
+        'rows_read': 0,
+        'owners_created': 0,
+        'properties_created': 0,
+        'properties_updated': 0,
+        'properties_unchanged': 0,
+        'properties_deleted': 0,
+        'properties_unmatched': 0,
+        'rows_skipped': 0,
+    }
+    owner_ids = {}
+    seen_parcels = set()
+    changed_ids = []
+    updated_ids = []
+    touched_owners = set()
+
+    report(stdout, f"Refreshing data from {file_path}...")
+    start = time.perf_counter()
+
+    try:
+        with open(file_path, 'r', encoding='utf-8', newline='') as file:
+            for chunk_rows, parsed_rows in parse_chunks(read_row_chunks(file, batch_size), workers):
+                with transaction.atomic():
+                    result = refresh_chunk(parsed_rows, owner_ids, seen_parcels)
+                stats['rows_read'] += chunk_rows
+                stats['rows_skipped'] += result['skipped'] + chunk_rows - len(parsed_rows)
+                stats['owners_created'] += result['owners_created']
+                stats['properties_created'] += len(result['inserted_ids'])
+                stats['properties_updated'] += len(result['updated_ids'])
+                stats['properties_unchanged'] += result['unchanged']
+                changed_ids += result['inserted_ids'] + result['updated_ids']
+                updated_ids += result['updated_ids']
+                touched_owners |= result['touched_owners']
+
+                elapsed = time.perf_counter() - start
+                report(stdout, f"  Processed {stats['rows_read']} rows... ({stats['properties_created']} new, "
+                               f"{stats['properties_updated']} changed, {stats['rows_read'] / elapsed:,.0f} rows/s)")
+    except Exception:
+        # A rerun sees the committed chunks as unchanged, so their derived data has to be refreshed now
+        if changed_ids:
+            report(stdout, f"Refresh failed after {stats['rows_read']} rows; refreshing derived data for the "
+                           f"{len(changed_ids)} properties already written")
+            refresh_derived_data(changed_ids, updated_ids, [], touched_owners)
+        raise
+
+    if not seen_parcels:
+        raise ValueError(f'{file_path} has no usable parcel rows; nothing was removed.')
+
+    # Stored parcels that are no longer in the file
+    stale_ids = [
+        pk for pk, parcel_id in Property.objects.exclude(parcel_id=None).values_list('pk', 'parcel_id').iterator(chunk_size=10000)
+        if parcel_id not in seen_parcels
+    ]
+    stats['properties_deleted'] = len(stale_ids)
+    stats['properties_unmatched'] = Property.objects.filter(parcel_id=None).count()
+
+    if changed_ids or stale_ids:
+        refresh_derived_data(changed_ids, updated_ids, stale_ids, touched_owners)
+
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = elapsed
+    stats['rows_per_second'] = stats['rows_read'] / elapsed if elapsed else 0
+
+    report(stdout, f"Properties Added: {stats['properties_created']}, Changed: {stats['properties_updated']}, "
+                   f"Removed: {stats['properties_deleted']}, Unchanged: {stats['properties_unchanged']}")
+    if stats['properties_unmatched']:
+        report(stdout, f"Left {stats['properties_unmatched']} properties without a parcel id as they were; "
+                       f"run a full load to replace them")
+    report(stdout, f"Finished in {elapsed:.1f}s ({stats['rows_per_second']:,.0f} rows/s)")
+
+    return stats
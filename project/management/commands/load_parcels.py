@@ -0,0 +1,54 @@
+# File: load_parcels.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Management command to bulk load the assessor parcel CSV
+
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from project.loader import load_parcels, refresh_parcels, default_parcel_file, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    """Replace (or, with --refresh, update in place) the Property/PropertyOwner data from a parcel CSV."""
+
+    help = 'Bulk load properties and owners from the assessor parcel CSV.'
+
+    def add_arguments(self, parser):
+        """Define the command line options."""
+        parser.add_argument('file', nargs='?', default=None,
+                            help=f'Path to the parcel CSV (default: {default_parcel_file()})')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows parsed and inserted per transaction')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of processes used to parse the CSV')
+        parser.add_argument('--refresh', action='store_true',
+                            help='Only write parcels that were added, changed or removed, keeping list memberships')
+
+    def handle(self, *args, **options):
+        """Run the loader and report throughput."""
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        loader = refresh_parcels if options['refresh'] else load_parcels
+        try:
+            stats = loader(
+                file_path=options['file'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                stdout=self.stdout,
+            )
+        except (FileNotFoundError, ValueError, csv.Error) as e:
+            raise CommandError(str(e))
+
+        if options['refresh']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Refreshed from {stats['rows_read']} rows in {stats['seconds']:.1f}s: "
+                f"{stats['properties_created']} added, {stats['properties_updated']} changed, "
+                f"{stats['properties_deleted']} removed, {stats['properties_unchanged']} unchanged"
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {stats['properties_created']} properties and {stats['owners_created']} owners "
+            f"from {stats['rows_read']} rows in {stats['seconds']:.1f}s "
+            f"({stats['rows_per_second']:,.0f} rows/s)"
+        ))
@@ -0,0 +1,46 @@
+# File: run_jobs.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Management command that works the background job queue
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from project.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    """
+    Run queued jobs (exports, list builds, ...) until stopped. The site needs at
+    least one of these running: lists stay "Finding properties" and large exports
+    stay queued until a worker picks them up. Jobs left running by a worker that
+    died are queued again by the next worker to look for work.
+    """
+
+    help = ('Run queued background jobs (list builds, large exports, index rebuilds). Keep at least one '
+            'running alongside the web server; start several to work jobs in parallel.')
+
+    def add_arguments(self, parser):
+        """Define the command line options."""
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of waiting for new jobs')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between checks of an empty queue')
+
+    def handle(self, *args, **options):
+        """Claim and run jobs one at a time."""
+        if options['poll_interval'] <= 0:
+            raise CommandError('--poll-interval must be positive')
+
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Running {job}...')
+            run_job(job)
+            if job.status == 'done':
+                self.stdout.write(self.style.SUCCESS(f'Finished {job}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'{job} failed: {job.error}'))
@@ -0,0 +1,116 @@
+# File: membership.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Bulk, diff-based maintenance of List.properties membership
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from .models import List
+from .idsets import unique_ids
+
+# Rows per INSERT when adding members (Django caps this at what the database allows)
+INSERT_BATCH_SIZE = 5000
+
+# Ids per DELETE when removing members (kept under SQLite's bound parameter limit)
+DELETE_BATCH_SIZE = 900
+
+
+def compression_threshold():
+    """Return the list size from which membership is stored as compressed ids (LIST_COMPRESSION_THRESHOLD setting)."""
+    return getattr(settings, 'LIST_COMPRESSION_THRESHOLD', 50000)
+
+
+def sync_list_properties(marketing_list, property_ids):
+    """
+    Make marketing_list contain exactly the properties in property_ids.
+
+    Lists of at least compression_threshold() properties store their ids
+    compressed on the list; smaller lists keep one through-table row per
+    member, and only the missing rows are inserted and only the stale rows
+    deleted. The list's stored summary figures are refreshed, all inside one
+    transaction. Returns a (number added, number removed) tuple.
+    """
+    Membership = List.properties.through
+    target_ids = unique_ids(property_ids)
+
+    with transaction.atomic():
+        was_compressed = marketing_list.is_compressed()
+        current_ids = marketing_list.get_member_ids()
+        ids_to_add = np.setdiff1d(target_ids, current_ids, assume_unique=True)
+        ids_to_remove = np.setdiff1d(current_ids, target_ids, assume_unique=True)
+
+        if len(target_ids) >= compression_threshold():
+            if not was_compressed:
+                Membership.objects.filter(list_id=marketing_list.pk).delete()
+            marketing_list.set_member_ids(target_ids)
+        else:
+            if was_compressed:
+                # The through table is empty, so every target id is inserted
+                marketing_list.set_member_ids(None)
+                rows_to_add, rows_to_remove = target_ids.tolist(), []
+            else:
+                rows_to_add, rows_to_remove = ids_to_add.tolist(), ids_to_remove.tolist()
+
+            for start in range(0, len(rows_to_remove), DELETE_BATCH_SIZE):
+                Membership.objects.filter(
+                    list_id=marketing_list.pk,
+                    property_id__in=rows_to_remove[start:start + DELETE_BATCH_SIZE]
+                ).delete()
+
+            Membership.objects.bulk_create(
+                [Membership(list_id=marketing_list.pk, property_id=prop_id) for prop_id in rows_to_add],
+                batch_size=INSERT_BATCH_SIZE
+            )
+
+        # Keep the stored count/value summary in step with the new membership
+        if len(ids_to_add) or len(ids_to_remove):
+            marketing_list.refresh_aggregates()
+
+    return len(ids_to_add), len(ids_to_remove)
+
+
+def compressed_lists_spanning(property_ids):
+    """
+    Return the compressed lists whose stored id range overlaps property_ids (a
+    sorted numpy array), loading only their pk and member_ids. Lists whose range
+    can't hold any of the ids are skipped without being decoded.
+    """
+    if not len(property_ids):
+        return List.objects.none()
+    return List.objects.filter(
+        member_ids__isnull=False,
+        min_member_id__lte=int(property_ids[-1]),
+        max_member_id__gte=int(property_ids[0]),
+    ).only('pk', 'member_ids')
+
+
+def lists_containing(property_ids, batch_size=DELETE_BATCH_SIZE):
+    """Return the ids of the lists containing any of property_ids, however their membership is stored."""
+    Membership = List.properties.through
+    property_ids = list(property_ids)
+    list_ids = set()
+    for start in range(0, len(property_ids), batch_size):
+        batch = property_ids[start:start + batch_size]
+        list_ids.update(Membership.objects.filter(property_id__in=batch).values_list('list_id', flat=True).distinct())
+
+    wanted = unique_ids(property_ids)
+    for marketing_list in compressed_lists_spanning(wanted):
+        if np.isin(wanted, marketing_list.get_member_ids(), assume_unique=True).any():
+            list_ids.add(marketing_list.pk)
+    return list_ids
+
+
+def drop_compressed_members(property_ids):
+    """
+    Remove deleted properties from every compressed list (through-table rows
+    go with the property itself). Returns the ids of the lists that changed.
+    """
+    removed = unique_ids(property_ids)
+    changed = set()
+    for marketing_list in compressed_lists_spanning(removed):
+        current_ids = marketing_list.get_member_ids()
+        remaining = np.setdiff1d(current_ids, removed, assume_unique=True)
+        if len(remaining) != len(current_ids):
+            marketing_list.set_member_ids(remaining)
+            changed.add(marketing_list.pk)
+    return changed
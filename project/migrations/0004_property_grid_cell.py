@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:29
+
+from math import floor
+from django.db import migrations, models
+
+# Frozen copy of the 0.01 degree grid from project.geometry when this field was added
+GRID_CELL_DEGREES = 0.01
+GRID_COLUMNS = 36000
+
+
+def grid_cell_for(lat, lon):
+    """Return the grid cell number for a point (row-major, so cells in one row are consecutive)."""
+    row = int(floor((lat + 90) / GRID_CELL_DEGREES))
+    column = int(floor((lon + 180) / GRID_CELL_DEGREES)) % GRID_COLUMNS
+    return row * GRID_COLUMNS + column
+
+
+def fill_grid_cells(apps, schema_editor):
+    """Compute the grid cell for every existing property."""
+    Property = apps.get_model('project', 'Property')
+    batch = []
+    for prop in Property.objects.only('id', 'lat', 'lon').iterator(chunk_size=2000):
+        prop.grid_cell = grid_cell_for(prop.lat, prop.lon)
+        batch.append(prop)
+        if len(batch) >= 2000:
+            Property.objects.bulk_update(batch, ['grid_cell'])
+            batch = []
+    if batch:
+        Property.objects.bulk_update(batch, ['grid_cell'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0003_property_style_property_year_built_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='grid_cell',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(fill_grid_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:32
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, Min, Max
+
+
+def fill_list_aggregates(apps, schema_editor):
+    """Compute the summary figures for every existing list."""
+    List = apps.get_model('project', 'List')
+    for marketing_list in List.objects.all():
+        members = marketing_list.properties.all()
+        summary = members.aggregate(
+            count=Count('id'), total=Sum('assessed_value'),
+            min_value=Min('assessed_value'), max_value=Max('assessed_value'),
+            min_year=Min('year_built'), max_year=Max('year_built'),
+        )
+        count = summary['count']
+        median = None
+        if count:
+            by_value = members.order_by('assessed_value').values_list('assessed_value', flat=True)
+            middle = list(by_value[(count - 1) // 2:count // 2 + 1])
+            median = sum(middle) / len(middle)
+        List.objects.filter(pk=marketing_list.pk).update(
+            property_count=count, total_assessed_value=summary['total'] or 0,
+            min_assessed_value=summary['min_value'], max_assessed_value=summary['max_value'],
+            median_assessed_value=median,
+            min_year_built=summary['min_year'], max_year_built=summary['max_year'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0004_property_grid_cell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='max_assessed_value',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='max_year_built',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='median_assessed_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='min_assessed_value',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='min_year_built',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='property_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='total_assessed_value',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_list_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:33
+
+import re
+from django.db import migrations, models
+
+# Frozen copy of the address normalization from project.addresses when these fields were added
+ADDRESS_ABBREVIATIONS = {
+    'ST': 'STREET', 'STR': 'STREET',
+    'AVE': 'AVENUE', 'AV': 'AVENUE',
+    'RD': 'ROAD',
+    'DR': 'DRIVE',
+    'LN': 'LANE',
+    'BLVD': 'BOULEVARD',
+    'CT': 'COURT',
+    'PL': 'PLACE',
+    'TER': 'TERRACE', 'TERR': 'TERRACE',
+    'PKWY': 'PARKWAY',
+    'HWY': 'HIGHWAY',
+    'SQ': 'SQUARE',
+    'CIR': 'CIRCLE',
+    'WAY': 'WAY',
+    'HTS': 'HEIGHTS',
+    'MT': 'MOUNT',
+    'N': 'NORTH', 'S': 'SOUTH', 'E': 'EAST', 'W': 'WEST',
+}
+
+HOUSE_NUMBER_PATTERN = re.compile(r'^(\d+)[A-Z]?(?:-\d+[A-Z]?)?$')
+
+
+def normalize_address(address):
+    """Return (normalized address, normalized street, house number) from the part of an address before the first comma."""
+    tokens = re.sub(r'[^A-Z0-9\- ]', ' ', address.split(',')[0].upper()).split()
+
+    house_number = None
+    if tokens:
+        match = HOUSE_NUMBER_PATTERN.match(tokens[0])
+        if match:
+            house_number = int(match.group(1))
+
+    if house_number is None:
+        street = ' '.join(ADDRESS_ABBREVIATIONS.get(token, token) for token in tokens)
+        return street, street, None
+
+    street = ' '.join(ADDRESS_ABBREVIATIONS.get(token, token) for token in tokens[1:])
+    return f'{tokens[0]} {street}'.strip(), street, house_number
+
+
+def fill_normalized_addresses(apps, schema_editor):
+    """Normalize the address of every existing property."""
+    Property = apps.get_model('project', 'Property')
+    batch = []
+    for prop in Property.objects.only('id', 'address').iterator(chunk_size=2000):
+        prop.normalized_address, prop.normalized_street, prop.house_number = normalize_address(prop.address)
+        batch.append(prop)
+        if len(batch) >= 2000:
+            Property.objects.bulk_update(batch, ['normalized_address', 'normalized_street', 'house_number'])
+            batch = []
+    if batch:
+        Property.objects.bulk_update(batch, ['normalized_address', 'normalized_street', 'house_number'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0005_list_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='house_number',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='normalized_address',
+            field=models.TextField(blank=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='normalized_street',
+            field=models.TextField(blank=True, db_index=True),
+        ),
+        migrations.RunPython(fill_normalized_addresses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:34
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, F
+from django.db.models.functions import Floor
+
+# Frozen copy of the cluster levels and cell size from project.clusters when this table was added
+MIN_CLUSTER_ZOOM = 5
+MAX_CLUSTER_ZOOM = 15
+CELLS_PER_TILE = 4
+
+
+def build_clusters(apps, schema_editor):
+    """Aggregate the existing properties into map clusters with one GROUP BY per level."""
+    Property = apps.get_model('project', 'Property')
+    PropertyCluster = apps.get_model('project', 'PropertyCluster')
+    for level in range(MIN_CLUSTER_ZOOM, MAX_CLUSTER_ZOOM + 1):
+        size = 360 / (2 ** level) / CELLS_PER_TILE
+        cells = (
+            Property.objects
+            .annotate(row=Floor(F('lat') / size), col=Floor(F('lon') / size))
+            .values('row', 'col')
+            .annotate(count=Count('id'), lat_sum=Sum('lat'), lon_sum=Sum('lon'), total_value=Sum('assessed_value'))
+            .order_by()
+        )
+        PropertyCluster.objects.bulk_create(
+            (PropertyCluster(level=level, row=int(cell['row']), col=int(cell['col']), count=cell['count'],
+                             lat_sum=cell['lat_sum'], lon_sum=cell['lon_sum'], total_value=cell['total_value'] or 0)
+             for cell in cells.iterator(chunk_size=5000)),
+            batch_size=5000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0006_property_normalized_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.IntegerField()),
+                ('row', models.IntegerField()),
+                ('col', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('lat_sum', models.FloatField(default=0)),
+                ('lon_sum', models.FloatField(default=0)),
+                ('total_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['level', 'row', 'col'], name='project_pro_level_16aeba_idx')],
+            },
+        ),
+        migrations.RunPython(build_clusters, migrations.RunPython.noop),
+    ]
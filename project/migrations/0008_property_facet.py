@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:36
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_facets(apps, schema_editor):
+    """Count the existing properties per city, zip code and style with a single GROUP BY."""
+    Property = apps.get_model('project', 'Property')
+    PropertyFacet = apps.get_model('project', 'PropertyFacet')
+    combinations = (
+        Property.objects
+        .values('city', 'zip_code', 'style')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    PropertyFacet.objects.bulk_create(
+        (PropertyFacet(**combination) for combination in combinations.iterator(chunk_size=5000)),
+        batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0007_property_cluster'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.TextField()),
+                ('zip_code', models.TextField()),
+                ('style', models.TextField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('city', 'zip_code', 'style'), name='unique_property_facet')],
+            },
+        ),
+        migrations.RunPython(build_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0008_property_facet'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['address', 'id'], name='project_pro_address_aa6769_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['assessed_value', 'id'], name='project_pro_assesse_a4aeaa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['year_built', 'id'], name='project_pro_year_bu_ab1e1c_idx'),
+        ),
+    ]
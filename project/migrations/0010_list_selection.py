@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0009_property_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='selection',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:51
+
+from django.db import migrations, models
+
+# The FTS5 table as it was created by this migration (kept here so later changes to project.search don't alter it)
+SEARCH_TABLE = 'project_property_fts'
+
+
+def build_search_index(apps, schema_editor):
+    """Create the FTS5 search table and index the existing properties (SQLite only)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} '
+        f'USING fts5(address, city, zip_code, owner_name, tokenize = "unicode61")'
+    )
+    schema_editor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    schema_editor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, address, city, zip_code, owner_name) '
+        f'SELECT p.id, p.address, p.city, p.zip_code, o.name '
+        f'FROM project_property p JOIN project_propertyowner o ON o.id = p.owner_id'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    """Drop the FTS5 search table."""
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0010_list_selection'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['city', 'id'], name='project_pro_city_711e4b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['zip_code', 'id'], name='project_pro_zip_cod_b6d7f4_idx'),
+        ),
+        migrations.RunPython(build_search_index, drop_search_index),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:54
+
+import re
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+# Frozen copy of the owner name normalization from project.parcels when normalized_name was added
+OWNER_NAME_ABBREVIATIONS = {
+    'INCORPORATED': 'INC',
+    'CORPORATION': 'CORP',
+    'COMPANY': 'CO',
+    'LIMITED': 'LTD',
+    'ASSOCIATES': 'ASSOC',
+    'TRUSTEE': 'TR', 'TRUSTEES': 'TR', 'TRST': 'TR',
+    'TRUST': 'TR',
+}
+
+
+def normalize_owner_name(owner_name):
+    """Return an owner name upper case, without punctuation or a leading "THE", with company suffixes abbreviated."""
+    name = owner_name.upper().replace('.', '').replace('&', ' AND ')
+    tokens = re.sub(r'[^A-Z0-9 ]', ' ', name).split()
+    if tokens and tokens[0] == 'THE':
+        tokens = tokens[1:]
+    return ' '.join(OWNER_NAME_ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def fill_normalized_names(apps, schema_editor):
+    """Normalize the name of every existing owner."""
+    PropertyOwner = apps.get_model('project', 'PropertyOwner')
+    batch = []
+    for owner in PropertyOwner.objects.only('id', 'name').iterator(chunk_size=2000):
+        owner.normalized_name = normalize_owner_name(owner.name)
+        batch.append(owner)
+        if len(batch) >= 2000:
+            PropertyOwner.objects.bulk_update(batch, ['normalized_name'])
+            batch = []
+    if batch:
+        PropertyOwner.objects.bulk_update(batch, ['normalized_name'])
+
+
+def portfolio_rows(Property):
+    """Yield (owner id, property count, total value, sorted cities), merging a GROUP BY and a DISTINCT query read in owner order."""
+    totals = Property.objects.values('owner_id').annotate(count=Count('id'), total=Sum('assessed_value')).order_by('owner_id')
+    city_rows = Property.objects.values_list('owner_id', 'city').distinct().order_by('owner_id', 'city').iterator(chunk_size=5000)
+    pending = next(city_rows, None)
+    for row in totals.iterator(chunk_size=5000):
+        owner_cities = []
+        while pending is not None and pending[0] == row['owner_id']:
+            owner_cities.append(pending[1])
+            pending = next(city_rows, None)
+        yield row['owner_id'], row['count'], row['total'] or 0, owner_cities
+
+
+def build_portfolios(apps, schema_editor):
+    """Compute the portfolio of every existing owner."""
+    Property = apps.get_model('project', 'Property')
+    OwnerPortfolio = apps.get_model('project', 'OwnerPortfolio')
+    OwnerPortfolio.objects.bulk_create(
+        (OwnerPortfolio(owner_id=owner_id, property_count=count, total_assessed_value=total,
+                        average_assessed_value=total / count, cities=cities)
+         for owner_id, count, total, cities in portfolio_rows(Property)),
+        batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0011_property_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyowner',
+            name='normalized_name',
+            field=models.TextField(blank=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='OwnerPortfolio',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='portfolio', serialize=False, to='project.propertyowner')),
+                ('property_count', models.IntegerField(default=0)),
+                ('total_assessed_value', models.BigIntegerField(default=0)),
+                ('average_assessed_value', models.FloatField(default=0)),
+                ('cities', models.JSONField(default=list)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['total_assessed_value', 'owner'], name='project_own_total_a_32a5d7_idx'), models.Index(fields=['property_count', 'owner'], name='project_own_propert_d84704_idx')],
+            },
+        ),
+        migrations.RunPython(fill_normalized_names, migrations.RunPython.noop),
+        migrations.RunPython(build_portfolios, migrations.RunPython.noop),
+    ]
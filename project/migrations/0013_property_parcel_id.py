@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0012_owner_portfolio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='parcel_id',
+            field=models.TextField(blank=True, null=True, unique=True),
+        ),
+    ]
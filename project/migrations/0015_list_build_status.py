@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0014_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='build_progress',
+            field=models.IntegerField(default=100),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='build_status',
+            field=models.TextField(choices=[('pending', 'Pending'), ('building', 'Building'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:15
+
+import zlib
+import numpy as np
+from django.db import migrations, models
+
+# List size from which this migration compressed memberships (the default of LIST_COMPRESSION_THRESHOLD at the time)
+COMPRESSION_THRESHOLD = 50000
+
+
+def encode_ids(ids):
+    """Encode ids as sorted, de-duplicated 32-bit gaps compressed with zlib (the format of idsets.encode_ids)."""
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    return zlib.compress(np.diff(ids, prepend=0).astype('<u4').tobytes())
+
+
+def decode_ids(data):
+    """Decode bytes made by encode_ids into a sorted numpy array of ids."""
+    if not data:
+        return np.empty(0, dtype=np.int64)
+    return np.cumsum(np.frombuffer(zlib.decompress(bytes(data)), dtype='<u4'), dtype=np.int64)
+
+
+def compress_large_lists(apps, schema_editor):
+    """Move the membership of existing lists at or over the threshold into compressed ids."""
+    List = apps.get_model('project', 'List')
+    Membership = List.properties.through
+    for marketing_list in List.objects.filter(property_count__gte=COMPRESSION_THRESHOLD):
+        rows = Membership.objects.filter(list_id=marketing_list.pk)
+        marketing_list.member_ids = encode_ids(list(rows.values_list('property_id', flat=True)))
+        marketing_list.save(update_fields=['member_ids'])
+        rows.delete()
+
+
+def expand_compressed_lists(apps, schema_editor):
+    """Write compressed memberships back to the through table."""
+    List = apps.get_model('project', 'List')
+    Membership = List.properties.through
+    for marketing_list in List.objects.exclude(member_ids=None):
+        Membership.objects.bulk_create(
+            [Membership(list_id=marketing_list.pk, property_id=pk) for pk in decode_ids(marketing_list.member_ids).tolist()],
+            batch_size=5000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0015_list_build_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='member_ids',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_large_lists, expand_compressed_lists),
+    ]
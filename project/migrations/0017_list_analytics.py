@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0016_list_member_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='analytics',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
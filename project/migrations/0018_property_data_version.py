@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:42
+
+import uuid
+
+from django.db import migrations, models
+
+
+def create_data_version(apps, schema_editor):
+    """Start the database off with its own data version, so no file built for another database matches it."""
+    PropertyDataVersion = apps.get_model('project', 'PropertyDataVersion')
+    PropertyDataVersion.objects.create(pk=1, version=uuid.uuid4().hex)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0017_list_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.TextField()),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_data_version, migrations.RunPython.noop),
+    ]
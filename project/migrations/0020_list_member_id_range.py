@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:28
+
+import zlib
+import numpy as np
+from django.db import migrations, models
+
+
+def store_member_id_ranges(apps, schema_editor):
+    """Record the smallest and largest id of every compressed list (ids are stored as zlib-compressed 32-bit gaps)."""
+    List = apps.get_model('project', 'List')
+    for marketing_list in List.objects.exclude(member_ids=None).only('pk', 'member_ids'):
+        gaps = np.frombuffer(zlib.decompress(bytes(marketing_list.member_ids)), dtype='<u4') if marketing_list.member_ids else []
+        if len(gaps):
+            List.objects.filter(pk=marketing_list.pk).update(
+                min_member_id=int(gaps[0]), max_member_id=int(np.sum(gaps, dtype=np.int64)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0019_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='max_member_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='min_member_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(store_member_id_ranges, migrations.RunPython.noop),
+    ]
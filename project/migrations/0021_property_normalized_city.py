@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:43
+
+import re
+from django.db import migrations, models
+
+
+def fill_normalized_cities(apps, schema_editor):
+    """Store the normalized city (upper case, punctuation removed) of every existing property."""
+    Property = apps.get_model('project', 'Property')
+    batch = []
+    for prop in Property.objects.only('id', 'city').iterator(chunk_size=2000):
+        prop.normalized_city = ' '.join(re.sub(r'[^A-Z0-9 ]', ' ', prop.city.upper()).split())
+        batch.append(prop)
+        if len(batch) >= 2000:
+            Property.objects.bulk_update(batch, ['normalized_city'])
+            batch = []
+    if batch:
+        Property.objects.bulk_update(batch, ['normalized_city'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0020_list_member_id_range'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='normalized_city',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(fill_normalized_cities, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['normalized_city', 'normalized_address'], name='project_pro_normali_34a4e4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['zip_code', 'normalized_address'], name='project_pro_zip_cod_299b3b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['normalized_street', 'house_number'], name='project_pro_normali_149dd1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['normalized_city', 'normalized_street', 'house_number'], name='project_pro_normali_758338_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['zip_code', 'normalized_street', 'house_number'], name='project_pro_zip_cod_8fd8a0_idx'),
+        ),
+    ]
@@ -2,11 +2,17 @@
 # Author: Travis Falk(travisf@bu.edu), 11/24/2025
 # Description: Model definitions for project app
 
-from django.db import models
+import json
+import sys
+import numpy as np
+from django.db import models, connection
+from django.db.models.expressions import RawSQL
 from django.urls import reverse
 from django.contrib.auth.models import User
-from math import radians, cos, sin, asin, sqrt
-import csv
+from .geometry import grid_cell_for
+from .addresses import normalize_address, normalize_city
+from .parcels import normalize_owner_name
+from .idsets import unique_ids, encode_ids, decode_ids
 
 # Create your views here.
 
@@ -16,10 +22,22 @@ class PropertyOwner(models.Model):
     address = models.TextField()
     is_company = models.BooleanField()
     
+    # Canonical form of the name used to match owners and for name lookups
+    normalized_name = models.TextField(blank=True, db_index=True)
+    
     def __str__(self):
         """Return a string representation of this model instance."""
         owner_type = "Company" if self.is_company else "Individual"
         return f'{self.name} ({owner_type})'
+    
+    def save(self, *args, **kwargs):
+        """Keep the normalized name in sync before saving."""
+        self.normalized_name = normalize_owner_name(self.name)
+        super().save(*args, **kwargs)
+    
+    def get_absolute_url(self):
+        """Return URL to this owner's portfolio page."""
+        return reverse('show_owner', kwargs={'pk': self.pk})
 
 class UserProfile(models.Model):
     """Store/represent user profile information for the marketing list application."""
@@ -53,16 +71,115 @@ class Property(models.Model):
     year_built = models.IntegerField()
     lat = models.FloatField()
     lon = models.FloatField()
+    grid_cell = models.IntegerField(default=0, db_index=True)
+    
+    # Stable assessor identifier ("town:PROP_ID") used to match rows on a refresh
+    parcel_id = models.TextField(null=True, blank=True, unique=True)
+    
+    # Normalized copy of the address used for indexed geocoding lookups
+    normalized_address = models.TextField(blank=True, db_index=True)
+    normalized_street = models.TextField(blank=True, db_index=True)
+    house_number = models.IntegerField(null=True, blank=True)
+    normalized_city = models.TextField(blank=True)
+    
+    class Meta:
+        # (sort column, id) indexes so keyset pagination can seek straight to a page
+        indexes = [
+            models.Index(fields=['address', 'id']),
+            models.Index(fields=['assessed_value', 'id']),
+            models.Index(fields=['year_built', 'id']),
+            # Exact-match city and zip code filters
+            models.Index(fields=['city', 'id']),
+            models.Index(fields=['zip_code', 'id']),
+            # Geocoding lookups narrowed to a city or zip code, and the nearest house number on a street
+            models.Index(fields=['normalized_city', 'normalized_address']),
+            models.Index(fields=['zip_code', 'normalized_address']),
+            models.Index(fields=['normalized_street', 'house_number']),
+            models.Index(fields=['normalized_city', 'normalized_street', 'house_number']),
+            models.Index(fields=['zip_code', 'normalized_street', 'house_number']),
+        ]
     
     def __str__(self):
         """Return a string representation of this model instance."""
         return f'{self.address}, {self.city}, {self.zip_code}'
     
+    def save(self, *args, **kwargs):
+        """Keep the spatial grid cell and normalized address in sync before saving."""
+        self.grid_cell = grid_cell_for(self.lat, self.lon)
+        self.normalized_address, self.normalized_street, self.house_number = normalize_address(self.address)
+        self.normalized_city = normalize_city(self.city)
+        super().save(*args, **kwargs)
+    
     def get_absolute_url(self):
         """Return URL to this property detail page."""
         return reverse('show_property', kwargs={'pk': self.pk})
 
 
+class PropertyCluster(models.Model):
+    """Store pre-aggregated property totals for one map grid cell at one zoom level."""
+    level = models.IntegerField()
+    row = models.IntegerField()
+    col = models.IntegerField()
+    count = models.IntegerField(default=0)
+    lat_sum = models.FloatField(default=0)
+    lon_sum = models.FloatField(default=0)
+    total_value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        indexes = [models.Index(fields=['level', 'row', 'col'])]
+    
+    def __str__(self):
+        """Return a string representation of this model instance."""
+        return f'Level {self.level} cell ({self.row}, {self.col}): {self.count} properties'
+
+
+class PropertyFacet(models.Model):
+    """Store how many properties share one (city, zip code, style) combination, for filter dropdowns."""
+    city = models.TextField()
+    zip_code = models.TextField()
+    style = models.TextField()
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'zip_code', 'style'], name='unique_property_facet'),
+        ]
+    
+    def __str__(self):
+        """Return a string representation of this model instance."""
+        return f'{self.city} {self.zip_code} {self.style}: {self.count} properties'
+
+
+class OwnerPortfolio(models.Model):
+    """Store precomputed holdings (count, values and cities) for one owner."""
+    owner = models.OneToOneField(PropertyOwner, on_delete=models.CASCADE, primary_key=True, related_name='portfolio')
+    property_count = models.IntegerField(default=0)
+    total_assessed_value = models.BigIntegerField(default=0)
+    average_assessed_value = models.FloatField(default=0)
+    cities = models.JSONField(default=list)
+    
+    class Meta:
+        # Rankings for the top owners page
+        indexes = [
+            models.Index(fields=['total_assessed_value', 'owner']),
+            models.Index(fields=['property_count', 'owner']),
+        ]
+    
+    def __str__(self):
+        """Return a string representation of this model instance."""
+        return f'{self.owner.name}: {self.property_count} properties'
+
+
+class PropertyDataVersion(models.Model):
+    """Store a token (one row) that is replaced whenever property data changes; files built from the data are keyed on it."""
+    version = models.TextField()
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Return a string representation of this model instance."""
+        return f'Property data version {self.version}'
+
+
 class List(models.Model):
     """Store/represent marketing lists created by users."""
     creator = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
@@ -75,6 +192,41 @@ class List(models.Model):
     center_lon = models.FloatField(default=0, blank=True)
     radius_miles = models.FloatField(default=0, blank=True)
     
+    # Optional drawn area used instead of the center and radius:
+    # {"type": "polygon", "points": [[lat, lon], ...]} or {"type": "circles", "circles": [[lat, lon, radius_miles], ...]}
+    # Lists made from two others record {"type": "combined", "operation": ..., "lists": [first id, second id]}
+    selection = models.JSONField(null=True, blank=True)
+    
+    # Membership is built by a background job; these show how far along it is
+    BUILD_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('building', 'Building'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+    build_status = models.TextField(choices=BUILD_STATUS_CHOICES, default='ready')
+    build_progress = models.IntegerField(default=100)
+    
+    # Large lists keep their member ids here (see idsets.encode_ids) instead of one row each in
+    # the properties table; None means the membership is in the properties table
+    member_ids = models.BinaryField(null=True, blank=True)
+    
+    # Smallest and largest compressed member id, so lookups by property id only decode lists whose range holds it
+    min_member_id = models.BigIntegerField(null=True, blank=True)
+    max_member_id = models.BigIntegerField(null=True, blank=True)
+    
+    # Summary figures, kept up to date by refresh_aggregates() whenever membership changes
+    property_count = models.IntegerField(default=0)
+    total_assessed_value = models.BigIntegerField(default=0)
+    min_assessed_value = models.BigIntegerField(null=True, blank=True)
+    max_assessed_value = models.BigIntegerField(null=True, blank=True)
+    median_assessed_value = models.FloatField(null=True, blank=True)
+    min_year_built = models.IntegerField(null=True, blank=True)
+    max_year_built = models.IntegerField(null=True, blank=True)
+    
+    # Cached analytics panel (see analytics.get_list_analytics); cleared by refresh_aggregates()
+    analytics = models.JSONField(null=True, blank=True)
+    
     def __str__(self):
         """Return a string representation of this model instance."""
         return f'{self.list_name} (created by {self.creator.first_name} {self.creator.last_name})'
@@ -85,119 +237,130 @@ class List(models.Model):
     
     def get_property_count(self):
         """Return the count of properties in this list."""
-        return self.properties.count()
+        return self.property_count
     
     def get_total_assessed_value(self):
         """Return the total assessed value of all properties in this list."""
-        total = sum(prop.assessed_value for prop in self.properties.all())
-        return total
+        return self.total_assessed_value
     
-import os
-from django.conf import settings
-
-def load_data():
-    """
-    Load property data from CSV file into the database.
-    Hardcoded to look for parcels.csv in the project root directory.
+    def is_combined(self):
+        """Return True if this list was made by combining two other lists."""
+        return bool(self.selection) and self.selection.get('type') == 'combined'
     
-    Returns:
-        Dictionary with counts of created records
-    """
+    def is_compressed(self):
+        """Return True if this list's membership is stored as compressed ids."""
+        return self.member_ids is not None
     
-    # Hardcoded file path - adjust this to match your file location
-    file_path = os.path.join(settings.BASE_DIR, 'properties.csv')
+    def get_member_ids(self):
+        """Return the ids of this list's properties as a sorted numpy array."""
+        if self.is_compressed():
+            return decode_ids(self.member_ids)
+        rows = self.properties.through.objects.filter(list_id=self.pk).order_by('property_id')
+        return np.fromiter(rows.values_list('property_id', flat=True).iterator(chunk_size=10000), dtype=np.int64)
     
-    # Delete existing property and owner data to start fresh
-    Property.objects.all().delete()
-    PropertyOwner.objects.all().delete()
+    def set_member_ids(self, property_ids):
+        """Store property_ids as this list's compressed membership (None moves it back to the properties table)."""
+        ids = unique_ids([] if property_ids is None else property_ids)
+        self.member_ids = None if property_ids is None else encode_ids(ids)
+        self.min_member_id = int(ids[0]) if len(ids) else None
+        self.max_member_id = int(ids[-1]) if len(ids) else None
+        List.objects.filter(pk=self.pk).update(
+            member_ids=self.member_ids, min_member_id=self.min_member_id, max_member_id=self.max_member_id)
     
-    # Track statistics
-    owners_created = 0
-    properties_created = 0
+    def get_members(self):
+        """Return a queryset of this list's properties, however its membership is stored."""
+        if not self.is_compressed():
+            return Property.objects.filter(list=self)
+        ids = self.get_member_ids().tolist()
+        if connection.vendor == 'sqlite':
+            # One JSON array parameter instead of one bound parameter per id
+            return Property.objects.filter(pk__in=RawSQL('SELECT value FROM json_each(%s)', [json.dumps(ids)]))
+        return Property.objects.filter(pk__in=ids)
     
-    # Cache for owners to avoid duplicate lookups
-    owner_cache = {}
+    def refresh_aggregates(self):
+        """Recompute the stored summary figures from the list's members with database aggregates (and drop cached analytics)."""
+        members = self.get_members()
+        summary = members.aggregate(
+            count=models.Count('id'),
+            total=models.Sum('assessed_value'),
+            min_value=models.Min('assessed_value'),
+            max_value=models.Max('assessed_value'),
+            min_year=models.Min('year_built'),
+            max_year=models.Max('year_built'),
+        )
+        
+        # Median: the middle value (or the mean of the two middle values) in value order
+        count = summary['count']
+        median = None
+        if count:
+            by_value = members.order_by('assessed_value').values_list('assessed_value', flat=True)
+            middle = list(by_value[(count - 1) // 2:count // 2 + 1])
+            median = sum(middle) / len(middle)
+        
+        self.property_count = count
+        self.total_assessed_value = summary['total'] or 0
+        self.min_assessed_value = summary['min_value']
+        self.max_assessed_value = summary['max_value']
+        self.median_assessed_value = median
+        self.min_year_built = summary['min_year']
+        self.max_year_built = summary['max_year']
+        
+        # The cached analytics describe the old membership
+        self.analytics = None
+        self.save(update_fields=[
+            'property_count', 'total_assessed_value', 'min_assessed_value', 'max_assessed_value',
+            'median_assessed_value', 'min_year_built', 'max_year_built', 'analytics',
+        ])
+
+
+class Job(models.Model):
+    """Store one piece of background work (an export, a list build, ...) run by the run_jobs command."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
     
-    print(f"Loading data from {file_path}...")
+    kind = models.TextField()
+    payload = models.JSONField(default=dict, blank=True)
+    creator = models.ForeignKey(UserProfile, on_delete=models.CASCADE, null=True, blank=True)
+    status = models.TextField(choices=STATUS_CHOICES, default='queued')
+    progress = models.IntegerField(default=0)
+    result_file = models.FileField(upload_to='exports/', blank=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
     
-    with open(file_path, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        
-        for row_num, row in enumerate(reader, start=1):
-            # Extract and validate required fields
-            owner_name = row.get('OWNER1', '').strip()
-            owner_address = row.get('OWN_ADDR', '').strip() + ", " + row.get('OWN_CITY', '').strip() + ", " + row.get('OWN_STATE', '').strip() + " " + row.get('OWN_ZIP', '').strip()
-            address = row.get('ADDR_NUM', '').strip() + " " + row.get('FULL_STR', '').strip()
-            city = row.get('CITY', '').strip()
-            zip_code = row.get('ZIP', '').strip()
-            lat_str = row.get('lat', '').strip()
-            lon_str = row.get('lon', '').strip()
-            total_val_str = row.get('TOTAL_VAL', '').strip()
-            style = row.get('STYLE', '').strip()
-            year_built_str = row.get('YEAR_BUILT', '').strip()
-            
-            # Parse numeric values
-            try:
-                lat = float(lat_str)
-                lon = float(lon_str)
-                total_value = int(float(total_val_str))
-                year_built = int(year_built_str)
-            except (ValueError, TypeError):
-                continue
-            
-            # Skip properties with invalid coordinates or zero value
-            if lat == 0 or lon == 0:
-                continue
-            
-            # Ensure ZIP code is valid (5 digits)
-            if zip_code:
-                zip_code = zip_code[:5]
-            else:
-                zip_code = '00000'
-            
-            # Determine if owner is a company or individual
-            # Common indicators: LLC, INC, CORP, TRUST, REALTY, etc.
-            company_keywords = ['LLC', 'INC', 'CORP', 'CORPORATION', 'TRUST', 
-                                'REALTY', 'PROPERTIES', 'COMPANY', 'CO ', 'LTD',
-                                'PARTNERSHIP', 'LP', 'ASSOCIATES']
-            is_company = any(keyword in owner_name.upper() for keyword in company_keywords)
-            
-            # Get or create PropertyOwner
-            owner_key = (owner_name, owner_address, is_company)
-            if owner_key in owner_cache:
-                owner = owner_cache[owner_key]
-            else:
-                owner, created = PropertyOwner.objects.get_or_create(
-                    name=owner_name,
-                    address=owner_address,
-                    is_company=is_company
-                )
-                owner_cache[owner_key] = owner
-                if created:
-                    owners_created += 1
-            
-            # Create Property
-            Property.objects.create(
-                owner=owner,
-                address=address,
-                city=city,
-                zip_code=zip_code,
-                assessed_value=total_value,
-                style=style,
-                year_built=year_built,
-                lat=lat,
-                lon=lon
-            )
-            
-            # Print progress every 1000 rows
-            if row_num % 1000 == 0:
-                print(f"  Processed {row_num} rows... ({properties_created} properties, {owners_created} owners)")
-    
-    # Print final statistics
-    print(f"Property Owners Created: {owners_created}")
-    print(f"Properties Created: {properties_created}")
-    
-    return {
-        'owners_created': owners_created,
-        'properties_created': properties_created
-    }
+    # Written regularly while a worker runs the job, so jobs whose worker died can be found and requeued
+    heartbeat = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    
+    class Meta:
+        # Workers look for the oldest queued job
+        indexes = [models.Index(fields=['status', 'id'])]
+    
+    def __str__(self):
+        """Return a string representation of this model instance."""
+        return f'{self.kind} job {self.pk} ({self.status})'
+    
+    def get_absolute_url(self):
+        """Return URL to this job's status page."""
+        return reverse('show_job', kwargs={'pk': self.pk})
+
+
+def load_data(file_path=None, batch_size=5000, workers=1, refresh=False):
+    """
+    Load property data from CSV file into the database.
+    Looks for properties.csv in the project root directory unless file_path is given.
+    With refresh=True only the parcels that were added, changed or removed are
+    written, and list memberships are kept.
+    (Also available as the load_parcels management command.)
+    
+    Returns:
+        Dictionary with counts of created records
+    """
+    from .loader import load_parcels, refresh_parcels
+    loader = refresh_parcels if refresh else load_parcels
+    return loader(file_path=file_path, batch_size=batch_size, workers=workers, stdout=sys.stdout)
@@ -0,0 +1,189 @@
+# File: pagination.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Keyset (cursor) pagination so deep pages cost the same as the first one
+
+import base64
+import json
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(value, pk):
+    """Encode a (sort value, id) position as an opaque URL-safe string."""
+    return base64.urlsafe_b64encode(json.dumps([value, pk]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor made by encode_cursor, or return None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return value, int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def cursor_position(model, field, key):
+    """
+    Return a decoded cursor with its value converted to the type of model's
+    field, or None (the first page) if the value doesn't fit the field.
+    """
+    if key is None:
+        return None
+    value, pk = key
+    try:
+        value = model._meta.get_field(field).to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+class KeysetPage:
+    """One page of results plus the cursors needed to link to its neighbours."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def keyset_paginate(queryset, sort_field='id', after=None, before=None, per_page=50, total=None):
+    """
+    Return a KeysetPage of queryset ordered by (sort_field, id).
+
+    after/before are cursors from a previous page; the page is found with a
+    WHERE on (sort value, id) instead of an OFFSET, so it reads only the rows it
+    returns. sort_field may start with '-' for descending order.
+    """
+    descending = sort_field.startswith('-')
+    field = sort_field.lstrip('-')
+    key_field = 'pk' if field in ('id', 'pk') else field
+
+    # A cursor whose value doesn't fit the sort field (hand-edited, or from another sort) starts over
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before)
+    if key_field != 'pk':
+        after_key = cursor_position(queryset.model, field, after_key)
+        before_key = cursor_position(queryset.model, field, before_key)
+    backwards = before_key is not None and after_key is None
+    position = before_key if backwards else after_key
+
+    # Walking backwards is walking forwards in the opposite order, then flipping the page
+    reverse_order = descending != backwards
+    if position is not None:
+        value, pk = position
+        comparison = 'lt' if reverse_order else 'gt'
+        if key_field == 'pk':
+            queryset = queryset.filter(**{f'pk__{comparison}': pk})
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{field}__{comparison}': value}) | Q(**{field: value, f'pk__{comparison}': pk})
+            )
+
+    if key_field == 'pk':
+        ordering = ['-pk'] if reverse_order else ['pk']
+    else:
+        ordering = [f'-{field}', '-pk'] if reverse_order else [field, 'pk']
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def cursor_for(obj):
+        return encode_cursor(getattr(obj, key_field), obj.pk)
+
+    if not rows:
+        return KeysetPage([], None, None, total)
+
+    if backwards:
+        next_cursor = cursor_for(rows[-1])
+        previous_cursor = cursor_for(rows[0]) if more else None
+    else:
+        next_cursor = cursor_for(rows[-1]) if more else None
+        previous_cursor = cursor_for(rows[0]) if position is not None else None
+
+    return KeysetPage(rows, next_cursor, previous_cursor, total)
+
+
+def ranked_index(key):
+    """Return the position in ranked_ids held by a decoded cursor, or None (the first page) if it isn't a number."""
+    if key is None:
+        return None
+    try:
+        return int(key[0])
+    except (TypeError, ValueError):
+        return None
+
+
+def ranked_paginate(queryset, ranked_ids, after=None, before=None, per_page=50, total=None):
+    """
+    Return a KeysetPage of queryset in the order of ranked_ids (for example
+    search results, best match first). Cursors hold a position in ranked_ids,
+    so only the rows on the page are fetched.
+    """
+    after_index = ranked_index(decode_cursor(after))
+    before_index = ranked_index(decode_cursor(before))
+
+    if before_index is not None and after_index is None:
+        end = max(0, min(before_index, len(ranked_ids)))
+        start = max(0, end - per_page)
+    else:
+        start = after_index + 1 if after_index is not None else 0
+        start = max(0, min(start, len(ranked_ids)))
+        end = start + per_page
+
+    page_ids = ranked_ids[start:end]
+    objects = queryset.in_bulk(page_ids)
+    rows = [objects[pk] for pk in page_ids if pk in objects]
+    if not rows:
+        return KeysetPage([], None, None, total)
+
+    next_cursor = encode_cursor(end - 1, page_ids[-1]) if end < len(ranked_ids) else None
+    previous_cursor = encode_cursor(start, page_ids[0]) if start > 0 else None
+    return KeysetPage(rows, next_cursor, previous_cursor, total)
+
+
+def sorted_ids_paginate(queryset, ids, after=None, before=None, per_page=50, total=None):
+    """
+    Return a KeysetPage of the rows of queryset whose ids are in ids (a sorted
+    numpy array), in id order. The page's ids are found with a binary search on
+    the cursor's id, and the cursors match keyset_paginate's in id order.
+    """
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before)
+
+    if before_key is not None and after_key is None:
+        end = int(np.searchsorted(ids, before_key[1], side='left'))
+        start = max(0, end - per_page)
+    else:
+        start = int(np.searchsorted(ids, after_key[1], side='right')) if after_key is not None else 0
+        end = min(start + per_page, len(ids))
+
+    page_ids = ids[start:end].tolist()
+    objects = queryset.in_bulk(page_ids)
+    rows = [objects[pk] for pk in page_ids if pk in objects]
+    if not rows:
+        return KeysetPage([], None, None, total)
+
+    next_cursor = encode_cursor(rows[-1].pk, rows[-1].pk) if end < len(ids) else None
+    previous_cursor = encode_cursor(rows[0].pk, rows[0].pk) if start > 0 else None
+    return KeysetPage(rows, next_cursor, previous_cursor, total)
@@ -0,0 +1,135 @@
+# File: parcels.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Parse rows of the assessor parcel CSV into plain tuples (safe to run in worker processes)
+
+import math
+import re
+from .geometry import grid_cell_for
+from .addresses import normalize_address
+
+# Words that mark an owner as a company rather than an individual; they are matched
+# against whole words of the name, so "LP" doesn't match "ALPHONSE"
+COMPANY_KEYWORDS = {'LLC', 'INC', 'INCORPORATED', 'CORP', 'CORPORATION', 'TRUST', 'TRUSTEE', 'TRUSTEES',
+                    'REALTY', 'PROPERTIES', 'COMPANY', 'CO', 'LTD', 'PARTNERSHIP', 'LP', 'ASSOCIATES'}
+
+# Spellings of company suffixes folded together so "Acme Realty, L.L.C." and
+# "ACME REALTY LLC" are recognized as the same owner
+OWNER_NAME_ABBREVIATIONS = {
+    'INCORPORATED': 'INC',
+    'CORPORATION': 'CORP',
+    'COMPANY': 'CO',
+    'LIMITED': 'LTD',
+    'ASSOCIATES': 'ASSOC',
+    'TRUSTEE': 'TR', 'TRUSTEES': 'TR', 'TRST': 'TR',
+    'TRUST': 'TR',
+}
+
+
+def normalize_owner_name(owner_name):
+    """
+    Return an owner name in a canonical form: upper case, punctuation removed,
+    dotted abbreviations joined ("L.L.C." becomes "LLC"), company suffixes
+    abbreviated, and a leading "THE" dropped.
+    """
+    name = owner_name.upper().replace('.', '').replace('&', ' AND ')
+    tokens = re.sub(r'[^A-Z0-9 ]', ' ', name).split()
+    if tokens and tokens[0] == 'THE':
+        tokens = tokens[1:]
+    return ' '.join(OWNER_NAME_ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def owner_key(owner_name, owner_address, is_company):
+    """
+    Return the key that identifies one owner while loading parcels.
+    Companies are matched on their normalized name alone (one company often
+    lists several mailing addresses); individuals also need a matching address.
+    """
+    normalized_name = normalize_owner_name(owner_name)
+    if is_company:
+        return (normalized_name, True)
+    return (normalized_name, False, owner_address.upper())
+
+
+def is_company_name(owner_name):
+    """Return True if one of the words of the owner name (with dots removed, so "L.L.C." is "LLC") is a company keyword."""
+    words = re.sub(r'[^A-Z0-9 ]', ' ', owner_name.upper().replace('.', '')).split()
+    return any(word in COMPANY_KEYWORDS for word in words)
+
+
+def parcel_identifier(row):
+    """
+    Return the stable identifier of a parcel row: the town plus the assessor's
+    PROP_ID (or LOC_ID when there is none), e.g. "35:0102345000". Returns None
+    when the row has neither.
+    """
+    prop_id = row.get('PROP_ID', '').strip() or row.get('LOC_ID', '').strip()
+    if not prop_id:
+        return None
+    town = row.get('TOWN_ID', '').strip() or row.get('CITY', '').strip().upper()
+    return f'{town}:{prop_id}'
+
+
+def parse_parcel_row(row):
+    """
+    Convert one CSV row (a dict from csv.DictReader) into a tuple of
+    (owner_name, owner_address, is_company, address, city, zip_code,
+     assessed_value, style, year_built, lat, lon, grid_cell,
+     normalized_address, normalized_street, house_number, owner_key, parcel_id),
+    or return None if the row is missing a usable location or value.
+    """
+    # Extract and validate required fields
+    owner_name = row.get('OWNER1', '').strip()
+    owner_address = row.get('OWN_ADDR', '').strip() + ", " + row.get('OWN_CITY', '').strip() + ", " + row.get('OWN_STATE', '').strip() + " " + row.get('OWN_ZIP', '').strip()
+    address = row.get('ADDR_NUM', '').strip() + " " + row.get('FULL_STR', '').strip()
+    city = row.get('CITY', '').strip()
+    zip_code = row.get('ZIP', '').strip()
+
+    # Parse numeric values
+    try:
+        lat = float(row.get('lat', '').strip())
+        lon = float(row.get('lon', '').strip())
+        total_value = int(float(row.get('TOTAL_VAL', '').strip()))
+        year_built = int(row.get('YEAR_BUILT', '').strip())
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+    # Skip properties with missing, non-finite or out of range coordinates
+    if lat == 0 or lon == 0:
+        return None
+    if not (math.isfinite(lat) and math.isfinite(lon)) or not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return None
+
+    # Ensure ZIP code is valid (5 digits)
+    if zip_code:
+        zip_code = zip_code[:5]
+    else:
+        zip_code = '00000'
+
+    is_company = is_company_name(owner_name)
+    return (
+        owner_name,
+        owner_address,
+        is_company,
+        address,
+        city,
+        zip_code,
+        total_value,
+        row.get('STYLE', '').strip(),
+        year_built,
+        lat,
+        lon,
+        grid_cell_for(lat, lon),
+        *normalize_address(address),
+        owner_key(owner_name, owner_address, is_company),
+        parcel_identifier(row),
+    )
+
+
+def parse_parcel_rows(rows):
+    """Parse a chunk of CSV rows, dropping the ones that can't be used."""
+    parsed = []
+    for row in rows:
+        values = parse_parcel_row(row)
+        if values is not None:
+            parsed.append(values)
+    return parsed
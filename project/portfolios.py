@@ -0,0 +1,72 @@
+# File: portfolios.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Precomputed owner portfolios (property count, total/average value, cities)
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from .models import Property, OwnerPortfolio
+
+
+def portfolio_rows(property_model=Property, owner_ids=None):
+    """
+    Yield (owner id, property count, total value, sorted cities) for every owner
+    with properties, or only for owner_ids. Uses one GROUP BY for the totals and
+    one DISTINCT query for the cities, both read in owner order and merged.
+    """
+    properties = property_model.objects.all()
+    if owner_ids is not None:
+        properties = properties.filter(owner_id__in=owner_ids)
+
+    totals = (
+        properties
+        .values('owner_id')
+        .annotate(count=Count('id'), total=Sum('assessed_value'))
+        .order_by('owner_id')
+    )
+    cities = properties.values_list('owner_id', 'city').distinct().order_by('owner_id', 'city')
+
+    city_rows = cities.iterator(chunk_size=5000)
+    pending = next(city_rows, None)
+    for row in totals.iterator(chunk_size=5000):
+        owner_cities = []
+        while pending is not None and pending[0] == row['owner_id']:
+            owner_cities.append(pending[1])
+            pending = next(city_rows, None)
+        yield row['owner_id'], row['count'], row['total'] or 0, owner_cities
+
+
+def make_portfolio(portfolio_model, owner_id, count, total, cities):
+    """Build an unsaved portfolio from one row of portfolio_rows."""
+    return portfolio_model(
+        owner_id=owner_id,
+        property_count=count,
+        total_assessed_value=total,
+        average_assessed_value=total / count,
+        cities=cities,
+    )
+
+
+def rebuild_portfolios(property_model=Property, portfolio_model=OwnerPortfolio):
+    """
+    Recompute every owner's portfolio from scratch.
+    (The models can be swapped for historical models when run from a migration.)
+    """
+    with transaction.atomic():
+        portfolio_model.objects.all().delete()
+        portfolio_model.objects.bulk_create(
+            (make_portfolio(portfolio_model, *row) for row in portfolio_rows(property_model)),
+            batch_size=5000
+        )
+
+
+def refresh_portfolios(owner_ids):
+    """Recompute the portfolios of just the given owners (owners left with no properties lose theirs)."""
+    owner_ids = [owner_id for owner_id in set(owner_ids) if owner_id is not None]
+    if not owner_ids:
+        return
+    with transaction.atomic():
+        OwnerPortfolio.objects.filter(owner_id__in=owner_ids).delete()
+        OwnerPortfolio.objects.bulk_create(
+            [make_portfolio(OwnerPortfolio, *row) for row in portfolio_rows(owner_ids=owner_ids)],
+            batch_size=5000
+        )
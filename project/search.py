@@ -0,0 +1,72 @@
+# File: search.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: SQLite FTS5 full-text index over property addresses, cities, zip codes and owner names
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from fulltext.fts import SearchIndex, search_available, build_match_query
+from .models import Property, PropertyOwner
+
+# The FTS5 table; its rowid is the Property id
+SEARCH_TABLE = 'project_property_fts'
+
+SEARCH_INDEX = SearchIndex(SEARCH_TABLE, ['address', 'city', 'zip_code', 'owner_name'])
+
+# Each property's indexed values, joined to its owner's name
+INDEXED_ROWS = f'''
+    SELECT p.id, p.address, p.city, p.zip_code, o.name
+    FROM {Property._meta.db_table} p JOIN {PropertyOwner._meta.db_table} o ON o.id = p.owner_id
+'''
+
+# Most matches ranked when results are ordered by relevance
+SEARCH_RESULT_LIMIT = 1000
+
+
+def rebuild_search_index(using=connection):
+    """Refill the whole search index from the property and owner tables with one INSERT ... SELECT."""
+    SEARCH_INDEX.refill(INDEXED_ROWS, using=using)
+
+
+def reindex_properties(property_ids, batch_size=900):
+    """Re-index (or, for ids no longer in the property table, drop) many properties with set-based SQL."""
+    SEARCH_INDEX.reindex(property_ids, INDEXED_ROWS + ' WHERE p.id IN ({placeholders})', batch_size)
+
+
+def index_property(prop):
+    """Add or replace one property's row in the search index."""
+    SEARCH_INDEX.index(prop.pk, [prop.address, prop.city, prop.zip_code, prop.owner.name])
+
+
+def unindex_property(prop_id):
+    """Remove one property from the search index."""
+    SEARCH_INDEX.unindex(prop_id)
+
+
+def reindex_owner(owner):
+    """Update the owner name on every indexed property the owner holds."""
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {SEARCH_TABLE} SET owner_name = %s WHERE rowid IN '
+            f'(SELECT id FROM {Property._meta.db_table} WHERE owner_id = %s)',
+            [owner.name, owner.pk]
+        )
+
+
+def filter_by_search(queryset, text):
+    """
+    Narrow queryset to properties whose address, city, zip or owner matches text.
+    Falls back to an address substring filter on databases without FTS5.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset
+    if not search_available():
+        return queryset.filter(address__icontains=text)
+    return queryset.filter(id__in=RawSQL(*SEARCH_INDEX.matching_ids_sql(match)))
+
+
+def ranked_property_ids(text, limit=SEARCH_RESULT_LIMIT):
+    """Return the ids of the best matches for text, best first (bm25), at most limit of them."""
+    return SEARCH_INDEX.ranked_ids(build_match_query(text), limit)
@@ -0,0 +1,138 @@
+# File: signals.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Signal handlers that keep derived property data in sync
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Property, PropertyOwner, List
+from .snapshot import bump_data_version_once
+from .indexes import schedule_index_refresh
+from .clusters import adjust_clusters
+from .facets import adjust_facet
+from .search import index_property, unindex_property, reindex_owner
+from .portfolios import refresh_portfolios
+from .membership import lists_containing, drop_compressed_members
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def property_changed(sender, **kwargs):
+    """
+    Give property data a new version whenever a property is added, edited or removed, and queue a
+    rebuild of its files once the change is committed. A transaction that changes many properties
+    (such as a bulk admin edit) bumps the version and queues the rebuild once.
+    """
+    if bump_data_version_once():
+        transaction.on_commit(schedule_index_refresh)
+
+
+# Property fields that a list's summary figures and analytics are computed from
+LIST_FIGURE_FIELDS = ('assessed_value', 'year_built', 'style', 'owner_id')
+
+
+@receiver(post_save, sender=Property)
+def refresh_lists_for_property(sender, instance, created, **kwargs):
+    """Recompute the summary figures of lists containing a property whose value, year, style or owner was edited."""
+    old_values = getattr(instance, '_old_list_values', None)
+    if created or old_values is None:
+        return
+    if old_values == tuple(getattr(instance, field) for field in LIST_FIGURE_FIELDS):
+        return
+    for marketing_list in List.objects.filter(pk__in=lists_containing([instance.pk])):
+        marketing_list.refresh_aggregates()
+
+
+@receiver(pre_delete, sender=Property)
+def remember_lists_for_property(sender, instance, **kwargs):
+    """Note which lists hold a property in the membership table before those rows are cascaded away."""
+    Membership = List.properties.through
+    instance._affected_list_ids = set(Membership.objects.filter(property_id=instance.pk).values_list('list_id', flat=True))
+
+
+@receiver(post_delete, sender=Property)
+def refresh_lists_after_delete(sender, instance, **kwargs):
+    """Drop a deleted property from compressed lists and recompute the summary figures of every list that lost it."""
+    affected = getattr(instance, '_affected_list_ids', set()) | drop_compressed_members([instance.pk])
+    for marketing_list in List.objects.filter(pk__in=affected):
+        marketing_list.refresh_aggregates()
+
+
+@receiver(pre_save, sender=Property)
+def remember_old_values(sender, instance, **kwargs):
+    """Note where an existing property was, its value, its facets, its owner and its list figure fields before it is saved."""
+    instance._old_cluster_values = None
+    instance._old_facet_values = None
+    instance._old_owner_id = None
+    instance._old_list_values = None
+    if instance.pk:
+        old = Property.objects.filter(pk=instance.pk).values_list(
+            'lat', 'lon', 'assessed_value', 'city', 'zip_code', 'style', 'owner_id', 'year_built').first()
+        if old:
+            instance._old_cluster_values = old[:3]
+            instance._old_facet_values = old[3:6]
+            instance._old_owner_id = old[6]
+            instance._old_list_values = (old[2], old[7], old[5], old[6])
+
+
+@receiver(post_save, sender=Property)
+def update_clusters_after_save(sender, instance, **kwargs):
+    """Move a saved property from its old map clusters into its new ones."""
+    old_values = getattr(instance, '_old_cluster_values', None)
+    if old_values:
+        adjust_clusters(*old_values, sign=-1)
+    adjust_clusters(instance.lat, instance.lon, instance.assessed_value, sign=1)
+
+
+@receiver(post_delete, sender=Property)
+def update_clusters_after_delete(sender, instance, **kwargs):
+    """Remove a deleted property from its map clusters."""
+    adjust_clusters(instance.lat, instance.lon, instance.assessed_value, sign=-1)
+
+
+@receiver(post_save, sender=Property)
+def update_facets_after_save(sender, instance, **kwargs):
+    """Move a saved property from its old city/zip/style count into its new one."""
+    old_values = getattr(instance, '_old_facet_values', None)
+    new_values = (instance.city, instance.zip_code, instance.style)
+    if old_values != new_values:
+        if old_values:
+            adjust_facet(*old_values, change=-1)
+        adjust_facet(*new_values, change=1)
+
+
+@receiver(post_delete, sender=Property)
+def update_facets_after_delete(sender, instance, **kwargs):
+    """Remove a deleted property from its city/zip/style count."""
+    adjust_facet(instance.city, instance.zip_code, instance.style, change=-1)
+
+
+@receiver(post_save, sender=Property)
+def update_search_after_save(sender, instance, **kwargs):
+    """Re-index a saved property's address, city, zip and owner."""
+    index_property(instance)
+
+
+@receiver(post_delete, sender=Property)
+def update_search_after_delete(sender, instance, **kwargs):
+    """Drop a deleted property from the search index."""
+    unindex_property(instance.pk)
+
+
+@receiver(post_save, sender=PropertyOwner)
+def update_search_for_owner(sender, instance, created, **kwargs):
+    """Carry a renamed owner into the search rows of their properties."""
+    if not created:
+        reindex_owner(instance)
+
+
+@receiver(post_save, sender=Property)
+def update_portfolios_after_save(sender, instance, **kwargs):
+    """Recompute the portfolio of a saved property's owner (and its previous owner)."""
+    refresh_portfolios([instance.owner_id, getattr(instance, '_old_owner_id', None)])
+
+
+@receiver(post_delete, sender=Property)
+def update_portfolios_after_delete(sender, instance, **kwargs):
+    """Recompute the portfolio of a deleted property's owner."""
+    refresh_portfolios([instance.owner_id])
@@ -0,0 +1,156 @@
+# File: snapshot.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Memory-mapped coordinate snapshot of every Property for fast distance filtering, keyed on the property data version
+
+import glob
+import hashlib
+import os
+import tempfile
+import uuid
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from .models import Property, PropertyDataVersion
+
+# One record per property, sorted by (cell, id) so a grid row range is a contiguous slice
+SNAPSHOT_DTYPE = np.dtype([
+    ('id', '<i8'),
+    ('cell', '<i8'),
+    ('lat', '<f8'),
+    ('lon', '<f8'),
+])
+
+# The currently mapped snapshot for this process: (data version, array)
+_loaded = (None, None)
+
+
+# Version reported before the first bump when the row made by migration 0018 is missing (e.g. after a flush)
+INITIAL_DATA_VERSION = 'initial'
+
+
+def data_version():
+    """Return the token that changes every time property data changes (see bump_data_version). Never writes."""
+    version = PropertyDataVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    return version or INITIAL_DATA_VERSION
+
+
+def bump_data_version():
+    """
+    Give property data a new version and return it. Called by the loader and
+    the Property signals; anything else that writes properties directly must
+    call it too, or files built from the old data keep being used.
+    """
+    version = uuid.uuid4().hex
+    if not PropertyDataVersion.objects.filter(pk=1).update(version=version):
+        PropertyDataVersion.objects.create(pk=1, version=version)
+    return version
+
+
+def bump_data_version_once():
+    """
+    Bump the data version for a change made on this connection, but only once per
+    transaction: if this transaction already bumped it (and no file has been built
+    for that version since), later changes leave it alone, since no other process
+    can build files for a version it hasn't seen committed. Returns the new
+    version, or None if it was left alone.
+    """
+    pending = getattr(connection, 'pending_data_version', None)
+    if connection.in_atomic_block and pending is not None and pending == data_version():
+        return None
+
+    version = bump_data_version()
+    if connection.in_atomic_block:
+        connection.pending_data_version = version
+        transaction.on_commit(forget_pending_data_version)
+    return version
+
+
+def forget_pending_data_version():
+    """Let the next change bump the data version again (once it is committed, or files are built for it)."""
+    connection.pending_data_version = None
+
+
+def data_file_path(name, version, extension):
+    """
+    Return where the file called name built from property data at version is kept
+    (in PROPERTY_DATA_DIR, default BASE_DIR). The database name is part of the file
+    name, so a development and a test database never share files.
+    """
+    directory = getattr(settings, 'PROPERTY_DATA_DIR', settings.BASE_DIR)
+    database = hashlib.md5(str(connection.settings_dict['NAME']).encode()).hexdigest()[:8]
+    return os.path.join(directory, f'{name}-{database}-{version}.{extension}')
+
+
+def write_data_file(name, version, extension, write):
+    """
+    Build the file called name for a data version by calling write(file) on a
+    temporary file that is then swapped into place atomically (so readers in other
+    processes never see a half written file), and delete the copies built from
+    older versions. Returns the file's path.
+    """
+    # Changes made after this file is built must get a new version, even in the same transaction
+    forget_pending_data_version()
+    path = data_file_path(name, version, extension)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            write(tmp_file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    for old_path in glob.glob(data_file_path(name, '*', extension)):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def snapshot_path(version):
+    """Return the location of the snapshot file for a data version."""
+    return data_file_path('property_coords', version, 'npy')
+
+
+def build_snapshot(version=None):
+    """
+    Write the snapshot of every property's id, grid cell and coordinates for the
+    current data version (or version) and return the number of records.
+    Run by the loader and the refresh_indexes job, never while serving a request.
+    """
+    version = version or data_version()
+    queryset = Property.objects.order_by('grid_cell', 'id').values_list('id', 'grid_cell', 'lat', 'lon')
+    records = np.fromiter(queryset.iterator(chunk_size=5000), dtype=SNAPSHOT_DTYPE)
+    write_data_file('property_coords', version, 'npy', lambda file: np.save(file, records))
+    return len(records)
+
+
+def get_snapshot():
+    """
+    Return the snapshot for the current data version as a read-only memory-mapped
+    array, or None if it has not been built yet (callers then read the database).
+    """
+    global _loaded
+    version = data_version()
+    if _loaded[0] != version:
+        try:
+            _loaded = (version, np.load(snapshot_path(version), mmap_mode='r'))
+        except FileNotFoundError:
+            return None
+    return _loaded[1]
+
+
+def select_cells(snapshot, cell_ranges):
+    """Return the snapshot records whose cell falls inside any of the (first, last) ranges."""
+    cells = snapshot['cell']
+    slices = []
+    for first_cell, last_cell in cell_ranges:
+        start = np.searchsorted(cells, first_cell, side='left')
+        stop = np.searchsorted(cells, last_cell, side='right')
+        if start < stop:
+            slices.append(np.arange(start, stop))
+    if not slices:
+        return snapshot[:0]
+    return snapshot[np.concatenate(slices)]
@@ -0,0 +1,102 @@
+# File: spatial.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Spatial queries over Property using the grid cell index
+
+import numpy as np
+from django.db.models import Q
+from .models import Property
+from .geometry import haversine_distances, points_in_polygon, bounding_box, grid_cell_ranges
+from .snapshot import SNAPSHOT_DTYPE, get_snapshot, select_cells
+from .indexes import schedule_index_refresh
+
+# Most grid cell ranges OR'd into one query (SQLite rejects expressions nested much deeper)
+MAX_CELL_RANGES = 100
+
+
+def cell_filter(cell_ranges):
+    """
+    Return a Q matching properties in the grid cell ranges. Past MAX_CELL_RANGES
+    ranges, one range from the first cell to the last is used instead: it is
+    still an indexed range scan, and callers filter the extra rows out.
+    """
+    if len(cell_ranges) > MAX_CELL_RANGES:
+        return Q(grid_cell__range=(min(first for first, _ in cell_ranges), max(last for _, last in cell_ranges)))
+    cells = Q()
+    for first_cell, last_cell in cell_ranges:
+        cells |= Q(grid_cell__range=(first_cell, last_cell))
+    return cells
+
+
+def properties_in_box(min_lat, max_lat, min_lon, max_lon):
+    """Return a QuerySet of properties inside a lat/lon box, using the indexed grid cells."""
+    return Property.objects.filter(
+        cell_filter(grid_cell_ranges(min_lat, max_lat, min_lon, max_lon)),
+        lat__gte=min_lat, lat__lte=max_lat,
+        lon__gte=min_lon, lon__lte=max_lon
+    )
+
+
+def cell_candidates(cell_ranges):
+    """
+    Return the (id, cell, lat, lon) records of the properties in the grid cell ranges.
+    They come from the snapshot when it is built for the current data version, and
+    otherwise from the database (a rebuild of the snapshot is queued).
+    """
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return select_cells(snapshot, cell_ranges)
+
+    schedule_index_refresh()
+    rows = Property.objects.filter(cell_filter(cell_ranges)).values_list('id', 'grid_cell', 'lat', 'lon')
+    return np.fromiter(rows.iterator(chunk_size=5000), dtype=SNAPSHOT_DTYPE)
+
+
+def find_properties_within(lat, lon, radius_miles):
+    """
+    Return the ids of all properties within radius_miles of (lat, lon).
+
+    Candidates are the records in the grid cells that overlap the circle's
+    bounding box (see cell_candidates); their exact great circle distances are then
+    computed in one vectorized call.
+    """
+    if not radius_miles or radius_miles <= 0:
+        return []
+
+    cell_ranges = grid_cell_ranges(*bounding_box(lat, lon, radius_miles))
+    candidates = cell_candidates(cell_ranges)
+
+    distances = haversine_distances(lat, lon, candidates['lat'], candidates['lon'])
+    return candidates['id'][distances <= radius_miles].tolist()
+
+
+def find_properties_in_polygon(points):
+    """
+    Return the ids of all properties inside a polygon given as [[lat, lon], ...].
+    Candidates come from the grid cells under the polygon's bounding box and are
+    then tested against the polygon in one vectorized pass.
+    """
+    lats = [point[0] for point in points]
+    lons = [point[1] for point in points]
+    cell_ranges = grid_cell_ranges(min(lats), max(lats), min(lons), max(lons))
+    candidates = cell_candidates(cell_ranges)
+
+    inside = points_in_polygon(candidates['lat'], candidates['lon'], points)
+    return candidates['id'][inside].tolist()
+
+
+def find_properties_in_circles(circles):
+    """Return the ids of all properties inside any of the circles, given as [[lat, lon, radius_miles], ...]."""
+    ids = set()
+    for lat, lon, radius_miles in circles:
+        ids.update(find_properties_within(lat, lon, radius_miles))
+    return sorted(ids)
+
+
+def find_list_properties(marketing_list):
+    """Return the ids of the properties selected by a list's polygon, circles, or center and radius."""
+    selection = marketing_list.selection
+    if selection and selection.get('type') == 'polygon':
+        return find_properties_in_polygon(selection['points'])
+    if selection and selection.get('type') == 'circles':
+        return find_properties_in_circles(selection['circles'])
+    return find_properties_within(marketing_list.center_lat, marketing_list.center_lon, marketing_list.radius_miles)
@@ -1,3 +1,1403 @@
-from django.test import TestCase
+# File: tests.py
+# Author: Travis Falk(travisf@bu.edu), 10/16/2026
+# Description: Tests for the project app (grid cell index and spatial queries, k-d tree and comparables, compressed id sets, list membership, property signals and set operations, parcel loader, viewport API, search, pagination, exports, job queue)
 
-# Create your tests here.
+import csv
+import functools
+import json
+import os
+import shutil
+import statistics
+import tempfile
+from datetime import timedelta
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management import call_command, CommandError
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from fulltext.fts import build_match_query
+from .forms import CreateListMapForm
+from .models import PropertyOwner, Property, PropertyFacet, OwnerPortfolio, PropertyDataVersion, UserProfile, List, Job
+from .addresses import address_locality
+from .geocoding import geocode_address, lookup_normalized, closest_house_number
+from .geometry import haversine_distance, haversine_distances, bounding_box, grid_cell_ranges, grid_cell_for
+from .snapshot import INITIAL_DATA_VERSION, bump_data_version, data_version, data_file_path, get_snapshot
+from .indexes import refresh_property_indexes
+from .spatial import find_properties_within, find_properties_in_polygon
+from .idsets import MAX_ID, encode_ids, decode_ids
+from .kdtree import KDTree
+from .parcels import normalize_owner_name, owner_key, is_company_name, parse_parcel_row
+from .portfolios import refresh_portfolios
+from .comparables import COMPARABLE_COUNT, YEAR_BUILT_WINDOW, ComparablesIndex, find_comparables
+from .membership import sync_list_properties, lists_containing, drop_compressed_members
+from .listsets import LIST_OPERATIONS, combine_lists
+from .analytics import compute_list_analytics, get_list_analytics
+from . import comparables, exports, jobs, listsets, loader, signals
+from .exports import EXPORT_FORMATS, EXPORT_FIELDS, EXPORT_HEADER, export_row
+from .jobs import enqueue_job, claim_next_job, requeue_stale_jobs, run_job
+from .listbuilds import queue_list_build
+from .clusters import rebuild_clusters
+from .facets import rebuild_facets, facet_counts
+from .pagination import encode_cursor, keyset_paginate
+from .search import rebuild_search_index, reindex_properties, ranked_property_ids, filter_by_search
+
+# Circles (lat, lon, radius in miles) checked against brute force: town scale, crossing the
+# 180th meridian, and reaching (or almost reaching) the north and south poles
+TEST_CIRCLES = [
+    (42.36, -71.06, 0.5),
+    (42.36, -71.06, 5),
+    (0.0, 179.99, 8),
+    (-16.5, -179.95, 12),
+    (89.9, 30.0, 15),
+    (89.5, -120.0, 40),
+    (-89.95, 0.0, 6),
+]
+
+
+def make_owner(name='Owner'):
+    """Create an owner for test properties."""
+    return PropertyOwner.objects.create(name=name, address='1 Owner Way', is_company=False)
+
+
+def make_properties(points, owner=None, **fields):
+    """Bulk create one property per (lat, lon) point and return their ids (as Property.save would, with grid cells)."""
+    owner = owner or make_owner()
+    properties = [
+        Property(owner=owner, address=f'{index} MAIN ST', city='BOSTON', zip_code='02134',
+                 assessed_value=fields.get('assessed_value', 100000 + index), style=fields.get('style', 'Colonial'),
+                 year_built=fields.get('year_built', 1950), lat=lat, lon=lon, grid_cell=grid_cell_for(lat, lon))
+        for index, (lat, lon) in enumerate(points)
+    ]
+    Property.objects.bulk_create(properties)
+    bump_data_version()
+    return [prop.pk for prop in properties]
+
+
+def make_user_profile(username='marketer'):
+    """Create a user and profile that can log in with the password 'password'."""
+    user = User.objects.create_user(username, password='password')
+    return UserProfile.objects.create(user=user, email=f'{username}@example.com', first_name=username.title(),
+                                      last_name='Tester', company='Test Realty')
+
+
+def make_list(creator, list_name='Test List'):
+    """Create an empty list."""
+    return List.objects.create(creator=creator, list_name=list_name)
+
+
+def member_ids(marketing_list):
+    """Return a list's member ids, reloading the list first."""
+    marketing_list.refresh_from_db()
+    return marketing_list.get_member_ids().tolist()
+
+
+def use_temp_data_dir(test_case):
+    """Keep files built from property data in a temporary directory for the rest of the test."""
+    data_dir = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, data_dir)
+    settings_override = override_settings(PROPERTY_DATA_DIR=data_dir)
+    settings_override.enable()
+    test_case.addCleanup(settings_override.disable)
+
+
+# Columns of the assessor parcel CSV that the loader reads
+PARCEL_COLUMNS = ['PROP_ID', 'TOWN_ID', 'OWNER1', 'OWN_ADDR', 'OWN_CITY', 'OWN_STATE', 'OWN_ZIP', 'ADDR_NUM',
+                  'FULL_STR', 'CITY', 'ZIP', 'lat', 'lon', 'TOTAL_VAL', 'YEAR_BUILT', 'STYLE']
+
+
+def parcel_row(number, owner='JOHN SMITH', value=300000, **fields):
+    """Return one parcel CSV row (as a dict) for parcel number on Main St."""
+    row = {
+        'PROP_ID': f'P{number}', 'TOWN_ID': '35', 'OWNER1': owner, 'OWN_ADDR': '1 OWNER WAY',
+        'OWN_CITY': 'BOSTON', 'OWN_STATE': 'MA', 'OWN_ZIP': '02134', 'ADDR_NUM': str(number),
+        'FULL_STR': 'MAIN ST', 'CITY': 'BOSTON', 'ZIP': '02134', 'lat': str(42.3 + number / 10000),
+        'lon': '-71.05', 'TOTAL_VAL': str(value), 'YEAR_BUILT': '1950', 'STYLE': 'Colonial',
+    }
+    row.update(fields)
+    return row
+
+
+def write_parcel_csv(directory, rows, name='parcels.csv'):
+    """Write rows to a parcel CSV in directory and return its path."""
+    path = os.path.join(directory, name)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=PARCEL_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def points_around(lat, lon, radius_miles, count, rng):
+    """Return count random (lat, lon) points, most of them within about twice radius_miles of (lat, lon)."""
+    spread = 2 * radius_miles / 69
+    lats = np.clip(lat + rng.uniform(-spread, spread, count), -90, 90)
+    lon_spread = min(180, spread / max(np.cos(np.radians(min(abs(lat) + spread, 89.99))), 1e-3))
+    lons = (lon + rng.uniform(-lon_spread, lon_spread, count) + 180) % 360 - 180
+    return list(zip(lats.tolist(), lons.tolist()))
+
+
+class GridIndexTest(SimpleTestCase):
+    """The grid cell ranges of a circle's bounding box cover every point in the circle."""
+
+    def test_ranges_cover_circle(self):
+        """Every random point within the radius falls in one of the circle's cell ranges."""
+        rng = np.random.default_rng(1)
+        for lat, lon, radius in TEST_CIRCLES:
+            points = np.array(points_around(lat, lon, radius, 5000, rng))
+            inside = haversine_distances(lat, lon, points[:, 0], points[:, 1]) <= radius
+            ranges = grid_cell_ranges(*bounding_box(lat, lon, radius))
+            for point_lat, point_lon in points[inside]:
+                cell = grid_cell_for(point_lat, point_lon)
+                self.assertTrue(any(first <= cell <= last for first, last in ranges), (lat, lon, radius, point_lat, point_lon))
+
+    def test_antimeridian_split(self):
+        """A box crossing the 180th meridian is split into two ranges per row, one at each end of the row."""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(0.0, 179.999, 1)
+        self.assertGreater(max_lon, 180)
+        ranges = grid_cell_ranges(min_lat, max_lat, min_lon, max_lon)
+        self.assertTrue(any(first <= grid_cell_for(0.0, -179.999) <= last for first, last in ranges))
+        self.assertTrue(any(first <= grid_cell_for(0.0, 179.999) <= last for first, last in ranges))
+        self.assertFalse(any(first <= grid_cell_for(0.0, 0.0) <= last for first, last in ranges))
+
+    def test_pole_spans_every_longitude(self):
+        """A circle reaching a pole covers whole grid rows."""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(89.95, 0.0, 10)
+        self.assertEqual((max_lat, min_lon, max_lon), (90, -180, 180))
+        for first, last in grid_cell_ranges(min_lat, max_lat, min_lon, max_lon):
+            self.assertEqual(last - first + 1, 36000)
+
+    def test_distance_helpers_agree(self):
+        """The vectorized haversine matches the scalar one."""
+        lats, lons = [42.0, -33.9, 89.99], [-71.0, 151.2, 179.0]
+        expected = [haversine_distance(42.36, -71.06, lat, lon) for lat, lon in zip(lats, lons)]
+        np.testing.assert_allclose(haversine_distances(42.36, -71.06, lats, lons), expected)
+
+
+class IdSetTest(SimpleTestCase):
+    """encode_ids/decode_ids round-trip any set of ids that fit in 32 bits."""
+
+    def test_round_trip(self):
+        """Ids come back sorted and without duplicates, whatever order they went in."""
+        rng = np.random.default_rng(19)
+        cases = [[], [0], [5, 5, 5], [3, 1, 2], list(range(100000)), [0, MAX_ID],
+                 rng.integers(0, MAX_ID, 5000).tolist(), np.arange(10, 50, dtype=np.int32)]
+        for ids in cases:
+            decoded = decode_ids(encode_ids(ids))
+            self.assertEqual(decoded.dtype, np.int64)
+            self.assertEqual(decoded.tolist(), sorted(set(int(value) for value in ids)))
+
+    def test_dense_ranges_are_small(self):
+        """Consecutive ids compress to well under a byte each."""
+        self.assertLess(len(encode_ids(range(100000))), 1000)
+
+    def test_rejects_ids_out_of_range(self):
+        """Negative ids and ids past 2**32 - 1 can't be stored as gaps."""
+        for ids in ([-1, 3], [MAX_ID + 1]):
+            with self.assertRaises(ValueError):
+                encode_ids(ids)
+
+    def test_empty_data(self):
+        """A list with no stored ids decodes to an empty array."""
+        self.assertEqual(len(decode_ids(b'')), 0)
+        self.assertEqual(len(decode_ids(None)), 0)
+
+
+class KDTreeTest(SimpleTestCase):
+    """KDTree.query finds the same nearest points as comparing against every point."""
+
+    def setUp(self):
+        rng = np.random.default_rng(17)
+        self.points = rng.normal(size=(2000, 3))
+        self.queries = rng.normal(size=(25, 3))
+        self.tree = KDTree(self.points, leaf_size=16)
+
+    def brute_force(self, point, k, allowed=None):
+        """Return the sorted distances to the k nearest allowed points."""
+        distances = np.sqrt(((self.points - point) ** 2).sum(axis=1))
+        if allowed is not None:
+            distances = distances[allowed]
+        return np.sort(distances)[:k]
+
+    def assert_matches(self, tree, k, allowed=None):
+        """Check tree's answers for every query point against brute force."""
+        accept = None
+        if allowed is not None:
+            accept = lambda start, end: allowed[tree.order[start:end]]
+        for point in self.queries:
+            positions, distances = tree.query(point, k, accept=accept)
+            np.testing.assert_allclose(distances, self.brute_force(point, k, allowed))
+            # Positions map back to the caller's rows through order
+            rows = tree.order[positions]
+            np.testing.assert_allclose(np.sqrt(((self.points[rows] - point) ** 2).sum(axis=1)), distances)
+            if allowed is not None:
+                self.assertTrue(allowed[rows].all())
+
+    def test_nearest(self):
+        """The k nearest distances agree with brute force for several k."""
+        for k in (1, 10, 100):
+            self.assert_matches(self.tree, k)
+
+    def test_accept_filter(self):
+        """Points rejected by accept are never returned, even when they are closest."""
+        allowed = np.arange(len(self.points)) % 7 == 0
+        self.assert_matches(self.tree, 10, allowed)
+
+    def test_more_than_available(self):
+        """Asking for more points than the tree holds returns all of them."""
+        small = KDTree(self.points[:5])
+        positions, distances = small.query(self.queries[0], 10)
+        self.assertEqual(sorted(small.order[positions].tolist()), [0, 1, 2, 3, 4])
+        self.assertEqual(len(KDTree(np.empty((0, 3))).query(self.queries[0], 3)[0]), 0)
+
+    def test_round_trip_through_arrays(self):
+        """A tree rebuilt from to_arrays answers exactly like the original."""
+        self.assert_matches(KDTree.from_arrays(self.tree.to_arrays()), 10)
+
+
+class FindPropertiesTest(TestCase):
+    """find_properties_within and find_properties_in_polygon return exactly what brute force does."""
+
+    def setUp(self):
+        use_temp_data_dir(self)
+        rng = np.random.default_rng(2)
+        points = []
+        for lat, lon, radius in TEST_CIRCLES:
+            points += points_around(lat, lon, radius, 300, rng)
+        make_properties(points)
+        self.points = dict(zip(Property.objects.values_list('pk', flat=True).order_by('pk'), points))
+
+    def brute_force(self, lat, lon, radius):
+        """Return the sorted ids of the properties within radius miles of (lat, lon), one distance at a time."""
+        return sorted(pk for pk, (point_lat, point_lon) in self.points.items()
+                      if haversine_distance(lat, lon, point_lat, point_lon) <= radius)
+
+    def assert_circles_match(self):
+        """Check every test circle against brute force."""
+        for lat, lon, radius in TEST_CIRCLES:
+            expected = self.brute_force(lat, lon, radius)
+            self.assertTrue(expected, (lat, lon, radius))
+            self.assertEqual(sorted(find_properties_within(lat, lon, radius)), expected, (lat, lon, radius))
+
+    def test_within_from_database(self):
+        """Before the snapshot is built, candidates are read from the database."""
+        self.assertIsNone(get_snapshot())
+        self.assert_circles_match()
+
+    def test_within_from_snapshot(self):
+        """Once the snapshot is built, candidates come from it with the same results."""
+        refresh_property_indexes()
+        self.assertIsNotNone(get_snapshot())
+        with self.assertNumQueries(len(TEST_CIRCLES)):
+            self.assert_circles_match()
+
+    def test_snapshot_follows_edits(self):
+        """Moving a property gives the data a new version, so the old snapshot is not used for it."""
+        refresh_property_indexes()
+        lat, lon, radius = TEST_CIRCLES[1]
+        moved = Property.objects.get(pk=self.brute_force(lat, lon, radius)[0])
+        moved.lat, moved.lon = -45.0, 100.0
+        moved.save()
+        self.assertIsNone(get_snapshot())
+        self.assertNotIn(moved.pk, find_properties_within(lat, lon, radius))
+
+    def test_empty_radius(self):
+        """A missing or zero radius selects nothing."""
+        self.assertEqual(find_properties_within(42.36, -71.06, 0), [])
+        self.assertEqual(find_properties_within(42.36, -71.06, None), [])
+
+    def test_polygon(self):
+        """A polygon selects the properties whose points are inside it."""
+        refresh_property_indexes()
+        polygon = [[42.30, -71.10], [42.42, -71.12], [42.40, -71.00], [42.32, -70.98]]
+        lats, lons = zip(*polygon)
+        expected = sorted(
+            pk for pk, (lat, lon) in self.points.items()
+            if min(lats) <= lat <= max(lats) and min(lons) <= lon <= max(lons)
+            and self.point_in_polygon(lat, lon, polygon)
+        )
+        self.assertTrue(expected)
+        self.assertEqual(sorted(find_properties_in_polygon(polygon)), expected)
+
+    @staticmethod
+    def point_in_polygon(lat, lon, polygon):
+        """Return True if (lat, lon) is inside polygon (ray casting, one point at a time)."""
+        inside = False
+        for (lat1, lon1), (lat2, lon2) in zip(polygon, polygon[1:] + polygon[:1]):
+            if (lat1 > lat) != (lat2 > lat) and lon < lon1 + (lon2 - lon1) * (lat - lat1) / (lat2 - lat1):
+                inside = not inside
+        return inside
+
+
+class DataVersionTest(TestCase):
+    """The data version is only written by changes, once per transaction, with one rebuild queued on commit."""
+
+    def setUp(self):
+        use_temp_data_dir(self)
+        self.ids = make_properties([(42.3 + index / 1000, -71.0) for index in range(5)])
+        Job.objects.all().delete()
+
+    def save_all(self):
+        """Re-save every test property (firing its signals)."""
+        for prop in Property.objects.filter(pk__in=self.ids):
+            prop.assessed_value += 1
+            prop.save()
+
+    def test_reading_never_writes(self):
+        """Without a version row (the migration makes one) reads report the initial version and create nothing."""
+        self.assertTrue(PropertyDataVersion.objects.filter(pk=1).exists())
+        PropertyDataVersion.objects.all().delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(data_version(), INITIAL_DATA_VERSION)
+        self.assertFalse(PropertyDataVersion.objects.exists())
+
+    def test_bulk_edit_bumps_and_queues_once(self):
+        """Saving many properties in one transaction bumps the version once and queues one rebuild after commit."""
+        before = data_version()
+        with mock.patch('project.snapshot.bump_data_version', wraps=bump_data_version) as bump, \
+                self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.save_all()
+                Property.objects.get(pk=self.ids[0]).delete()
+            self.assertFalse(Job.objects.exists())
+        self.assertEqual(bump.call_count, 1)
+        self.assertNotEqual(data_version(), before)
+        self.assertEqual(Job.objects.filter(kind='refresh_indexes').count(), 1)
+
+    def test_rolled_back_bump_is_redone(self):
+        """A change after a rolled back one still gets a new version."""
+        before = data_version()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.save_all()
+            raise RuntimeError('rolled back')
+        self.assertEqual(data_version(), before)
+        self.save_all()
+        self.assertNotEqual(data_version(), before)
+
+    def test_files_built_mid_transaction_get_a_new_version(self):
+        """Once files are built for the version, the next change in the same transaction bumps it again."""
+        self.save_all()
+        refresh_property_indexes()
+        built = data_version()
+        self.save_all()
+        self.assertNotEqual(data_version(), built)
+
+
+class ComparablesTest(TestCase):
+    """Comparables come from an index built ahead of time and match a brute force search."""
+
+    def setUp(self):
+        use_temp_data_dir(self)
+        rng = np.random.default_rng(42)
+        owner = make_owner()
+        points = points_around(42.36, -71.06, 3, 300, rng)
+        properties = [
+            Property(owner=owner, address=f'{index} MAIN ST', city='BOSTON', zip_code='02134', assessed_value=100000,
+                     style=['Colonial', 'Ranch'][index % 2], year_built=int(rng.integers(1900, 2000)),
+                     lat=lat, lon=lon, grid_cell=grid_cell_for(lat, lon))
+            for index, (lat, lon) in enumerate(points)
+        ]
+        Property.objects.bulk_create(properties)
+        bump_data_version()
+
+    def brute_force(self, prop):
+        """Return the distances to the closest properties like prop, found by checking every property."""
+        others = [other for other in Property.objects.exclude(pk=prop.pk).filter(style=prop.style)
+                  if abs(other.year_built - prop.year_built) <= YEAR_BUILT_WINDOW]
+        return sorted(haversine_distance(prop.lat, prop.lon, other.lat, other.lon) for other in others)[:COMPARABLE_COUNT]
+
+    def test_matches_brute_force(self):
+        """Every comparable has the same style and a close year, and none closer were missed."""
+        refresh_property_indexes()
+        for prop in Property.objects.order_by('pk')[:30]:
+            comparables = find_comparables(prop)
+            for comparable, _ in comparables:
+                self.assertEqual(comparable.style, prop.style)
+                self.assertLessEqual(abs(comparable.year_built - prop.year_built), YEAR_BUILT_WINDOW)
+                self.assertNotEqual(comparable.pk, prop.pk)
+            np.testing.assert_allclose([distance for _, distance in comparables], self.brute_force(prop), rtol=1e-6)
+
+    def test_narrow_year_window_searches_few_points(self):
+        """A restrictive year window only searches the trees of the years it allows, and still matches brute force."""
+        rng = np.random.default_rng(7)
+        owner = make_owner('Spread Owner')
+        points = points_around(42.36, -71.06, 3, 3000, rng)
+        Property.objects.bulk_create([
+            Property(owner=owner, address=f'{index} ELM ST', city='BOSTON', zip_code='02134', assessed_value=100000,
+                     style='Victorian', year_built=1800 + index % 220, lat=lat, lon=lon, grid_cell=grid_cell_for(lat, lon))
+            for index, (lat, lon) in enumerate(points)
+        ])
+        index = ComparablesIndex.build()
+
+        examined = []
+        query = KDTree.query
+
+        def counting_query(tree, point, k, accept=None):
+            def counting_accept(start, end):
+                examined.append(end - start)
+                return accept(start, end)
+            return query(tree, point, k, accept=counting_accept)
+
+        for prop in Property.objects.filter(style='Victorian').order_by('pk')[:20]:
+            examined.clear()
+            with mock.patch.object(KDTree, 'query', counting_query):
+                nearest = index.nearest(prop.style, prop.lat, prop.lon, prop.year_built, exclude_id=prop.pk, year_window=2)
+            # Two bands of about 200 points each at most, where one tree per style examined most of the 3000
+            self.assertLessEqual(sum(examined), 3000 / 6)
+
+            others = Property.objects.filter(style='Victorian', year_built__range=(prop.year_built - 2, prop.year_built + 2))
+            expected = sorted(haversine_distance(prop.lat, prop.lon, other.lat, other.lon)
+                              for other in others.exclude(pk=prop.pk))[:COMPARABLE_COUNT]
+            np.testing.assert_allclose([distance for _, distance in nearest], expected, rtol=1e-6)
+
+    def test_old_index_file_is_rebuilt(self):
+        """An index file written before trees were split by year band is treated as missing."""
+        refresh_property_indexes()
+        version = data_version()
+        np.savez(data_file_path('property_comparables', version, 'npz'), styles=np.array(['Colonial']))
+        prop = Property.objects.first()
+        Job.objects.all().delete()
+        with mock.patch.object(comparables, '_loaded', (None, None)):
+            self.assertEqual(find_comparables(prop), [])
+        self.assertTrue(Job.objects.filter(kind='refresh_indexes', status='queued').exists())
+
+    def test_index_is_not_built_by_requests(self):
+        """Before its file exists a request gets no comparables and queues a rebuild instead of building the index."""
+        prop = Property.objects.first()
+        with mock.patch.object(ComparablesIndex, 'build', wraps=ComparablesIndex.build) as build:
+            self.assertEqual(find_comparables(prop), [])
+            build.assert_not_called()
+        self.assertTrue(Job.objects.filter(kind='refresh_indexes', status='queued').exists())
+
+        run_job(claim_next_job())
+        self.assertEqual(len(find_comparables(prop)), COMPARABLE_COUNT)
+
+
+class MembershipTest(TestCase):
+    """sync_list_properties writes only the difference and keeps the list's summary figures in step."""
+
+    def setUp(self):
+        self.ids = make_properties([(42.3 + index / 1000, -71.0) for index in range(40)])
+        self.list = make_list(make_user_profile())
+        self.Membership = List.properties.through
+
+    def assert_figures(self, ids):
+        """Check the list's stored summary figures describe exactly the properties in ids."""
+        self.list.refresh_from_db()
+        values = list(Property.objects.filter(pk__in=ids).values_list('assessed_value', flat=True))
+        self.assertEqual(self.list.property_count, len(ids))
+        self.assertEqual(self.list.total_assessed_value, sum(values))
+        self.assertEqual(self.list.min_assessed_value, min(values, default=None))
+        self.assertEqual(self.list.max_assessed_value, max(values, default=None))
+        self.assertEqual(self.list.median_assessed_value, statistics.median(values) if values else None)
+
+    def test_adds_and_removes_only_the_difference(self):
+        """Only missing rows are inserted and only stale rows deleted."""
+        self.assertEqual(sync_list_properties(self.list, self.ids[:20]), (20, 0))
+        self.assert_figures(self.ids[:20])
+
+        first_rows = dict(self.Membership.objects.filter(list_id=self.list.pk).values_list('property_id', 'pk'))
+        self.assertEqual(sync_list_properties(self.list, self.ids[10:30] + self.ids[10:12]), (10, 10))
+        rows = dict(self.Membership.objects.filter(list_id=self.list.pk).values_list('property_id', 'pk'))
+        self.assertEqual(sorted(rows), self.ids[10:30])
+        # Rows for properties in both memberships were left alone
+        self.assertEqual({pk: rows[pk] for pk in self.ids[10:20]}, {pk: first_rows[pk] for pk in self.ids[10:20]})
+        self.assert_figures(self.ids[10:30])
+
+        self.assertEqual(sync_list_properties(self.list, []), (0, 20))
+        self.assert_figures([])
+
+    def test_figures_refreshed_only_when_membership_changes(self):
+        """An unchanged membership writes nothing and does not recompute the figures."""
+        sync_list_properties(self.list, self.ids[:5])
+        with mock.patch.object(List, 'refresh_aggregates', autospec=True) as refresh:
+            self.assertEqual(sync_list_properties(self.list, reversed(self.ids[:5])), (0, 0))
+            refresh.assert_not_called()
+            sync_list_properties(self.list, self.ids[:6])
+            refresh.assert_called_once_with(self.list)
+
+    @override_settings(LIST_COMPRESSION_THRESHOLD=10)
+    def test_moves_between_table_and_compressed_ids(self):
+        """Lists reaching the threshold move to compressed ids, and move back when they shrink below it."""
+        self.assertEqual(sync_list_properties(self.list, self.ids[:5]), (5, 0))
+        self.assertFalse(self.list.is_compressed())
+
+        self.assertEqual(sync_list_properties(self.list, self.ids[:15]), (10, 0))
+        self.assertEqual(member_ids(self.list), self.ids[:15])
+        self.assertTrue(self.list.is_compressed())
+        self.assertFalse(self.Membership.objects.filter(list_id=self.list.pk).exists())
+        self.assert_figures(self.ids[:15])
+
+        self.assertEqual(sync_list_properties(self.list, self.ids[5:25]), (10, 5))
+        self.assertEqual(member_ids(self.list), self.ids[5:25])
+        self.assert_figures(self.ids[5:25])
+
+        self.assertEqual(sync_list_properties(self.list, self.ids[20:24]), (0, 16))
+        self.assertFalse(self.list.is_compressed())
+        self.assertEqual(sorted(self.Membership.objects.filter(list_id=self.list.pk).values_list('property_id', flat=True)),
+                         self.ids[20:24])
+        self.assert_figures(self.ids[20:24])
+
+
+class PropertySignalTest(TestCase):
+    """Saving or deleting a property only touches the lists whose figures it can change."""
+
+    def setUp(self):
+        use_temp_data_dir(self)
+        self.ids = make_properties([(42.3 + index / 1000, -71.0) for index in range(30)])
+        creator = make_user_profile()
+        self.small_list = make_list(creator, 'Small')
+        self.large_list = make_list(creator, 'Large')
+        sync_list_properties(self.small_list, self.ids[:5])
+        with override_settings(LIST_COMPRESSION_THRESHOLD=20):
+            sync_list_properties(self.large_list, self.ids)
+        self.assertTrue(self.large_list.is_compressed())
+
+    def test_edit_outside_list_figures_skips_lists(self):
+        """An address change neither looks for the lists holding the property nor recomputes them."""
+        prop = Property.objects.get(pk=self.ids[0])
+        prop.address = '1 NEW ST'
+        with mock.patch.object(signals, 'lists_containing', wraps=lists_containing) as containing:
+            prop.save()
+        containing.assert_not_called()
+
+    def test_value_edit_refreshes_lists(self):
+        """A value change is carried into the figures of table and compressed lists holding the property."""
+        prop = Property.objects.get(pk=self.ids[0])
+        prop.assessed_value += 1000
+        prop.save()
+        for marketing_list in (self.small_list, self.large_list):
+            expected = sum(Property.objects.filter(pk__in=member_ids(marketing_list)).values_list('assessed_value', flat=True))
+            self.assertEqual(marketing_list.total_assessed_value, expected)
+
+    def test_delete_scans_compressed_lists_once(self):
+        """A deleted property leaves both kinds of list, with one pass over the compressed ones."""
+        with mock.patch.object(signals, 'drop_compressed_members', wraps=drop_compressed_members) as drop, \
+                mock.patch.object(signals, 'lists_containing', wraps=lists_containing) as containing:
+            Property.objects.get(pk=self.ids[0]).delete()
+        drop.assert_called_once_with([self.ids[0]])
+        containing.assert_not_called()
+        self.assertEqual(member_ids(self.small_list), self.ids[1:5])
+        self.assertEqual(member_ids(self.large_list), self.ids[1:])
+        self.assertEqual(self.small_list.property_count, 4)
+        self.assertEqual(self.large_list.property_count, 29)
+
+
+    def test_compressed_lists_outside_the_id_range_are_skipped(self):
+        """Only compressed lists whose stored id range holds a deleted property are decoded, and the range follows removals."""
+        high_ids = make_properties([(42.5 + index / 1000, -71.0) for index in range(25)])
+        high_list = make_list(self.small_list.creator, 'High')
+        with override_settings(LIST_COMPRESSION_THRESHOLD=20):
+            sync_list_properties(high_list, high_ids)
+        high_list.refresh_from_db()
+        self.assertEqual((high_list.min_member_id, high_list.max_member_id), (high_ids[0], high_ids[-1]))
+
+        get_member_ids = List.get_member_ids
+        with mock.patch.object(List, 'get_member_ids', autospec=True, side_effect=get_member_ids) as decoded:
+            Property.objects.get(pk=self.ids[0]).delete()
+        self.assertNotIn(high_list.pk, {call.args[0].pk for call in decoded.call_args_list})
+
+        self.large_list.refresh_from_db()
+        self.assertEqual((self.large_list.min_member_id, self.large_list.max_member_id), (self.ids[1], self.ids[-1]))
+        self.assertEqual(lists_containing([high_ids[0]]), {high_list.pk})
+        self.assertEqual(lists_containing([self.ids[-1]]), {self.large_list.pk})
+        self.assertEqual(lists_containing([self.ids[0]]), set())
+
+class AnalyticsTest(TestCase):
+    """List analytics group members by value, decade, style and owner type, and are cached until membership changes."""
+
+    def setUp(self):
+        company = PropertyOwner.objects.create(name='ACME LLC', address='1 Owner Way', is_company=True)
+        point = [(42.3, -71.0)]
+        self.ids = (
+            make_properties(point * 3, owner=company, assessed_value=99_999, year_built=1955, style='Colonial')
+            + make_properties(point * 2, assessed_value=100_000, year_built=1959, style='Ranch')
+            + make_properties(point, assessed_value=5_000_000, year_built=2000, style='Cape')
+            + make_properties(point, assessed_value=750_000, year_built=0, style='Colonial')
+        )
+        for letter in 'ABCDEFGH':
+            self.ids += make_properties(point, assessed_value=300_000, year_built=1999, style=f'Style {letter}')
+        self.marketing_list = make_list(make_user_profile())
+        sync_list_properties(self.marketing_list, self.ids)
+
+    def counts(self, groups):
+        """Return (label, count) for each group."""
+        return [(group['label'], group['count']) for group in groups]
+
+    def test_breakdowns(self):
+        """Value buckets, decades (by integer division), the top styles plus Other, and owner types."""
+        analytics = compute_list_analytics(self.marketing_list)
+        self.assertEqual(analytics['total'], 15)
+        self.assertEqual(self.counts(analytics['value_buckets']), [
+            ('Under $100k', 3), ('$100k to $250k', 2), ('$250k to $500k', 8), ('$500k to $750k', 0),
+            ('$750k to $1M', 1), ('$1M to $2M', 0), ('$2M to $5M', 0), ('$5M and up', 1),
+        ])
+        self.assertEqual(self.counts(analytics['decades']),
+                         [('Unknown', 1), ('1950s', 5), ('1990s', 8), ('2000s', 1)])
+        self.assertEqual(self.counts(analytics['styles']), [
+            ('Colonial', 4), ('Ranch', 2), ('Cape', 1), ('Style A', 1), ('Style B', 1), ('Style C', 1),
+            ('Style D', 1), ('Style E', 1), ('Other', 3),
+        ])
+        self.assertEqual([(group['label'], group['count'], group['total_value']) for group in analytics['owners']],
+                         [('Company', 3, 3 * 99_999), ('Individual', 12, 200_000 + 5_000_000 + 750_000 + 8 * 300_000)])
+        self.assertEqual([(group['percent'], group['width']) for group in analytics['owners']], [(20.0, 25), (80.0, 100)])
+
+    def test_cached_until_membership_changes(self):
+        """The stored analytics are reused, and dropped when the membership changes."""
+        self.assertEqual(get_list_analytics(self.marketing_list)['total'], 15)
+        self.marketing_list.refresh_from_db()
+        self.assertEqual(self.marketing_list.analytics['total'], 15)
+        with self.assertNumQueries(0):
+            get_list_analytics(self.marketing_list)
+
+        sync_list_properties(self.marketing_list, self.ids[:3])
+        self.marketing_list.refresh_from_db()
+        self.assertIsNone(self.marketing_list.analytics)
+        analytics = get_list_analytics(self.marketing_list)
+        self.assertEqual(self.counts(analytics['owners']), [('Company', 3)])
+        self.marketing_list.refresh_from_db()
+        self.assertEqual(self.marketing_list.analytics['total'], 3)
+
+
+class CombineListsTest(TestCase):
+    """combine_lists gives the same members whether it runs as SQL or on compressed id arrays."""
+
+    def setUp(self):
+        self.ids = make_properties([(42.3 + index / 1000, -71.0) for index in range(40)])
+        self.creator = make_user_profile()
+        self.first = make_list(self.creator, 'First')
+        self.second = make_list(self.creator, 'Second')
+
+    def expected(self, operation):
+        """Return the sorted ids operation should produce from the two lists."""
+        first = set(member_ids(self.first))
+        second = set(member_ids(self.second))
+        return sorted({'union': first | second, 'intersection': first & second, 'difference': first - second}[operation])
+
+    def assert_combines(self, uses_arrays):
+        """Check every operation's members and figures, and which path produced them."""
+        for operation in LIST_OPERATIONS:
+            with mock.patch.object(listsets, 'sync_list_properties', wraps=sync_list_properties) as sync:
+                combined = combine_lists(operation, self.first, self.second, operation, self.creator)
+            self.assertEqual(sync.called, uses_arrays, operation)
+            expected = self.expected(operation)
+            self.assertEqual(member_ids(combined), expected, operation)
+            self.assertEqual(combined.property_count, len(expected))
+            self.assertEqual(combined.total_assessed_value,
+                             sum(Property.objects.filter(pk__in=expected).values_list('assessed_value', flat=True)))
+            self.assertEqual(combined.selection['lists'], [self.first.pk, self.second.pk])
+
+    def test_small_lists_combine_in_sql(self):
+        """Lists stored in the membership table are combined by one INSERT ... SELECT."""
+        sync_list_properties(self.first, self.ids[:20])
+        sync_list_properties(self.second, self.ids[10:30])
+        self.assert_combines(uses_arrays=False)
+
+    @override_settings(LIST_COMPRESSION_THRESHOLD=15)
+    def test_compressed_lists_combine_as_arrays(self):
+        """Compressed lists, or results that could reach the threshold, are combined as sorted id arrays."""
+        sync_list_properties(self.first, self.ids[:20])
+        sync_list_properties(self.second, self.ids[10:30])
+        self.assertTrue(self.first.is_compressed() and self.second.is_compressed())
+        self.assert_combines(uses_arrays=True)
+
+        # One compressed list and one in the membership table
+        sync_list_properties(self.second, self.ids[15:20] + self.ids[35:])
+        self.assertFalse(self.second.is_compressed())
+        self.assert_combines(uses_arrays=True)
+
+    def test_unknown_operation(self):
+        """An operation that isn't supported creates nothing."""
+        with self.assertRaises(ValueError):
+            combine_lists('xor', self.first, self.second, 'Bad', self.creator)
+        self.assertEqual(List.objects.count(), 2)
+
+
+class OwnerNameTest(SimpleTestCase):
+    """Owner names are normalized, classified by whole words, and keyed so only the same owner collides."""
+
+    def test_normalize(self):
+        """Case, punctuation, dotted abbreviations, suffix spellings and a leading THE don't matter."""
+        self.assertEqual(normalize_owner_name('The Acme Realty, L.L.C.'), 'ACME REALTY LLC')
+        self.assertEqual(normalize_owner_name('Smith & Jones Co.'), 'SMITH AND JONES CO')
+        self.assertEqual(normalize_owner_name('ACME CORPORATION'), normalize_owner_name('Acme Corp.'))
+        self.assertEqual(normalize_owner_name('Doe Family Trust'), normalize_owner_name('DOE FAMILY TRUSTEES'))
+        self.assertEqual(normalize_owner_name('THEODORE SMITH'), 'THEODORE SMITH')
+        self.assertEqual(normalize_owner_name(''), '')
+
+    def test_company_keywords_match_whole_words(self):
+        """Keywords inside other words (LP in ALPHONSE, INC in VINCENT, CO in COREY) don't make a company."""
+        for name in ['ACME LLC', 'Acme L.L.C.', 'SMITH & CO', 'BLUE HILL LP', 'DOE FAMILY TRUST', 'ACME INCORPORATED']:
+            self.assertTrue(is_company_name(name), name)
+        for name in ['ALPHONSE SMITH', 'VINCENT COREY', 'JOHN SMITH', 'TRUSTY LTDA']:
+            self.assertFalse(is_company_name(name), name)
+
+    def test_keys(self):
+        """Companies share a key across spellings and addresses; individuals need the same address too."""
+        self.assertEqual(owner_key('Acme Realty, L.L.C.', '1 A ST', True), owner_key('THE ACME REALTY LLC', '9 B ST', True))
+        self.assertEqual(owner_key('John Smith', '1 a st', False), owner_key('JOHN SMITH', '1 A ST', False))
+        self.assertNotEqual(owner_key('JOHN SMITH', '1 A ST', False), owner_key('JOHN SMITH', '9 B ST', False))
+        self.assertNotEqual(owner_key('SMITH', '1 A ST', True), owner_key('SMITH', '1 A ST', False))
+
+    def test_parsed_individuals_keep_their_addresses(self):
+        """Two individuals whose names contain a company keyword as a substring stay separate owners."""
+        first = parse_parcel_row(parcel_row(1, owner='ALPHONSE SMITH'))
+        second = parse_parcel_row(parcel_row(2, owner='ALPHONSE SMITH', OWN_ADDR='9 OTHER RD'))
+        self.assertFalse(first[2])
+        self.assertNotEqual(first[15], second[15])
+
+
+class OwnerViewTest(TestCase):
+    """The owner pages rank precomputed portfolios and page through one owner's properties."""
+
+    def setUp(self):
+        self.company = PropertyOwner.objects.create(name='The Acme Realty LLC', address='1 Owner Way', is_company=True)
+        self.person = make_owner('Jane Smith')
+        self.other = make_owner('Acme Smith')
+        point = [(42.3, -71.0)]
+        self.company_ids = make_properties(point * 3, owner=self.company, assessed_value=100_000)
+        make_properties(point, owner=self.person, assessed_value=900_000)
+        make_properties(point, owner=self.other, assessed_value=50_000)
+        Property.objects.filter(pk=self.company_ids[0]).update(assessed_value=300_000, city='CAMBRIDGE')
+        refresh_portfolios([self.company.pk, self.person.pk, self.other.pk])
+        make_user_profile()
+        self.client.login(username='marketer', password='password')
+
+    def owner_names(self, **params):
+        """Return the owner names on the owner list page for the given query parameters."""
+        response = self.client.get(reverse('show_owners'), params)
+        self.assertEqual(response.status_code, 200)
+        return [portfolio.owner.name for portfolio in response.context['portfolios']]
+
+    def test_owner_list(self):
+        """Owners are ranked by total value or count and filtered by normalized name prefix and type."""
+        self.assertEqual(self.owner_names(), ['Jane Smith', 'The Acme Realty LLC', 'Acme Smith'])
+        self.assertEqual(self.owner_names(sort='-property_count')[0], 'The Acme Realty LLC')
+        self.assertEqual(self.owner_names(name='acme'), ['The Acme Realty LLC', 'Acme Smith'])
+        self.assertEqual(self.owner_names(name='the acme r'), ['The Acme Realty LLC'])
+        self.assertEqual(self.owner_names(owner_type='company'), ['The Acme Realty LLC'])
+        self.assertEqual(self.owner_names(owner_type='individual', sort='bogus'), ['Jane Smith', 'Acme Smith'])
+
+    def test_owner_detail(self):
+        """The owner page shows the portfolio figures and the owner's properties, most valuable first."""
+        response = self.client.get(reverse('show_owner', kwargs={'pk': self.company.pk}))
+        portfolio = response.context['portfolio']
+        self.assertEqual((portfolio.property_count, portfolio.total_assessed_value), (3, 500_000))
+        self.assertEqual(portfolio.cities, ['BOSTON', 'CAMBRIDGE'])
+        self.assertEqual([prop.pk for prop in response.context['properties']][0], self.company_ids[0])
+        self.assertEqual(response.context['page_obj'].total, 3)
+        self.assertContains(response, 'Showing 3 of 3')
+
+    def test_owner_without_properties(self):
+        """An owner with no portfolio still has a page."""
+        owner = make_owner('Nobody')
+        response = self.client.get(reverse('show_owner', kwargs={'pk': owner.pk}))
+        self.assertIsNone(response.context['portfolio'])
+        self.assertContains(response, 'no properties on record')
+
+
+class LoaderTest(TestCase):
+    """load_parcels replaces the property data only once the whole file has loaded; refresh_parcels updates it in place."""
+
+    def setUp(self):
+        use_temp_data_dir(self)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        rows = [parcel_row(number, owner=f'OWNER {number % 3}') for number in range(1, 11)]
+        self.path = write_parcel_csv(self.directory, rows)
+
+    def load(self, path, *args):
+        """Run the load_parcels command and return its output."""
+        output = StringIO()
+        call_command('load_parcels', path, *args, stdout=output)
+        return output.getvalue()
+
+    def test_load(self):
+        """Every usable row becomes a property, owners are shared, and progress goes to the command's output."""
+        output = self.load(self.path, '--batch-size', '4')
+        self.assertEqual(Property.objects.count(), 10)
+        self.assertEqual(PropertyOwner.objects.count(), 3)
+        self.assertIn('Processed 8 rows', output)
+        self.assertIn('Loaded 10 properties and 3 owners', output)
+        self.assertEqual(len(find_properties_within(42.3005, -71.05, 1)), 10)
+
+    def test_load_skips_unusable_coordinates(self):
+        """Rows with non-finite or out of range coordinates are skipped instead of failing the load."""
+        rows = [parcel_row(1), parcel_row(2, lat='nan'), parcel_row(3, lon='inf'), parcel_row(4, lat='123'),
+                parcel_row(5, lon='-181'), parcel_row(6)]
+        output = self.load(write_parcel_csv(self.directory, rows, name='coordinates.csv'))
+        self.assertIn('Loaded 2 properties', output)
+        self.assertEqual(sorted(Property.objects.values_list('parcel_id', flat=True)), ['35:P1', '35:P6'])
+
+    def test_failed_load_keeps_old_data(self):
+        """A load that fails part way, or finds no usable rows, leaves the old properties and lists alone."""
+        self.load(self.path)
+        marketing_list = make_list(make_user_profile())
+        sync_list_properties(marketing_list, Property.objects.values_list('pk', flat=True))
+        before = sorted(Property.objects.values_list('pk', flat=True))
+
+        insert_chunk = loader.insert_chunk
+        calls = []
+
+        def failing_insert_chunk(*args):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('disk full')
+            return insert_chunk(*args)
+
+        with mock.patch.object(loader, 'insert_chunk', failing_insert_chunk):
+            with self.assertRaises(RuntimeError):
+                self.load(self.path, '--batch-size', '4')
+
+        unusable = write_parcel_csv(self.directory, [parcel_row(1, lat='')], name='bad.csv')
+        with self.assertRaisesMessage(CommandError, 'no usable parcel rows'):
+            self.load(unusable)
+
+        self.assertEqual(sorted(Property.objects.values_list('pk', flat=True)), before)
+        marketing_list.refresh_from_db()
+        self.assertEqual(marketing_list.property_count, 10)
+        self.assertEqual(sorted(member_ids(marketing_list)), before)
+
+    def test_refresh_updates_in_place(self):
+        """A refresh keeps the ids (and list memberships) of parcels still in the file, deletes stale ones and prunes owners."""
+        self.load(self.path)
+        marketing_list = make_list(make_user_profile())
+        sync_list_properties(marketing_list, Property.objects.values_list('pk', flat=True))
+        ids_by_parcel = dict(Property.objects.values_list('parcel_id', 'pk'))
+
+        # Parcels 9 and 10 are gone, 2 is revalued, OWNER 0 sells 3 and 6 to OWNER 1, and 11 is new
+        rows = [parcel_row(number, owner='OWNER 1' if number % 3 == 0 else f'OWNER {number % 3}',
+                           value=999999 if number == 2 else 300000)
+                for number in range(1, 9)]
+        rows.append(parcel_row(11, owner='OWNER 2'))
+        path = write_parcel_csv(self.directory, rows, name='refresh.csv')
+        output = self.load(path, '--refresh', '--batch-size', '4')
+        self.assertIn('1 added, 3 changed, 2 removed, 5 unchanged', output)
+
+        kept = [ids_by_parcel[f'35:P{number}'] for number in range(1, 9)]
+        self.assertEqual(Property.objects.count(), 9)
+        self.assertEqual(Property.objects.filter(pk__in=kept).count(), 8)
+        self.assertFalse(Property.objects.filter(pk__in=[ids_by_parcel['35:P9'], ids_by_parcel['35:P10']]).exists())
+        self.assertEqual(Property.objects.get(pk=ids_by_parcel['35:P2']).assessed_value, 999999)
+
+        self.assertEqual(sorted(PropertyOwner.objects.values_list('name', flat=True)), ['OWNER 1', 'OWNER 2'])
+        self.assertEqual(OwnerPortfolio.objects.get(owner__name='OWNER 1').property_count, 5)
+
+        marketing_list.refresh_from_db()
+        self.assertEqual(sorted(member_ids(marketing_list)), sorted(kept))
+        self.assertEqual(marketing_list.property_count, 8)
+        self.assertEqual(marketing_list.total_assessed_value, 7 * 300000 + 999999)
+        self.assertEqual(len(find_properties_within(42.3005, -71.05, 1)), 9)
+
+    def test_failed_refresh_keeps_derived_data_in_step(self):
+        """A refresh that fails part way refreshes derived data for the chunks it wrote, deletes nothing, and can be rerun."""
+        self.load(self.path)
+        marketing_list = make_list(make_user_profile())
+        sync_list_properties(marketing_list, Property.objects.values_list('pk', flat=True))
+        version = PropertyDataVersion.objects.get().version
+
+        # Parcel 2 (in the first chunk) is revalued and parcels 9 and 10 are gone
+        rows = [parcel_row(number, owner=f'OWNER {number % 3}', value=999999 if number == 2 else 300000)
+                for number in range(1, 9)]
+        path = write_parcel_csv(self.directory, rows, name='refresh.csv')
+
+        refresh_chunk = loader.refresh_chunk
+        calls = []
+
+        def failing_refresh_chunk(*args):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('disk full')
+            return refresh_chunk(*args)
+
+        with mock.patch.object(loader, 'refresh_chunk', failing_refresh_chunk):
+            with self.assertRaises(RuntimeError):
+                self.load(path, '--refresh', '--batch-size', '4')
+
+        self.assertEqual(Property.objects.count(), 10)
+        self.assertNotEqual(PropertyDataVersion.objects.get().version, version)
+        self.assertEqual(OwnerPortfolio.objects.get(owner__name='OWNER 2').total_assessed_value, 999999 + 2 * 300000)
+        marketing_list.refresh_from_db()
+        self.assertEqual(marketing_list.total_assessed_value, 9 * 300000 + 999999)
+
+        output = self.load(path, '--refresh', '--batch-size', '4')
+        self.assertIn('0 added, 0 changed, 2 removed, 8 unchanged', output)
+        marketing_list.refresh_from_db()
+        self.assertEqual(marketing_list.property_count, 8)
+        self.assertEqual(marketing_list.total_assessed_value, 7 * 300000 + 999999)
+
+    def test_refresh_leaves_properties_without_parcel_ids(self):
+        """Properties stored without a parcel id can't be matched, so a refresh keeps them and reports them."""
+        rows = [parcel_row(1), parcel_row(1, value=5), parcel_row(2)]
+        self.load(write_parcel_csv(self.directory, rows, name='duplicates.csv'))
+        unmatched = Property.objects.get(parcel_id=None)
+
+        output = self.load(write_parcel_csv(self.directory, [parcel_row(2)], name='refresh.csv'), '--refresh')
+        self.assertIn('0 added, 0 changed, 1 removed, 1 unchanged', output)
+        self.assertIn('Left 1 properties without a parcel id', output)
+        self.assertEqual(list(Property.objects.filter(parcel_id=None)), [unmatched])
+
+    def test_refresh_rejects_empty_file(self):
+        """A refresh from a file with no usable rows deletes nothing."""
+        self.load(self.path)
+        unusable = write_parcel_csv(self.directory, [parcel_row(1, lat='')], name='bad.csv')
+        with self.assertRaisesMessage(CommandError, 'no usable parcel rows'):
+            self.load(unusable, '--refresh')
+        self.assertEqual(Property.objects.count(), 10)
+
+
+class GeocodingTest(TestCase):
+    """Addresses are looked up exactly, by prefix, by street and by closest house number, preferring their city and ZIP code."""
+
+    def setUp(self):
+        lookup_normalized.cache_clear()
+        self.addCleanup(lookup_normalized.cache_clear)
+        owner = make_owner()
+        for address, city, zip_code, lat in [
+            ('12 Main St', 'Springfield', '01103', 42.6),
+            ('12 Main St', 'BOSTON', '02134', 42.1), ('12 Main St Ext', 'BOSTON', '02134', 42.2),
+            ('20 Main St', 'BOSTON', '02134', 42.3), ('5 Maple Ave', 'BOSTON', '02134', 42.4),
+            ('12 Main St', 'WORCESTER', '01608', 42.7), ('30 Main St', 'WORCESTER', '01608', 42.8),
+        ]:
+            Property.objects.create(owner=owner, address=address, city=city, zip_code=zip_code,
+                                    assessed_value=100000, style='Colonial', year_built=1950, lat=lat, lon=-71.0)
+
+    def test_locality(self):
+        """The city and ZIP code after the first comma are parsed and normalized."""
+        self.assertEqual(address_locality('12 Main St, Worcester, MA 01608'), ('WORCESTER', '01608'))
+        self.assertEqual(address_locality('12 Main St, North  Andover Mass.'), ('NORTH ANDOVER', ''))
+        self.assertEqual(address_locality('12 Main St, 01608-1234'), ('', '01608'))
+        self.assertEqual(address_locality('12 Main St'), ('', ''))
+        self.assertEqual(Property.objects.get(city='Springfield').normalized_city, 'SPRINGFIELD')
+
+    def test_exact(self):
+        """Abbreviations and case don't matter, and the address's city or ZIP code picks between equal addresses."""
+        self.assertEqual(geocode_address('12 MAIN STREET, Boston MA'), (42.1, -71.0))
+        self.assertEqual(geocode_address('12 Main St, Worcester, MA'), (42.7, -71.0))
+        self.assertEqual(geocode_address('12 Main St, 01608'), (42.7, -71.0))
+        self.assertEqual(geocode_address('12 main st ext'), (42.2, -71.0))
+        # Without a city, or with one we have no match in, any town's 12 Main St will do
+        self.assertEqual(geocode_address('12 Main St'), (42.6, -71.0))
+        self.assertEqual(geocode_address('12 Main St, Chicopee'), (42.6, -71.0))
+
+    def test_prefix(self):
+        """A partial address picks the shortest completion, in the address's city first."""
+        self.assertEqual(geocode_address('12 Main, Boston'), (42.1, -71.0))
+        self.assertEqual(geocode_address('12 Main, Worcester'), (42.7, -71.0))
+        self.assertEqual(geocode_address('5 Map'), (42.4, -71.0))
+
+    def test_street_without_number(self):
+        """A street with no house number uses a property on the first street starting with the text."""
+        self.assertEqual(geocode_address('Mapl'), (42.4, -71.0))
+        self.assertEqual(geocode_address('Main St, Worcester'), (42.7, -71.0))
+        self.assertEqual(geocode_address('Elm St'), (None, None))
+
+    def test_closest_house_number(self):
+        """A house number missing from our data uses the closest number on the same street in the same place."""
+        self.assertEqual(geocode_address('15 Main St, Boston'), (42.1, -71.0))
+        self.assertEqual(geocode_address('18 Main St, Boston'), (42.3, -71.0))
+        self.assertEqual(geocode_address('25 Main St, Worcester'), (42.8, -71.0))
+        self.assertEqual(geocode_address('25 Main St, 01608'), (42.8, -71.0))
+        self.assertEqual(geocode_address('15 Main St, Chicopee'), (None, None))
+        self.assertEqual(geocode_address('15 Elm St'), (None, None))
+
+    def test_closest_house_number_reads_two_rows(self):
+        """The nearest numbers above and below are found with one ordered query each."""
+        with self.assertNumQueries(2):
+            self.assertEqual(closest_house_number('MAIN STREET', 25, {'normalized_city': 'WORCESTER'}), (42.8, -71.0))
+        with self.assertNumQueries(2):
+            self.assertEqual(closest_house_number('MAIN STREET', 1, {}), (42.6, -71.0))
+
+    def test_empty(self):
+        """Blank addresses aren't looked up."""
+        self.assertEqual(geocode_address(''), (None, None))
+        self.assertEqual(geocode_address(None), (None, None))
+
+    def test_new_data_version_skips_cached_lookups(self):
+        """Lookups are cached until the data version changes, so a reload is never answered from stale data."""
+        self.assertEqual(geocode_address('20 Main St'), (42.3, -71.0))
+        Property.objects.filter(address='20 Main St').update(lat=43.0)
+        self.assertEqual(geocode_address('20 Main St'), (42.3, -71.0))
+        bump_data_version()
+        self.assertEqual(geocode_address('20 Main St'), (43.0, -71.0))
+
+
+class FacetTest(TestCase):
+    """Facet counts follow property saves and deletes and drive the property list's filter dropdowns."""
+
+    def setUp(self):
+        owner = make_owner()
+        self.properties = [
+            Property.objects.create(owner=owner, address=f'{index} MAIN ST', city=city, zip_code=zip_code,
+                                    assessed_value=100000, style=style, year_built=1950, lat=42.3, lon=-71.0)
+            for index, (city, zip_code, style) in enumerate([
+                ('BOSTON', '02134', 'Colonial'), ('BOSTON', '02134', 'Colonial'),
+                ('BOSTON', '02135', 'Ranch'), ('CAMBRIDGE', '02139', 'Colonial'),
+            ])
+        ]
+
+    def facet_rows(self):
+        """Return every (city, zip code, style, count) row of the facet table."""
+        return sorted(PropertyFacet.objects.values_list('city', 'zip_code', 'style', 'count'))
+
+    def test_counts_follow_create_edit_and_delete(self):
+        """Saves and deletes adjust the counts to what a rebuild would give, dropping combinations that reach zero."""
+        self.assertEqual(self.facet_rows(), [('BOSTON', '02134', 'Colonial', 2), ('BOSTON', '02135', 'Ranch', 1),
+                                             ('CAMBRIDGE', '02139', 'Colonial', 1)])
+
+        moved = self.properties[3]
+        moved.city, moved.zip_code = 'BOSTON', '02135'
+        moved.style = 'Ranch'
+        moved.save()
+        self.properties[0].assessed_value = 5
+        self.properties[0].save()
+        self.assertEqual(self.facet_rows(), [('BOSTON', '02134', 'Colonial', 2), ('BOSTON', '02135', 'Ranch', 2)])
+
+        self.properties[1].delete()
+        self.properties[2].delete()
+        incremental = self.facet_rows()
+        self.assertEqual(incremental, [('BOSTON', '02134', 'Colonial', 1), ('BOSTON', '02135', 'Ranch', 1)])
+        rebuild_facets()
+        self.assertEqual(self.facet_rows(), incremental)
+
+    def test_counts_narrowed_by_other_selections(self):
+        """Each field's counts respect the other fields' selections but not its own."""
+        self.assertEqual(facet_counts('city'), [('BOSTON', 3), ('CAMBRIDGE', 1)])
+        self.assertEqual(facet_counts('city', style='Colonial'), [('BOSTON', 2), ('CAMBRIDGE', 1)])
+        self.assertEqual(facet_counts('city', city='BOSTON', zip_code=''), [('BOSTON', 3), ('CAMBRIDGE', 1)])
+        self.assertEqual(facet_counts('zip_code', city='BOSTON'), [('02134', 2), ('02135', 1)])
+        self.assertEqual(facet_counts('style', city='BOSTON', zip_code='02135'), [('Ranch', 1)])
+
+    def test_property_list_dropdowns(self):
+        """The property list shows the facet counts and filters on the exact dropdown value."""
+        make_user_profile()
+        self.client.login(username='marketer', password='password')
+        response = self.client.get(reverse('show_all_properties'), {'city': 'BOSTON'})
+        self.assertEqual(response.context['cities'], [('BOSTON', 3), ('CAMBRIDGE', 1)])
+        self.assertEqual(response.context['zip_codes'], [('02134', 2), ('02135', 1)])
+        self.assertEqual(response.context['styles'], [('Colonial', 2), ('Ranch', 1)])
+        self.assertContains(response, '<option value="BOSTON" selected>BOSTON (3)</option>', html=True)
+        self.assertEqual(len(response.context['properties']), 3)
+
+        response = self.client.get(reverse('show_all_properties'), {'city': 'BOS'})
+        self.assertEqual(len(response.context['properties']), 0)
+
+
+class ViewportTest(TestCase):
+    """The viewport API validates its box and only lists single properties for small boxes."""
+
+    def setUp(self):
+        use_temp_data_dir(self)
+        make_properties([(42.36 + index / 1000, -71.06 + index / 1000) for index in range(20)])
+        rebuild_clusters()
+        make_user_profile()
+        self.client.login(username='marketer', password='password')
+
+    def get_viewport(self, bbox, zoom):
+        """Request the viewport API for bbox (west,south,east,north) at zoom."""
+        return self.client.get(reverse('property_viewport'), {'bbox': bbox, 'zoom': zoom})
+
+    def test_rejects_bad_boxes(self):
+        """Malformed, non-finite, out of range and inverted boxes are answered with 400."""
+        for bbox in ['x', '1,2,3', 'nan,42,-71,43', '-71,42,inf,43', '-200,42,-71,43', '-72,-91,-71,43',
+                     '-71,42,-72,43', '-72,43,-71,42']:
+            self.assertEqual(self.get_viewport(bbox, 17).status_code, 400, bbox)
+
+    def test_small_box_lists_properties(self):
+        """A zoomed in view returns the properties inside it."""
+        data = self.get_viewport('-71.07,42.35,-71.05,42.37', 17).json()
+        self.assertEqual(data['mode'], 'properties')
+        self.assertEqual(len(data['properties']), 11)
+
+    def test_large_box_is_clustered(self):
+        """The whole world at a detail zoom level falls back to clusters instead of one range per grid row."""
+        response = self.get_viewport('-180,-90,180,90', 18)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['mode'], 'clusters')
+        self.assertEqual(sum(cluster['count'] for cluster in data['clusters']), 20)
+
+
+class ListMapFormTest(SimpleTestCase):
+    """Drawn selections are only accepted with finite, in-range coordinates."""
+
+    def clean(self, selection):
+        """Return the map form for a list with the given selection (sent as JSON, like the map page does)."""
+        form = CreateListMapForm({'list_name': 'Drawn', 'radius_miles': 0, 'center_lat': 0, 'center_lon': 0,
+                                  'selection': json.dumps(selection)})
+        form.is_valid()
+        return form
+
+    def test_valid_polygon(self):
+        """Polygon points given as strings or numbers come back as floats."""
+        form = self.clean({'type': 'polygon', 'points': [['42.3', '-71.1'], [42.4, -71.1], [42.4, -71.0]]})
+        self.assertNotIn('selection', form.errors)
+        self.assertEqual(form.cleaned_data['selection'],
+                         {'type': 'polygon', 'points': [[42.3, -71.1], [42.4, -71.1], [42.4, -71.0]]})
+
+    def test_valid_circles(self):
+        """Circles at the edges of the valid range are accepted."""
+        circles = [[90.0, 180.0, 1.0], [-90.0, -180.0, 25.0], [42.36, -71.06, 0.5]]
+        form = self.clean({'type': 'circles', 'circles': circles})
+        self.assertNotIn('selection', form.errors)
+        self.assertEqual(form.cleaned_data['selection'], {'type': 'circles', 'circles': circles})
+
+    def test_rejects_bad_points(self):
+        """Non-finite and out of range polygon points and circle centres are rejected."""
+        for lat, lon in [('nan', -71.1), (42.3, 'inf'), ('-inf', -71.1), (90.5, -71.1), (-91, -71.1),
+                         (42.3, 180.5), (42.3, -181)]:
+            polygon = {'type': 'polygon', 'points': [[lat, lon], [42.4, -71.1], [42.4, -71.0]]}
+            self.assertIn('selection', self.clean(polygon).errors, (lat, lon))
+            circles = {'type': 'circles', 'circles': [[lat, lon, 1]]}
+            self.assertIn('selection', self.clean(circles).errors, (lat, lon))
+
+    def test_rejects_bad_radii(self):
+        """Circle radii must be finite, positive and at most MAX_CIRCLE_RADIUS miles."""
+        for radius in ['nan', 'inf', 0, -1, CreateListMapForm.MAX_CIRCLE_RADIUS + 1]:
+            circles = {'type': 'circles', 'circles': [[42.3, -71.1, radius]]}
+            self.assertIn('selection', self.clean(circles).errors, radius)
+
+
+class SearchTest(TestCase):
+    """The property search index follows saves, owner renames and bulk re-indexing."""
+
+    def setUp(self):
+        self.owner = make_owner('Jane Smith')
+        self.ids = make_properties([(42.3, -71.0), (42.31, -71.0)], owner=self.owner)
+        rebuild_search_index()
+
+    def test_match_query(self):
+        """Every word must match, the last as a prefix, and FTS5 syntax in the text is quoted away."""
+        self.assertEqual(build_match_query('12 Main st'), '"12" "Main" "st"*')
+        self.assertEqual(build_match_query('main OR "x" NEAR(y)'), '"main" "OR" "x" "NEAR" "y"*')
+        self.assertEqual(build_match_query(' -- '), '')
+
+    def test_index_follows_changes(self):
+        """Saves, owner renames and reindex_properties keep the index in step with the tables."""
+        self.assertEqual(sorted(ranked_property_ids('main')), self.ids)
+        self.assertEqual(ranked_property_ids('1 MAIN'), [self.ids[1]])
+
+        prop = Property.objects.get(pk=self.ids[0])
+        prop.address = '5 ELM ST'
+        prop.save()
+        self.assertEqual(ranked_property_ids('elm'), [self.ids[0]])
+
+        self.owner.name = 'Jane Doe'
+        self.owner.save()
+        self.assertEqual(sorted(ranked_property_ids('doe')), self.ids)
+        self.assertEqual(ranked_property_ids('smith'), [])
+
+        # Bulk writes skip the signals, so the loader re-indexes the ids it touched
+        Property.objects.filter(pk=self.ids[1]).update(address='9 OAK ST')
+        Property.objects.filter(pk=self.ids[0]).delete()
+        reindex_properties(self.ids)
+        self.assertEqual(ranked_property_ids('oak'), [self.ids[1]])
+        self.assertEqual(ranked_property_ids('elm'), [])
+        self.assertEqual(list(filter_by_search(Property.objects.all(), 'jane oa').values_list('pk', flat=True)),
+                         [self.ids[1]])
+
+
+class PaginationTest(TestCase):
+    """Property list pages: tampered cursors start over, and searches page only through results they can reach."""
+
+    def setUp(self):
+        make_properties([(42.36, -71.06 + index / 1000) for index in range(60)])
+        make_user_profile()
+        self.client.login(username='marketer', password='password')
+
+    def get_properties(self, **params):
+        """Request the property list and return the ids on the page."""
+        response = self.client.get(reverse('show_all_properties'), params)
+        self.assertEqual(response.status_code, 200, params)
+        return [prop.pk for prop in response.context['page_obj']]
+
+    def test_cursor_value_must_fit_sort_field(self):
+        """A cursor whose value isn't a number is ignored on numeric sorts."""
+        first_page = self.get_properties(sort='-assessed_value')
+        self.assertEqual(len(first_page), 50)
+        for sort in ('-assessed_value', 'year_built', 'assessed_value'):
+            expected = self.get_properties(sort=sort)
+            for value in ('x', None, [1], {'a': 1}):
+                cursor = encode_cursor(value, 1)
+                self.assertEqual(self.get_properties(sort=sort, after=cursor), expected)
+                self.assertEqual(self.get_properties(sort=sort, before=cursor), expected)
+
+    def test_valid_cursor_pages(self):
+        """A cursor taken from a page still leads to the next one."""
+        page = keyset_paginate(Property.objects.all(), sort_field='-assessed_value', per_page=50)
+        next_page = keyset_paginate(Property.objects.all(), sort_field='-assessed_value', after=page.next_cursor)
+        self.assertEqual(len(next_page), 10)
+        self.assertTrue(set(prop.pk for prop in page).isdisjoint(prop.pk for prop in next_page))
+
+    def test_ranked_cursor_must_be_a_position(self):
+        """A relevance cursor that doesn't hold a position in the results is ignored."""
+        rebuild_search_index()
+        expected = self.get_properties(search='main', sort='relevance')
+        self.assertEqual(len(expected), 50)
+        for value in ('x', None, [1]):
+            cursor = encode_cursor(value, 1)
+            self.assertEqual(self.get_properties(search='main', sort='relevance', after=cursor), expected)
+            self.assertEqual(self.get_properties(search='main', sort='relevance', before=cursor), expected)
+
+
+    def test_relevance_total_counts_ranked_results(self):
+        """Relevance pages show a total of the ranked results they can reach, noting how many matched in all."""
+        rebuild_search_index()
+        with mock.patch('project.views.ranked_property_ids', functools.partial(ranked_property_ids, limit=55)):
+            response = self.client.get(reverse('show_all_properties'), {'search': 'main'})
+            page = response.context['page_obj']
+            self.assertEqual((len(page), page.total, response.context['total_matches']), (50, 55, 60))
+            self.assertContains(response, 'the best matches of 60')
+            last_page = self.client.get(reverse('show_all_properties'),
+                                        {'search': 'main', 'sort': 'relevance', 'after': page.next_cursor})
+            self.assertEqual(len(last_page.context['page_obj']), 5)
+            self.assertFalse(last_page.context['page_obj'].has_next())
+
+    def test_search_without_words_is_not_ranked(self):
+        """A punctuation-only search filters nothing, so it pages every property in keyset order."""
+        rebuild_search_index()
+        response = self.client.get(reverse('show_all_properties'), {'search': '!!!'})
+        self.assertEqual(response.context['sort'], 'id')
+        self.assertNotIn('relevance', response.context['sort_options'])
+        page = response.context['page_obj']
+        self.assertEqual((len(page), page.total, response.context['total_matches']), (50, 60, 60))
+
+    def test_search_without_index_uses_keyset_order(self):
+        """Without FTS5 a search filters by address and pages in id order instead of by relevance."""
+        with mock.patch('project.views.search_available', return_value=False), \
+                mock.patch('project.search.search_available', return_value=False):
+            response = self.client.get(reverse('show_all_properties'), {'search': 'main', 'sort': 'relevance'})
+        self.assertEqual(response.context['sort'], 'id')
+        self.assertNotIn('relevance', response.context['sort_options'])
+        page = response.context['page_obj']
+        self.assertEqual((len(page), page.total), (50, 60))
+        self.assertEqual([prop.pk for prop in page], sorted(Property.objects.values_list('pk', flat=True))[:50])
+
+class ExportTest(TestCase):
+    """Every export format writes the same rows, and export jobs attach the finished file."""
+
+    def setUp(self):
+        self.ids = make_properties([(42.3 + index / 1000, -71.0) for index in range(10)])
+        self.list = make_list(make_user_profile())
+        sync_list_properties(self.list, self.ids)
+        self.expected = [export_row(prop) for prop in Property.objects.select_related('owner').order_by('pk')]
+
+        # Small chunks so the writers go through several batches
+        for name, value in (('EXPORT_CHUNK_SIZE', 3), ('ROWS_PER_YIELD', 3)):
+            patcher = mock.patch.object(exports, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, name):
+        """Write the list's export in format name and return the bytes."""
+        file = BytesIO()
+        EXPORT_FORMATS[name].write(self.list.get_members(), file)
+        return file.getvalue()
+
+    def test_csv(self):
+        """A header row, then one row per property in id order."""
+        rows = list(csv.reader(StringIO(self.write('csv').decode())))
+        self.assertEqual(rows[0], EXPORT_HEADER)
+        self.assertEqual(rows[1:], [[str(value) for value in row] for row in self.expected])
+
+    def test_ndjson(self):
+        """One object per property, keyed by the export field names."""
+        rows = [json.loads(line) for line in self.write('ndjson').decode().splitlines()]
+        self.assertEqual(rows, [dict(zip(EXPORT_FIELDS, row)) for row in self.expected])
+
+    @skipUnless(find_spec('openpyxl'), 'openpyxl is not installed')
+    def test_xlsx(self):
+        """The workbook has a Properties sheet with the header and every row."""
+        from openpyxl import load_workbook
+
+        sheet = load_workbook(BytesIO(self.write('xlsx')), read_only=True)['Properties']
+        rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual(rows[0], EXPORT_HEADER)
+        # Excel keeps 15 significant digits, so coordinates are compared approximately
+        self.assertEqual([row[:-2] for row in rows[1:]], [row[:-2] for row in self.expected])
+        for row, expected in zip(rows[1:], self.expected):
+            self.assertAlmostEqual(row[-2], expected[-2], places=9)
+            self.assertAlmostEqual(row[-1], expected[-1], places=9)
+
+    @skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet(self):
+        """The file has the export schema and one row group per fetched chunk."""
+        import pyarrow.parquet
+
+        parquet_file = pyarrow.parquet.ParquetFile(BytesIO(self.write('parquet')))
+        self.assertEqual(parquet_file.schema_arrow.names, EXPORT_FIELDS)
+        self.assertEqual(parquet_file.num_row_groups, 4)
+        self.assertEqual(parquet_file.read().to_pylist(), [dict(zip(EXPORT_FIELDS, row)) for row in self.expected])
+
+    def test_export_job(self):
+        """run_export_job writes the file under MEDIA_ROOT/exports, records progress and marks the job done."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            job = enqueue_job('export_list', {'list_id': self.list.pk, 'format': 'ndjson'})
+            with mock.patch.object(jobs, 'set_progress', wraps=jobs.set_progress) as progress:
+                run_job(claim_next_job())
+            self.assertEqual([call.args[1:] for call in progress.call_args_list], [(3, 10), (6, 10), (9, 10)])
+
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.progress), ('done', 100))
+            self.assertEqual(job.result_file.name, f'exports/list_{self.list.pk}_job_{job.pk}.ndjson')
+            with open(os.path.join(media_root, job.result_file.name)) as file:
+                self.assertEqual(len(file.read().splitlines()), 10)
+
+    def test_failed_export_job(self):
+        """A job for a list that no longer exists is marked failed with its error."""
+        job = enqueue_job('export_list', {'list_id': self.list.pk + 1, 'format': 'csv'})
+        run_job(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('does not exist', job.error)
+
+
+class JobQueueTest(TestCase):
+    """Jobs left running by a worker that died are queued again, and given up on after too many attempts."""
+
+    def setUp(self):
+        self.list = make_list(make_user_profile())
+        self.job = queue_list_build(self.list)
+
+    def make_stale(self, **fields):
+        """Make the job look claimed by a worker whose last heartbeat was ten minutes ago."""
+        long_ago = timezone.now() - timedelta(minutes=10)
+        fields = {'status': 'running', 'started': long_ago, 'heartbeat': long_ago, **fields}
+        Job.objects.filter(pk=self.job.pk).update(**fields)
+
+    def test_claim_records_heartbeat_and_attempt(self):
+        """Claiming a job starts its heartbeat and counts the attempt."""
+        job = claim_next_job()
+        self.assertEqual((job.pk, job.status, job.attempts), (self.job.pk, 'running', 1))
+        self.assertIsNotNone(job.heartbeat)
+        # A job with a recent heartbeat is left to its worker
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.assertIsNone(claim_next_job())
+
+    def test_stale_job_is_claimed_again(self):
+        """A job whose heartbeat stopped goes back in the queue and is claimed again."""
+        self.make_stale(attempts=1)
+        job = claim_next_job()
+        self.assertEqual((job.pk, job.status, job.attempts), (self.job.pk, 'running', 2))
+
+    def test_job_without_heartbeat_is_claimed_again(self):
+        """Jobs claimed before heartbeats existed are judged by their start time."""
+        self.make_stale(attempts=1, heartbeat=None)
+        self.assertEqual(claim_next_job().pk, self.job.pk)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2)
+    def test_stale_job_fails_after_max_attempts(self):
+        """The last attempt fails the job, and a list build marks its list failed."""
+        self.make_stale(attempts=2)
+        self.assertIsNone(claim_next_job())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'failed')
+        self.assertIn('stopped responding', self.job.error)
+        self.list.refresh_from_db()
+        self.assertEqual(self.list.build_status, 'failed')
@@ -22,12 +22,24 @@ urlpatterns = [
     # Property pages
     path('properties/', PropertyListView.as_view(), name='show_all_properties'),
     path('property/<int:pk>/', PropertyDetailView.as_view(), name='show_property'),
+    path('properties/viewport/', PropertyViewportView.as_view(), name='property_viewport'),
+    
+    # Owner pages
+    path('owners/', OwnerListView.as_view(), name='show_owners'),
+    path('owner/<int:pk>/', OwnerDetailView.as_view(), name='show_owner'),
     
     # List pages
     path('list/<int:pk>/', ListDetailView.as_view(), name='show_list'),
     path('list/create/', CreateListView.as_view(), name='create_list'),
     path('list/create/map/', CreateListMapView.as_view(), name='create_list_map'),
+    path('list/combine/', CombineListsView.as_view(), name='combine_lists'),
     path('list/<int:pk>/update/', UpdateListView.as_view(), name='update_list'),
     path('list/<int:pk>/delete/', DeleteListView.as_view(), name='delete_list'),
     path('list/<int:pk>/export/', ExportListView.as_view(), name='export_list'),
+    path('list/<int:pk>/status/', ListStatusView.as_view(), name='list_status'),
+    
+    # Background jobs
+    path('job/<int:pk>/', JobDetailView.as_view(), name='show_job'),
+    path('job/<int:pk>/status/', JobStatusView.as_view(), name='job_status'),
+    path('job/<int:pk>/download/', JobDownloadView.as_view(), name='download_job'),
 ]
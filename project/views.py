@@ -2,49 +2,35 @@
 # Author: Travis Falk(travisf@bu.edu), 12/2/2025
 # Description: View definitions for project app
 
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView, View
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView, View, FormView
 from django.shortcuts import render, redirect
-from .models import UserProfile, Property, PropertyOwner, List
-from .forms import CreateProfileForm, UpdateProfileForm, CreateListForm, CreateListMapForm
+from .models import UserProfile, Property, PropertyOwner, OwnerPortfolio, List, Job
+from .forms import CreateProfileForm, UpdateProfileForm, CreateListForm, CreateListMapForm, ListDetailsForm, CombineListsForm
 from django.urls import reverse
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator
+from django.core.cache import cache
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
-from django.http import HttpResponse
-import csv
-from math import radians, cos, sin, asin, sqrt
-
-
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate the great circle distance between two points on earth (in miles)."""
-    # Source: https://stackoverflow.com/questions/4913349/haversine-formula-in-python-bearing-and-distance-between-two-gps-points
-    
-    # Convert decimal degrees to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    
-    # Radius of earth in miles
-    r = 3956
-    
-    return c * r
-
-
-def geocode_address(address):
-    """Convert an address to latitude and longitude using our local database."""
-    # Search for a property with a matching address in our database
-    # Use icontains to allow for partial matches ("123 Main" matches "123 Main St")
-    property = Property.objects.filter(address__icontains=address).first()
-    
-    if property:
-        return property.lat, property.lon
-    else:
-        return None, None
+from django.http import StreamingHttpResponse, JsonResponse, HttpResponseNotModified, HttpResponse, FileResponse, Http404
+from .spatial import properties_in_box, MAX_CELL_RANGES
+from .geometry import grid_row
+from .clusters import clusters_in_box
+from .facets import facet_counts
+from .search import filter_by_search, ranked_property_ids, search_available, build_match_query
+from .pagination import keyset_paginate, ranked_paginate, sorted_ids_paginate
+from .snapshot import data_version
+import hashlib
+import io
+import math
+import os
+from .geocoding import PREFIX_END
+from .parcels import normalize_owner_name
+from .listbuilds import queue_list_build
+from .listsets import combine_lists
+from .analytics import get_list_analytics
+from .comparables import find_comparables, YEAR_BUILT_WINDOW
+from .exports import iter_gzip, EXPORT_FORMATS, available_formats, export_filename, export_job_threshold
+from .jobs import enqueue_job
 
 
 class CustomLoginRequiredMixin(LoginRequiredMixin):
@@ -65,7 +51,16 @@ class PropertyListView(CustomLoginRequiredMixin, ListView):
     model = Property
     template_name = 'project/show_all_properties.html'
     context_object_name = 'properties'
-    paginate_by = 50
+    
+    # Properties per page and the orderings offered (each is paired with id for stable keyset paging)
+    per_page = 50
+    sort_options = {
+        'id': 'Default',
+        'address': 'Address',
+        'assessed_value': 'Value (low to high)',
+        '-assessed_value': 'Value (high to low)',
+        'year_built': 'Year Built',
+    }
     
     def get_queryset(self):
         """Return the QuerySet of properties, optionally filtered."""
@@ -75,16 +70,21 @@ class PropertyListView(CustomLoginRequiredMixin, ListView):
         search_query = self.request.GET.get('search')
         city = self.request.GET.get('city')
         zip_code = self.request.GET.get('zip_code')
+        style = self.request.GET.get('style')
         min_value = self.request.GET.get('min_value')
         max_value = self.request.GET.get('max_value')
         
         # Apply filters if present
+        # City, zip code and style come from the facet dropdowns, so they match exactly (using the (city, id)
+        # and (zip_code, id) indexes); partial text such as "bos" belongs in the search box instead
         if search_query:
-            queryset = queryset.filter(address__icontains=search_query)
+            queryset = filter_by_search(queryset, search_query)
         if city:
-            queryset = queryset.filter(city__icontains=city)
+            queryset = queryset.filter(city=city)
         if zip_code:
-            queryset = queryset.filter(zip_code__icontains=zip_code)
+            queryset = queryset.filter(zip_code=zip_code)
+        if style:
+            queryset = queryset.filter(style=style)
         if min_value:
             queryset = queryset.filter(assessed_value__gte=min_value)
         if max_value:
@@ -102,12 +102,72 @@ class PropertyListView(CustomLoginRequiredMixin, ListView):
         context['search_filter'] = self.request.GET.get('search', '')
         context['city_filter'] = self.request.GET.get('city', '')
         context['zip_filter'] = self.request.GET.get('zip_code', '')
+        context['style_filter'] = self.request.GET.get('style', '')
         context['min_value_filter'] = self.request.GET.get('min_value', '')
         context['max_value_filter'] = self.request.GET.get('max_value', '')
         
-        # Get unique cities and zip codes for filter dropdowns
-        context['cities'] = Property.objects.values_list('city', flat=True).distinct().order_by('city')
-        context['zip_codes'] = Property.objects.values_list('zip_code', flat=True).distinct().order_by('zip_code')
+        # Get (value, count) pairs for the filter dropdowns from the precomputed facet table
+        # Each dropdown's counts respect the other dropdowns' current selections
+        selected = {
+            'city': context['city_filter'],
+            'zip_code': context['zip_filter'],
+            'style': context['style_filter'],
+        }
+        context['cities'] = facet_counts('city', **selected)
+        context['zip_codes'] = facet_counts('zip_code', **selected)
+        context['styles'] = facet_counts('style', **selected)
+        
+        # Keyset pagination: pages are found by (sort value, id) cursors instead of OFFSET
+        # A text search adds (and defaults to) ordering by relevance, where the database has a search index
+        # (text with no words, such as "!!!", doesn't filter anything, so it isn't ranked either)
+        sort_options = self.sort_options
+        rank_results = bool(build_match_query(context['search_filter'])) and search_available()
+        if rank_results:
+            sort_options = {'relevance': 'Best Match', **sort_options}
+        sort = self.request.GET.get('sort', 'relevance' if rank_results else 'id')
+        if sort not in sort_options:
+            sort = 'id'
+        queryset = self.object_list
+        
+        # The total is cached per filter combination until property data changes
+        filters = self.request.GET.copy()
+        for key in ('after', 'before', 'sort'):
+            filters.pop(key, None)
+        count_key = 'property_count:' + hashlib.md5(f'{data_version()}|{filters.urlencode()}'.encode()).hexdigest()
+        total = cache.get_or_set(count_key, queryset.count, 300)
+        context['total_matches'] = total
+        
+        if sort == 'relevance':
+            # Page through the best full-text matches (at most SEARCH_RESULT_LIMIT) that also pass the other filters
+            # The page total is the number of ranked results, so "of N" is never more than can be paged through
+            ranked_ids = ranked_property_ids(context['search_filter'])
+            matching = set(queryset.filter(pk__in=ranked_ids).values_list('pk', flat=True))
+            ranked_ids = [pk for pk in ranked_ids if pk in matching]
+            page = ranked_paginate(
+                queryset.select_related('owner'),
+                ranked_ids,
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+                per_page=self.per_page,
+                total=len(ranked_ids),
+            )
+        else:
+            page = keyset_paginate(
+                queryset.select_related('owner'),
+                sort_field=sort,
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+                per_page=self.per_page,
+                total=total,
+            )
+        context['page_obj'] = page
+        context['properties'] = page
+        context['sort'] = sort
+        context['sort_options'] = sort_options
+        
+        # Query string without the cursor, used to build the First/Previous/Next links
+        filters['sort'] = sort
+        context['page_query'] = filters.urlencode()
         
         return context
 
@@ -120,10 +180,104 @@ class PropertyDetailView(CustomLoginRequiredMixin, DetailView):
     context_object_name = 'property'
     
     def get_context_data(self, **kwargs):
-        """Add viewer_profile for navbar links when authenticated."""
+        """Add viewer_profile for navbar links and the nearest comparable properties."""
+        context = super().get_context_data(**kwargs)
+        profile = self.get_profile()
+        context['viewer_profile'] = profile
+        context['comparables'] = find_comparables(self.object)
+        context['year_built_window'] = YEAR_BUILT_WINDOW
+        return context
+
+
+class OwnerDetailView(CustomLoginRequiredMixin, DetailView):
+    """Define a view to show an owner's portfolio and properties."""
+    
+    model = PropertyOwner
+    template_name = 'project/show_owner.html'
+    context_object_name = 'owner'
+    
+    def get_context_data(self, **kwargs):
+        """Add viewer_profile, the precomputed portfolio and a page of the owner's properties."""
+        context = super().get_context_data(**kwargs)
+        profile = self.get_profile()
+        context['viewer_profile'] = profile
+        
+        portfolio = OwnerPortfolio.objects.filter(owner=self.object).first()
+        context['portfolio'] = portfolio
+        
+        # Most valuable properties first, 50 per page
+        page_obj = keyset_paginate(
+            Property.objects.filter(owner=self.object),
+            sort_field='-assessed_value',
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+            per_page=50,
+            total=portfolio.property_count if portfolio else 0,
+        )
+        context['page_obj'] = page_obj
+        context['properties'] = page_obj
+        
+        return context
+
+
+class OwnerListView(CustomLoginRequiredMixin, ListView):
+    """Define a view to rank owners by the value or size of their portfolios."""
+    
+    model = OwnerPortfolio
+    template_name = 'project/show_owners.html'
+    context_object_name = 'portfolios'
+    
+    per_page = 100
+    sort_options = {
+        '-total_assessed_value': 'Total Value',
+        '-property_count': 'Number of Properties',
+    }
+    
+    def get_queryset(self):
+        """Return the QuerySet of portfolios, optionally filtered by owner name and type."""
+        queryset = OwnerPortfolio.objects.all()
+        
+        # Owner name prefix, matched as a range scan on the normalized name index
+        name = normalize_owner_name(self.request.GET.get('name', ''))
+        owner_type = self.request.GET.get('owner_type')
+        if name:
+            queryset = queryset.filter(owner__normalized_name__gte=name, owner__normalized_name__lt=name + PREFIX_END)
+        if owner_type in ('company', 'individual'):
+            queryset = queryset.filter(owner__is_company=(owner_type == 'company'))
+        
+        return queryset
+    
+    def get_context_data(self, **kwargs):
+        """Add viewer_profile, filter parameters and one keyset page of portfolios."""
         context = super().get_context_data(**kwargs)
         profile = self.get_profile()
         context['viewer_profile'] = profile
+        
+        context['name_filter'] = self.request.GET.get('name', '')
+        context['owner_type_filter'] = self.request.GET.get('owner_type', '')
+        
+        sort = self.request.GET.get('sort', '-total_assessed_value')
+        if sort not in self.sort_options:
+            sort = '-total_assessed_value'
+        
+        page = keyset_paginate(
+            self.object_list.select_related('owner'),
+            sort_field=sort,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+            per_page=self.per_page,
+        )
+        context['page_obj'] = page
+        context['portfolios'] = page
+        context['sort'] = sort
+        context['sort_options'] = self.sort_options
+        
+        # Current filters, for building the pagination links
+        filters = self.request.GET.copy()
+        for key in ('after', 'before'):
+            filters.pop(key, None)
+        context['page_query'] = filters.urlencode()
+        
         return context
 
 
@@ -160,19 +314,57 @@ class ListDetailView(CustomLoginRequiredMixin, DetailView):
         profile = self.get_profile()
         context['viewer_profile'] = profile
         
-        # Add pagination for properties
-        properties_list = self.object.properties.all()
-        paginator = Paginator(properties_list, 50) # Show 50 properties per page
-        
-        page_number = self.request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        # Add keyset pagination for properties (50 per page, in id order)
+        # The total comes from the list's stored count rather than a COUNT query
+        if self.object.is_compressed():
+            # Pages are cut straight from the decoded ids; only the page's rows are fetched
+            page_obj = sorted_ids_paginate(
+                Property.objects.select_related('owner'),
+                self.object.get_member_ids(),
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+                per_page=50,
+                total=self.object.property_count,
+            )
+        else:
+            page_obj = keyset_paginate(
+                self.object.get_members().select_related('owner'),
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+                per_page=50,
+                total=self.object.property_count,
+            )
         
         context['page_obj'] = page_obj
         context['properties'] = page_obj
         
+        context['export_formats'] = available_formats()
+        context['export_in_background'] = self.object.property_count > export_job_threshold()
+        
+        # Analytics panel (cached on the list until its membership changes)
+        if self.object.build_status == 'ready' and self.object.property_count:
+            context['analytics'] = get_list_analytics(self.object)
+        
         return context
 
 
+class ListStatusView(CustomLoginRequiredMixin, View):
+    """Define a JSON endpoint the list page polls while the list is being built."""
+    
+    def get(self, request, *args, **kwargs):
+        """Return the list's build status, progress and current size."""
+        marketing_list = List.objects.filter(pk=self.kwargs['pk'], creator=self.get_profile()).values(
+            'build_status', 'build_progress', 'property_count').first()
+        if marketing_list is None:
+            raise Http404('No such list')
+        
+        return JsonResponse({
+            'status': marketing_list['build_status'],
+            'progress': marketing_list['build_progress'],
+            'property_count': marketing_list['property_count'],
+        })
+
+
 class ShowProfileView(CustomLoginRequiredMixin, TemplateView):
     """Define a view to show the user's profile dashboard."""
     
@@ -299,50 +491,12 @@ class CreateListView(CustomLoginRequiredMixin, CreateView):
         # Attach this profile to the list
         form.instance.creator = profile
         
-        # Get the center address and radius from the form
-        center_address = form.cleaned_data.get('center_address')
-        radius_miles = form.cleaned_data.get('radius_miles')
+        # Save the list, then geocode and fill it in the background so the request returns immediately
+        response = super().form_valid(form)
+        if form.cleaned_data.get('center_address') and form.cleaned_data.get('radius_miles'):
+            queue_list_build(self.object, geocode=True)
         
-        # Geocode the address to get lat/lon
-        if center_address and radius_miles:
-            lat, lon = geocode_address(center_address)
-            
-            if lat is not None and lon is not None:
-                # Store the geocoded coordinates
-                form.instance.center_lat = lat
-                form.instance.center_lon = lon
-                
-                # Save the list first
-                response = super().form_valid(form)
-                
-                # Find properties within radius
-                # USing bounding boxes to make this faster instead of checking every single property
-                # 1 degree of latitude is about 69 miles
-                # 1 degree of longitude is about 50 miles
-                lat_delta = radius_miles / 69.0
-                lon_delta = radius_miles / 50.0
-                
-                # First get a smaller list of properties that are roughly close by
-                nearby_properties = Property.objects.filter(
-                    lat__gte=lat - lat_delta,
-                    lat__lte=lat + lat_delta,
-                    lon__gte=lon - lon_delta,
-                    lon__lte=lon + lon_delta
-                )
-                
-                # Then check the exact distance for each one
-                for prop in nearby_properties:
-                    distance = haversine_distance(lat, lon, prop.lat, prop.lon)
-                    if distance <= radius_miles:
-                        self.object.properties.add(prop)
-                
-                return response
-            else:
-                # If geocoding fails, still save but without properties
-                return super().form_valid(form)
-        else:
-            # No address/radius provided, just save the list
-            return super().form_valid(form)
+        return response
 
 
 class UpdateListView(CustomLoginRequiredMixin, UpdateView):
@@ -352,14 +506,18 @@ class UpdateListView(CustomLoginRequiredMixin, UpdateView):
     
     def get_form_class(self):
         """Return the appropriate form class based on list type."""
-        if self.object.center_address:
+        if self.object.is_combined():
+            return ListDetailsForm
+        elif self.object.center_address:
             return CreateListForm
         else:
             return CreateListMapForm
             
     def get_template_names(self):
         """Return the appropriate template based on list type."""
-        if self.object.center_address:
+        if self.object.is_combined():
+            return ['project/update_list_details.html']
+        elif self.object.center_address:
             return ['project/update_list_form.html']
         else:
             return ['project/update_list_map.html']
@@ -376,89 +534,54 @@ class UpdateListView(CustomLoginRequiredMixin, UpdateView):
         return context
     
     def form_valid(self, form):
-        """Handle form submission and recalculate properties if address/radius changed."""
+        """Handle form submission and queue a rebuild of the properties if the area changed."""
+        response = super().form_valid(form)
+        
+        # Lists combined from other lists have no area to rebuild from
+        if self.object.is_combined():
+            return response
         
         # Check if this is a map-based list (blank address)
         if not self.object.center_address:
-            # Map-based update logic
-            response = super().form_valid(form)
-            
-            # Get updated values
-            center_lat = self.object.center_lat
-            center_lon = self.object.center_lon
-            radius_miles = self.object.radius_miles
-            
-            # Clear existing properties
-            self.object.properties.clear()
-            
-            # Find properties within radius
-            # Using the same bounding box logic as in CreateListView
-            lat_delta = radius_miles / 69.0
-            lon_delta = radius_miles / 50.0
-            
-            nearby_properties = Property.objects.filter(
-                lat__gte=center_lat - lat_delta,
-                lat__lte=center_lat + lat_delta,
-                lon__gte=center_lon - lon_delta,
-                lon__lte=center_lon + lon_delta
-            )
-            
-            # Calculate exact distances and add properties within radius
-            for prop in nearby_properties:
-                distance = haversine_distance(center_lat, center_lon, prop.lat, prop.lon)
-                if distance <= radius_miles:
-                    self.object.properties.add(prop)
-            
-            return response
-            
-        else:
-            # Address-based update logic
-            # Get the center address and radius from the form
-            center_address = form.cleaned_data.get('center_address')
-            radius_miles = form.cleaned_data.get('radius_miles')
-            
-            # Check if address or radius changed
-            # Note: self.object is already updated by super().form_valid(form) if we call it first
-            # But we need to compare with old values.
-            # However, UpdateView updates the object in form_valid.
-            
-            # Let's check changed data from form.changed_data
-            if 'center_address' in form.changed_data or 'radius_miles' in form.changed_data:
-                if center_address and radius_miles:
-                    # Geocode the address to get lat/lon
-                    lat, lon = geocode_address(center_address)
-                    
-                    if lat is not None and lon is not None:
-                        # Store the geocoded coordinates
-                        form.instance.center_lat = lat
-                        form.instance.center_lon = lon
-                        
-                        # Save the list first
-                        response = super().form_valid(form)
-                        
-                        # Clear existing properties and recalculate
-                        self.object.properties.clear()
-                        
-                        # Find properties within radius
-                        lat_delta = radius_miles / 69.0
-                        lon_delta = radius_miles / 50.0
-                        
-                        nearby_properties = Property.objects.filter(
-                            lat__gte=lat - lat_delta,
-                            lat__lte=lat + lat_delta,
-                            lon__gte=lon - lon_delta,
-                            lon__lte=lon + lon_delta
-                        )
-                        
-                        for prop in nearby_properties:
-                            distance = haversine_distance(lat, lon, prop.lat, prop.lon)
-                            if distance <= radius_miles:
-                                self.object.properties.add(prop)
-                        
-                        return response
-            
-            # If no changes to address/radius, just save normally
-            return super().form_valid(form)
+            # Map-based lists are rebuilt from the drawn shape (or radius)
+            queue_list_build(self.object)
+        
+        elif 'center_address' in form.changed_data or 'radius_miles' in form.changed_data:
+            # Address-based lists are re-geocoded and rebuilt when the address or radius changed
+            if self.object.radius_miles:
+                queue_list_build(self.object, geocode=True)
+        
+        return response
+
+
+class CombineListsView(CustomLoginRequiredMixin, FormView):
+    """Define a view to make a new list from the union, intersection or difference of two lists."""
+    
+    form_class = CombineListsForm
+    template_name = 'project/combine_lists_form.html'
+    
+    def get_form_kwargs(self):
+        """Limit the list choices to the logged in user's lists."""
+        kwargs = super().get_form_kwargs()
+        kwargs['profile'] = self.get_profile()
+        return kwargs
+    
+    def get_context_data(self, **kwargs):
+        """Add viewer_profile for navbar links when authenticated."""
+        context = super().get_context_data(**kwargs)
+        context['viewer_profile'] = self.get_profile()
+        return context
+    
+    def form_valid(self, form):
+        """Create the combined list and show it."""
+        combined = combine_lists(
+            form.cleaned_data['operation'],
+            form.cleaned_data['first'],
+            form.cleaned_data['second'],
+            form.cleaned_data['list_name'],
+            self.get_profile(),
+        )
+        return redirect('show_list', pk=combined.pk)
 
 
 class DeleteListView(CustomLoginRequiredMixin, DeleteView):
@@ -491,10 +614,14 @@ class DeleteListView(CustomLoginRequiredMixin, DeleteView):
 
 
 class ExportListView(CustomLoginRequiredMixin, View):
-    """Define a view to export a list to CSV."""
+    """Define a view to export a list as CSV, NDJSON, XLSX or Parquet."""
     
     def get(self, request, *args, **kwargs):
-        """Handle the GET request and return a CSV file."""
+        """
+        Handle the GET request: stream back the export (?format=, gzipped when
+        ?gzip=1), or for large lists queue a background export job and send the
+        user to its status page.
+        """
         # Get the list object
         list_pk = self.kwargs.get('pk')
         marketing_list = List.objects.get(pk=list_pk)
@@ -504,48 +631,91 @@ class ExportListView(CustomLoginRequiredMixin, View):
         if marketing_list.creator != profile:
             return redirect('show_profile')
         
-        # Create the HttpResponse object with CSV header
-        # Django documentation for CSV output
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{marketing_list.list_name}_properties.csv"'
-        
-        # Create CSV writer
-        writer = csv.writer(response)
-        
-        # Write header row
-        writer.writerow([
-            'Property Address',
-            'City',
-            'Zip Code',
-            'Style',
-            'Year Built',
-            'Owner Name',
-            'Owner Address',
-            'Owner Type',
-            'Assessed Value',
-            'Latitude',
-            'Longitude'
-        ])
-        
-        # Write data rows
-        for property in marketing_list.properties.all():
-            writer.writerow([
-                property.address,
-                property.city,
-                property.zip_code,
-                property.style,
-                property.year_built,
-                property.owner.name,
-                property.owner.address,
-                'Company' if property.owner.is_company else 'Individual',
-                property.assessed_value,
-                property.lat,
-                property.lon
-            ])
+        export_format = EXPORT_FORMATS.get(request.GET.get('format', 'csv'))
+        if export_format is None or not export_format.available():
+            raise Http404('Unknown export format')
+        filename = export_filename(marketing_list, export_format)
+        
+        # Large exports are written by a worker so the request returns immediately
+        if marketing_list.property_count > export_job_threshold():
+            job = enqueue_job('export_list', {
+                'list_id': marketing_list.pk,
+                'format': export_format.name,
+                'filename': filename,
+                'description': f'{export_format.label} export of {marketing_list.list_name}',
+            }, creator=profile)
+            return redirect('show_job', pk=job.pk)
+        
+        queryset = marketing_list.get_members()
+        if not export_format.streaming:
+            buffer = io.BytesIO()
+            export_format.write(queryset, buffer)
+            response = HttpResponse(buffer.getvalue(), content_type=export_format.content_type)
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        
+        # Stream the rows out as they are written so memory stays flat for large lists
+        # Django documentation for streaming large CSV files
+        chunks = export_format.iter_chunks(queryset)
         
+        if request.GET.get('gzip'):
+            response = StreamingHttpResponse(iter_gzip(chunks), content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = StreamingHttpResponse(chunks, content_type=export_format.content_type)
+        
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
 
 
+class JobDetailView(CustomLoginRequiredMixin, DetailView):
+    """Define a view to show the progress of one of the user's background jobs."""
+    
+    model = Job
+    template_name = 'project/show_job.html'
+    context_object_name = 'job'
+    
+    def get_queryset(self):
+        """Return only the logged in user's jobs."""
+        return Job.objects.filter(creator=self.get_profile())
+    
+    def get_context_data(self, **kwargs):
+        """Add viewer_profile for navbar links when authenticated."""
+        context = super().get_context_data(**kwargs)
+        context['viewer_profile'] = self.get_profile()
+        return context
+
+
+class JobStatusView(CustomLoginRequiredMixin, View):
+    """Define a JSON endpoint the job page polls for status and progress."""
+    
+    def get(self, request, *args, **kwargs):
+        """Return the job's status, progress, error and (once finished) download URL."""
+        job = Job.objects.filter(pk=self.kwargs['pk'], creator=self.get_profile()).first()
+        if job is None:
+            raise Http404('No such job')
+        
+        return JsonResponse({
+            'status': job.status,
+            'progress': job.progress,
+            'error': job.error.split('\n')[0] if job.error else '',
+            'download_url': reverse('download_job', kwargs={'pk': job.pk}) if job.result_file else None,
+        })
+
+
+class JobDownloadView(CustomLoginRequiredMixin, View):
+    """Define a view to download the file a finished job produced."""
+    
+    def get(self, request, *args, **kwargs):
+        """Send back the job's result file as an attachment."""
+        job = Job.objects.filter(pk=self.kwargs['pk'], creator=self.get_profile(), status='done').first()
+        if job is None or not job.result_file:
+            raise Http404('No file for this job')
+        
+        return FileResponse(job.result_file.open('rb'), as_attachment=True,
+                            filename=job.payload.get('filename') or os.path.basename(job.result_file.name))
+
+
 class LogoutConfirmationView(TemplateView):
     """Define a view to show logout confirmation."""
     
@@ -586,28 +756,8 @@ class CreateListMapView(CustomLoginRequiredMixin, View):
             new_list.center_address = "" # Blank address signals map-based list
             new_list.save()
             
-            # Get data from form
-            center_lat = new_list.center_lat
-            center_lon = new_list.center_lon
-            radius_miles = new_list.radius_miles
-            
-            # Find properties within radius
-            # Using the same bounding box logic as in CreateListView
-            lat_delta = radius_miles / 69.0
-            lon_delta = radius_miles / 50.0
-            
-            nearby_properties = Property.objects.filter(
-                lat__gte=center_lat - lat_delta,
-                lat__lte=center_lat + lat_delta,
-                lon__gte=center_lon - lon_delta,
-                lon__lte=center_lon + lon_delta
-            )
-            
-            # Calculate exact distances and add properties within radius
-            for prop in nearby_properties:
-                distance = haversine_distance(center_lat, center_lon, prop.lat, prop.lon)
-                if distance <= radius_miles:
-                    new_list.properties.add(prop)
+            # Find the properties inside the drawn shape (or radius) in the background
+            queue_list_build(new_list)
             
             # Redirect to the list detail page
             return redirect('show_list', pk=new_list.pk)
@@ -621,3 +771,53 @@ class CreateListMapView(CustomLoginRequiredMixin, View):
             'form': form
         }
         return render(request, self.template_name, context)
+
+
+class PropertyViewportView(CustomLoginRequiredMixin, View):
+    """Define a JSON endpoint returning the properties (or clusters of them) inside a map viewport."""
+    
+    # At this zoom and closer, individual properties are returned instead of clusters
+    DETAIL_ZOOM = 16
+    
+    # Most individual properties returned before falling back to clusters
+    MAX_PROPERTIES = 2000
+    
+    def get(self, request):
+        """Handle ?bbox=west,south,east,north&zoom=N (the order of Leaflet's toBBoxString)."""
+        try:
+            min_lon, min_lat, max_lon, max_lat = [float(value) for value in request.GET['bbox'].split(',')]
+            zoom = int(request.GET.get('zoom', 0))
+        except (KeyError, ValueError):
+            return JsonResponse({'error': 'Expected bbox=west,south,east,north and zoom=N'}, status=400)
+        if not all(math.isfinite(value) for value in (min_lon, min_lat, max_lon, max_lat)) \
+                or not -90 <= min_lat <= max_lat <= 90 or not -180 <= min_lon <= max_lon <= 180:
+            return JsonResponse({'error': 'bbox must have -180 <= west <= east <= 180 and -90 <= south <= north <= 90'},
+                                status=400)
+        
+        # The answer only changes when property data changes, so the ETag is the data version plus the request
+        etag = '"' + hashlib.md5(f'{data_version()}|{request.GET.urlencode()}'.encode()).hexdigest() + '"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+        
+        # Boxes taller than MAX_CELL_RANGES grid rows are always clustered, however far the client says it is zoomed in
+        data = None
+        if zoom >= self.DETAIL_ZOOM and grid_row(max_lat) - grid_row(min_lat) < MAX_CELL_RANGES:
+            properties = list(
+                properties_in_box(min_lat, max_lat, min_lon, max_lon)
+                .values('id', 'lat', 'lon', 'address', 'assessed_value')[:self.MAX_PROPERTIES + 1]
+            )
+            if len(properties) <= self.MAX_PROPERTIES:
+                for prop in properties:
+                    prop['url'] = reverse('show_property', kwargs={'pk': prop['id']})
+                data = {'mode': 'properties', 'properties': properties}
+        
+        if data is None:
+            data = {'mode': 'clusters', 'clusters': clusters_in_box(zoom, min_lat, max_lat, min_lon, max_lon)}
+        
+        response = JsonResponse(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
+